@@ -6,12 +6,16 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), 'src')))
 
 from modules.db_connector import DBConnector
+from modules.snapshot import SnapshotReader
+from modules.live_prices import get_live_price_cache
+from modules.forecast_store import read_latest_forecast
+from modules.repository import TimeSeriesRepository
 from pipeline.collector import MarketDataCollector, FredDataCollector
-from ui.dashboard import render_dashboard
+from ui.dashboard import render_dashboard, render_correlation_heatmap
+from ui.charts import plot_line_chart, plot_forecast_chart
 
 from modules.converter import get_gold_don_price_krw
 import pandas as pd
-import plotly.express as px
 
 def main():
     st.set_page_config(
@@ -26,6 +30,12 @@ def main():
         st.header("⚙️ Configuration")
         st.info("System Status: **Online**")
         
+        # Connection pool / fallback state for monitoring
+        with st.expander("🔌 DB Connection"):
+            pool_stats = DBConnector.pool_stats()
+            st.caption(f"Backend: **{pool_stats['backend']}**")
+            st.json(pool_stats, expanded=False)
+        
         # SEO / About Section
         st.markdown("### ℹ️ 서비스 소개")
         st.markdown("""
@@ -55,12 +65,15 @@ def main():
 
     st.markdown("### 🥇 Standard: Gold 1 Don (3.75g)")
 
-    # 1. Fetch Live Data for KPIs
+    # 1. Live Data for KPIs: served from the shared cache, refreshed in the background
     market_collector = MarketDataCollector()
-    current_prices = market_collector.fetch_current_prices() 
+    live_cache = get_live_price_cache(market_collector.fetch_current_prices)
+    current_prices = live_cache.prices()
     # current_prices keys: "Gold" (USD/oz), "Silver", "USD/KRW", etc.
     
-    if current_prices:
+    if not current_prices:
+        st.caption("⏳ Live prices are loading. They will appear on the next refresh.")
+    else:
         # Calculate Derived KPIs
         gold_oz_usd = current_prices.get("Gold")
         usd_krw = current_prices.get("USD/KRW")
@@ -79,6 +92,10 @@ def main():
         with kpi4:
             dxy = current_prices.get("DXY")
             st.metric("Dollar Index (DXY)", f"{dxy:,.2f}" if dxy else "N/A")
+        
+        stale = [r["stale_since"] for r in live_cache.snapshot().values() if r and r["stale_since"]]
+        if stale:
+            st.caption(f"⚠️ Live prices are stale since {min(stale):%Y-%m-%d %H:%M:%S} UTC (upstream not responding).")
 
     st.markdown("---")
     
@@ -86,31 +103,51 @@ def main():
     # We want to show the Trend of Gold 1 Don (Derived)
     connector = DBConnector(host="localhost", user="root", password="", database="dashboard_db")
     
-    # Fetch Derived Data
-    query_derived = "SELECT date, value FROM macro_derived WHERE metric='GOLD_KRW_DON' ORDER BY date ASC"
-    df_derived = connector.get_data(query_derived)
+    repository = TimeSeriesRepository(connector)
     
-    if df_derived is not None and not df_derived.empty:
+    # Only the selected range is loaded (3 years covers the longest valuation window)
+    history_ranges = {"6M": pd.DateOffset(months=6), "1Y": pd.DateOffset(years=1), "3Y": pd.DateOffset(years=3), "All": None}
+    range_label = st.radio("History", list(history_ranges), index=2, horizontal=True)
+    range_start = pd.Timestamp.today().normalize() - history_ranges[range_label] if history_ranges[range_label] else None
+    
+    # Fetch Derived Data: memory-mapped columnar snapshot first, live DB only when it is stale
+    df_derived = SnapshotReader().read_frame("macro_derived", filters={"metric": "GOLD_KRW_DON"}, columns=["date", "value"])
+    if df_derived is not None:
         df_derived['date'] = pd.to_datetime(df_derived['date'])
+        if range_start is not None:
+            df_derived = df_derived[df_derived['date'] >= range_start]
+    else:
+        df_derived = repository.get_series(["GOLD_KRW_DON"], start=range_start, source="macro_derived")[['date', 'value']]
+    
+    if df_derived is not None and not df_derived.empty:
         
         col_main, col_side = st.columns([2, 1])
         
         with col_main:
             st.subheader("📈 Gold Price Trend (KRW / 1 Don)")
-            fig = px.line(df_derived, x='date', y='value', title="Gold 1 Don Price (KRW)")
-            fig.update_layout(xaxis_title="Date", yaxis_title="Price (KRW)")
+            fig = plot_line_chart(df_derived, 'date', 'value', title="Gold 1 Don Price (KRW)",
+                                  xaxis_title="Date", yaxis_title="Price (KRW)")
             st.plotly_chart(fig, use_container_width=True)
             
         with col_side:
             st.subheader("📊 Analysis & Alerts")
             
-            # 1. Market Regime
-            history_df = market_collector.fetch_historical_data(period="6mo")
-            if not history_df.empty:
+            # 1. Market Regime: stored by the signals stage, live classification only if none yet
+            regime = None
+            df_regime = connector.get_data("SELECT date, regime_type FROM market_regime ORDER BY date DESC LIMIT 1")
+            if df_regime is not None and not df_regime.empty:
+                regime = df_regime['regime_type'].iloc[0]
+            else:
+                # Stored closes from macro_raw; the 6-month download only if they are stale
                 from analysis.regime import MarketRegimeClassifier
-                classifier = MarketRegimeClassifier(history_df)
-                regime = classifier.classify_current_regime()
-                
+                classifier = MarketRegimeClassifier.from_repository(
+                    repository,
+                    start=pd.Timestamp.today().normalize() - pd.DateOffset(months=6),
+                    fallback=lambda: market_collector.fetch_historical_data(period="6mo")
+                )
+                if not classifier.df.empty:
+                    regime = classifier.classify_current_regime()
+            if regime:
                 regime_color = "green" if "Risk-On" in regime or "Inflation" in regime else "red"
                 st.markdown(f"""
                 <div style="margin-bottom: 20px; padding: 15px; border-radius: 8px; background-color: {regime_color}; color: white; text-align: center;">
@@ -119,16 +156,25 @@ def main():
                 </div>
                 """, unsafe_allow_html=True)
             
-            # 2. Valuation Alert (Z-Score)
-            from analysis.alerts import ValuationAlertSystem
-            val_system = ValuationAlertSystem(df_derived)
-            status = val_system.check_valuation_status()
+            # 2. Valuation Alert (Z-Score): latest stored z-scores per window, computed here if none yet
+            from analysis.alerts import ValuationAlertSystem, status_from_zscores
+            status = None
+            df_zscores = connector.get_data(
+                "SELECT window_label, z_score FROM valuation_zscore WHERE metric='GOLD_KRW_DON' "
+                "AND date = (SELECT MAX(date) FROM valuation_zscore WHERE metric='GOLD_KRW_DON')"
+            )
+            if df_zscores is not None and not df_zscores.empty:
+                status = status_from_zscores(dict(zip(df_zscores['window_label'], df_zscores['z_score'].astype(float))))
+            if status is None:
+                status = ValuationAlertSystem(df_derived).check_valuation_status()
             
             if status:
+                z_text = " · ".join(f"{label} {z:+.2f}" for label, z in status['z_scores'].items() if pd.notna(z))
                 st.markdown(f"""
                 <div style="padding: 15px; border: 2px solid {status['color']}; border-radius: 8px; text-align: center;">
                     <div style="color: {status['color']}; font-weight: bold;">{status['message']}</div>
-                    <div style="font-size: 0.8em; margin-top: 5px;">Z-Score: {status['z_score']:.2f} σ</div>
+                    <div style="font-size: 0.8em; margin-top: 5px;">Z-Score ({status['window']}): {status['z_score']:.2f} σ</div>
+                    <div style="font-size: 0.7em; opacity: 0.8;">{z_text}</div>
                 </div>
                 """, unsafe_allow_html=True)
                 
@@ -137,69 +183,51 @@ def main():
                 
             st.info("💡 **Tip**: Buy when Z-Score < -1.0")
 
+        # Cross-asset correlation / volatility, precomputed by the correlation stage
+        corr_matrix, corr_date = repository.get_correlation_matrix(window=30)
+        if corr_matrix is not None:
+            with st.expander(f"🔗 Cross-Asset Correlation (30D, as of {corr_date:%Y-%m-%d})"):
+                render_correlation_heatmap(corr_matrix)
+                volatility, _ = repository.get_volatility(window=30)
+                if volatility is not None:
+                    st.caption("Annualized volatility (30D): " + " · ".join(f"{name} {vol:.1%}" for name, vol in volatility.items()))
+
     else:
         st.warning("No historical derived data found. Please run ingest pipeline.")
 
     st.markdown("---")
     st.subheader("🔮 AI Price Forecast (30 Days)")
     
+    # Forecasts are fitted by the pipeline (src/pipeline/forecast.py); the page only reads them
+    forecast = read_latest_forecast(connector, "GOLD_KRW_DON", 30) if df_derived is not None else None
+    
     if df_derived is not None and len(df_derived) > 30:
-        with st.spinner("Training AI Model (Prophet)..."):
+        if forecast is not None:
             from analysis.predictor import GoldPredictor
-            predictor = GoldPredictor(df_derived)
+            metrics = GoldPredictor.metrics_from_forecast(forecast, days=30)
             
-            if predictor.train():
-                forecast = predictor.predict(days=30)
-                metrics = predictor.get_forecast_metrics()
-                
-                # Show Metrics
-                m1, m2, m3 = st.columns(3)
-                with m1:
-                    st.metric("30-Day Forecast", f"₩{metrics['future_estimated']:,.0f}")
-                with m2:
-                    st.metric("Expected Change", f"{metrics['change_pct']:.2f}%", 
-                             delta_color="normal" if metrics['trend']=="UP" else "inverse")
-                with m3:
-                    st.caption("Model: Facebook Prophet")
-                    st.caption("Confidence: 95% Interval")
+            # Show Metrics
+            m1, m2, m3 = st.columns(3)
+            with m1:
+                st.metric("30-Day Forecast", f"₩{metrics['future_estimated']:,.0f}")
+            with m2:
+                st.metric("Expected Change", f"{metrics['change_pct']:.2f}%", 
+                         delta_color="normal" if metrics['trend']=="UP" else "inverse")
+            with m3:
+                # Engine recorded with the stored forecast, not the one this process would pick
+                engine = forecast['engine'].iloc[-1]
+                engine_labels = {"prophet": "Facebook Prophet", "fast": "Exponential Smoothing"}
+                st.caption("Model: " + engine_labels.get(engine, "Unknown"))
+                st.caption("Confidence: 95% Interval")
 
-                # Plot Forecast
-                # We use Plotly for interactive chart
-                # forecast has 'ds', 'yhat', 'yhat_lower', 'yhat_upper'
-                
-                fig_pred = px.line(forecast, x='ds', y='yhat', title="AI Predicted Trend")
-                
-                # Add Confidence Interval (Upper/Lower) as filled area?
-                # For simplicity in Streamlit standard chart, we might stick to line.
-                # Or filter for only future part to highlight it.
-                
-                # Highlight future
-                future_only = forecast[forecast['ds'] > df_derived['date'].max()]
-                
-                import plotly.graph_objects as go
-                fig_go = go.Figure()
-                
-                # Historical Data
-                fig_go.add_trace(go.Scatter(x=df_derived['date'], y=df_derived['value'], mode='lines', name='Actual History'))
-                
-                # Prediction
-                fig_go.add_trace(go.Scatter(x=future_only['ds'], y=future_only['yhat'], mode='lines', name='Predicted (AI)', line=dict(dash='dash', color='purple')))
-                
-                # Confidence Interval
-                fig_go.add_trace(go.Scatter(
-                    x=pd.concat([future_only['ds'], future_only['ds'][::-1]]),
-                    y=pd.concat([future_only['yhat_upper'], future_only['yhat_lower'][::-1]]),
-                    fill='toself',
-                    fillcolor='rgba(128, 0, 128, 0.2)',
-                    line=dict(color='rgba(255,255,255,0)'),
-                    name='Confidence Interval'
-                ))
-                
-                fig_go.update_layout(title="Gold Price Scenario (30 Days)", xaxis_title="Date", yaxis_title="Price (KRW)")
-                st.plotly_chart(fig_go, use_container_width=True)
-                
-            else:
-                st.error("Not enough data to train AI model (Need > 30 days).")
+            # Plot Forecast: history (downsampled to the chart width) + forecast and its interval.
+            # Built once per data version and reused across reruns.
+            fig_go = plot_forecast_chart(df_derived, forecast, title="Gold Price Scenario (30 Days)",
+                                         yaxis_title="Price (KRW)")
+            st.plotly_chart(fig_go, use_container_width=True)
+            
+        else:
+            st.info("The forecast has not been computed yet. It is refreshed by the daily pipeline.")
     else:
         st.info("Insufficient data for AI prediction. Need at least 30 historical data points.")
 
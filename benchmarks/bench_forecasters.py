@@ -0,0 +1,95 @@
+"""
+Compares the forecasting engines of GoldPredictor (Prophet vs the fast NumPy engine).
+
+Holds out the last --horizon days of GOLD_KRW_DON, fits each engine on the rest and
+reports import/fit/predict latency plus MAE, MAPE and interval coverage on the
+held-out days. The SQLite database is opened read-only.
+
+Usage:
+    python benchmarks/bench_forecasters.py [--db dashboard.db] [--horizon 30] [--repeat 3]
+"""
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import importlib
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.analysis.predictor import GoldPredictor, FORECAST_ENGINES, prophet_available
+
+
+def load_series(db_path, metric):
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    df = pd.read_sql("SELECT date, value FROM macro_derived WHERE metric = ? ORDER BY date", conn, params=(metric,))
+    conn.close()
+    df['date'] = pd.to_datetime(df['date'], format='ISO8601')
+    df['value'] = df['value'].astype(float)
+    return df
+
+
+def evaluate(engine, train, test, horizon, repeat):
+    fit_times, predict_times = [], []
+    for _ in range(repeat):
+        predictor = GoldPredictor(train, engine=engine)
+        start = time.perf_counter()
+        predictor.train()
+        fit_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        forecast = predictor.predict(days=horizon)
+        predict_times.append(time.perf_counter() - start)
+
+    scored = test.merge(forecast, left_on='date', right_on='ds', how='inner')
+    errors = scored['value'] - scored['yhat']
+    covered = (scored['value'] >= scored['yhat_lower']) & (scored['value'] <= scored['yhat_upper'])
+    return {
+        "fit (s)": min(fit_times),
+        "predict (s)": min(predict_times),
+        "MAE": float(errors.abs().mean()),
+        "MAPE (%)": float((errors.abs() / scored['value']).mean() * 100),
+        "coverage (%)": float(covered.mean() * 100),
+        "scored days": len(scored)
+    }
+
+
+def format_cell(value):
+    if not isinstance(value, float):
+        return f"{value:>14}"
+    return f"{value:>14,.1f}" if abs(value) >= 100 else f"{value:>14.4f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=os.path.join(os.path.dirname(__file__), "..", "dashboard.db"))
+    parser.add_argument("--metric", default="GOLD_KRW_DON")
+    parser.add_argument("--horizon", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = load_series(args.db, args.metric)
+    cutoff = df['date'].max() - pd.Timedelta(days=args.horizon)
+    train, test = df[df['date'] <= cutoff], df[df['date'] > cutoff]
+
+    results = {}
+    for engine in FORECAST_ENGINES:
+        if engine == "prophet":
+            if not prophet_available():
+                print("Prophet not installed. Skipping.")
+                continue
+            start = time.perf_counter()
+            importlib.import_module("prophet")
+            import_time = time.perf_counter() - start
+        else:
+            import_time = 0.0
+        results[engine] = dict({"import (s)": import_time}, **evaluate(engine, train, test, args.horizon, args.repeat))
+
+    print(f"Forecaster benchmark: {args.metric}, {len(train)} training rows, {args.horizon}-day holdout")
+    engines = list(results)
+    print(f"{'metric':<16}" + "".join(f"{e:>14}" for e in engines))
+    for key in next(iter(results.values())):
+        print(f"{key:<16}" + "".join(format_cell(results[e][key]) for e in engines))
+
+
+if __name__ == "__main__":
+    main()
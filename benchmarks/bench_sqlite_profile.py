@@ -0,0 +1,135 @@
+"""
+Compares the default SQLite settings with the tuned profile (SQLITE_TUNED=true).
+
+Measures, on a throwaway database:
+  1. Bulk upsert of a multi-year daily backfill (BatchWriter, one transaction)
+  2. Per-day commits, like repeated small pipeline runs
+  3. Range reads of one metric (dashboard query)
+  4. Reader latency while a writer holds the write lock
+
+Usage:
+    python benchmarks/bench_sqlite_profile.py [--rows 200000]
+"""
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import tempfile
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.modules.db_connector import apply_sqlite_profile, SQLITE_TUNED_CACHED_STATEMENTS
+from src.modules.batch_writer import BatchWriter
+
+DDL = """
+CREATE TABLE macro_raw (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT, symbol TEXT, value REAL, unit TEXT, source TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(date, symbol)
+);
+"""
+COLUMNS = ["date", "symbol", "value", "unit", "source"]
+SYMBOLS = ["GOLD_USD_OZ", "SILVER_USD_OZ", "USDKRW", "DXY_INDEX", "SPX_INDEX", "KOSPI_INDEX"]
+
+
+def connect(path, tuned):
+    if tuned:
+        conn = sqlite3.connect(path, cached_statements=SQLITE_TUNED_CACHED_STATEMENTS)
+        apply_sqlite_profile(conn)
+    else:
+        conn = sqlite3.connect(path)
+    return conn
+
+
+def make_rows(n_rows, offset=0):
+    rows = []
+    for i in range(n_rows):
+        day, sym = divmod(i + offset, len(SYMBOLS))
+        date = f"{2000 + day // 366:04d}-{(day % 366) // 31 + 1:02d}-{(day % 31) + 1:02d} {day % 24:02d}:00:00"
+        rows.append((date, SYMBOLS[sym], 1000.0 + i * 0.01, "USD", "bench"))
+    return rows
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def run_profile(tuned, n_rows):
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_sqlite_"), "bench.db")
+    conn = connect(path, tuned)
+    conn.executescript(DDL)
+
+    results = {}
+    rows = make_rows(n_rows)
+    results["bulk upsert (s)"], _ = timed(lambda: BatchWriter(conn).upsert("macro_raw", COLUMNS, rows, ["value"]))
+
+    small = make_rows(len(SYMBOLS) * 200, offset=n_rows)
+
+    def per_day_commits():
+        writer = BatchWriter(conn)
+        for i in range(0, len(small), len(SYMBOLS)):
+            writer.upsert("macro_raw", COLUMNS, small[i:i + len(SYMBOLS)], ["value"])
+
+    results["200 small commits (s)"], _ = timed(per_day_commits)
+
+    def range_reads():
+        for _ in range(50):
+            conn.execute(
+                "SELECT date, value FROM macro_raw WHERE symbol = ? AND date >= ? ORDER BY date",
+                ("GOLD_USD_OZ", "2005-01-01")
+            ).fetchall()
+
+    results["50 range reads (s)"], _ = timed(range_reads)
+
+    # Reader while a writer holds the write lock (nightly ingest committing vs dashboard).
+    # With the rollback journal EXCLUSIVE locks readers out; in WAL mode it does not.
+    writer_conn = connect(path, tuned)
+    writer_conn.execute("BEGIN EXCLUSIVE")
+    writer_conn.execute("UPDATE macro_raw SET value = value + 1 WHERE symbol = 'USDKRW'")
+    reader_result = {}
+
+    def reader():
+        reader_conn = connect(path, tuned)
+        reader_conn.execute("PRAGMA busy_timeout = 2000")
+        start = time.perf_counter()
+        try:
+            reader_conn.execute("SELECT COUNT(*) FROM macro_raw").fetchone()
+            reader_result["latency"] = f"{time.perf_counter() - start:.4f}"
+        except sqlite3.OperationalError:
+            reader_result["latency"] = "blocked"
+        reader_conn.close()
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    thread.join()
+    writer_conn.commit()
+    writer_conn.close()
+    results["read during write (s)"] = reader_result.get("latency")
+
+    conn.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    args = parser.parse_args()
+
+    default = run_profile(False, args.rows)
+    tuned = run_profile(True, args.rows)
+
+    print(f"SQLite profile benchmark ({args.rows:,} rows)")
+    print(f"{'metric':<26}{'default':>14}{'tuned':>14}")
+    for key in default:
+        d, t = default[key], tuned[key]
+        d = f"{d:.4f}" if isinstance(d, float) else d
+        t = f"{t:.4f}" if isinstance(t, float) else t
+        print(f"{key:<26}{d:>14}{t:>14}")
+
+
+if __name__ == "__main__":
+    main()
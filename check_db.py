@@ -1,21 +1,20 @@
-import sqlite3
 import os
+import sys
 
-db_path = "dashboard.db"
-if not os.path.exists(db_path):
-    print("DB missing")
-else:
-    conn = sqlite3.connect(db_path)
-    c = conn.cursor()
-    try:
-        c.execute("SELECT count(*) FROM macro_raw")
-        print(f"macro_raw: {c.fetchone()[0]}")
-        
-        c.execute("SELECT count(*) FROM domestic_market_raw")
-        print(f"domestic_market_raw: {c.fetchone()[0]}")
-        
-        c.execute("SELECT count(*) FROM market_premium_derived")
-        print(f"market_premium_derived: {c.fetchone()[0]}")
-    except Exception as e:
-        print(f"Error: {e}")
-    conn.close()
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+from src.modules.db_connector import DBConnector
+from src.modules.repository import TimeSeriesRepository, SERIES_SOURCES
+
+connector = DBConnector()
+repository = TimeSeriesRepository(connector)
+try:
+    for source in SERIES_SOURCES:
+        summary = repository.describe(source)
+        print(f"{source}: {int(summary['rows_count'].sum())}")
+        for symbol, rows, first, last in summary.itertuples(index=False, name=None):
+            print(f"  {symbol:<16} {rows:>6}  {first:%Y-%m-%d} ~ {last:%Y-%m-%d}")
+    
+    premium = connector.get_data("SELECT count(*) AS n FROM market_premium_derived")
+    print(f"market_premium_derived: {premium['n'].iloc[0] if premium is not None else 'missing'}")
+except Exception as e:
+    print(f"Error: {e}")
@@ -24,14 +24,15 @@ CREATE TABLE IF NOT EXISTS macro_derived (
     UNIQUE KEY unique_derived_entry (date, metric)
 );
 
--- 3. Analysis/Signals Layer: Stores Regime and Decisions
+-- 3. Analysis/Signals Layer: Stores Regime and Decisions (one row per trading date, written by the signals stage)
 CREATE TABLE IF NOT EXISTS market_regime (
     id INT AUTO_INCREMENT PRIMARY KEY,
     date DATE NOT NULL,
     regime_type VARCHAR(50),
-    confidence_score FLOAT,
+    confidence_score FLOAT,          -- Share of the last 5 dates with the same regime
     description TEXT,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY unique_regime_entry (date)
 );
 
 -- PHASE 2 ADDITIONS ----------------------------------------
@@ -59,3 +60,62 @@ CREATE TABLE IF NOT EXISTS market_premium_derived (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     UNIQUE KEY unique_premium_entry (date)
 );
+
+-- PIPELINE STATE ------------------------------------------
+
+-- 6. Watermarks of incremental stages (e.g. last raw created_at consumed by derive)
+CREATE TABLE IF NOT EXISTS pipeline_watermarks (
+    stage VARCHAR(100) PRIMARY KEY,
+    watermark VARCHAR(64),
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+-- 7. Precomputed forecasts (written by the forecast stage, read by the dashboard)
+CREATE TABLE IF NOT EXISTS macro_forecast (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    metric VARCHAR(50) NOT NULL,
+    horizon INT NOT NULL,
+    data_fingerprint CHAR(40) NOT NULL, -- sha1 of the training series + model config
+    engine VARCHAR(20), -- forecaster that produced the rows (prophet | fast)
+    ds DATETIME NOT NULL,
+    yhat DECIMAL(18, 2),
+    yhat_lower DECIMAL(18, 2),
+    yhat_upper DECIMAL(18, 2),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY unique_forecast_entry (metric, horizon, data_fingerprint, ds)
+);
+
+-- 8. Valuation z-scores per rolling window (written by the signals stage, read by the dashboard)
+CREATE TABLE IF NOT EXISTS valuation_zscore (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    date DATE NOT NULL,
+    metric VARCHAR(50) NOT NULL,     -- e.g. 'GOLD_KRW_DON'
+    window_label VARCHAR(10) NOT NULL, -- '90d', '1y', '3y'
+    window_size INT,                 -- Observations (trading days) in the window
+    value DECIMAL(18, 4),
+    rolling_mean DECIMAL(18, 4),
+    rolling_std DECIMAL(18, 4),
+    z_score FLOAT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY unique_valuation_entry (date, metric, window_label)
+);
+
+-- 9. Rolling cross-asset statistics (written by the correlation stage, read by the dashboard)
+-- metric 'CORR': correlation of daily returns of symbol_a and symbol_b (each pair once)
+-- metric 'VOL': annualized volatility of symbol_a (symbol_b = symbol_a)
+CREATE TABLE IF NOT EXISTS market_correlation_derived (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    date DATE NOT NULL,
+    window_size INT NOT NULL,        -- Observations (trading days) in the window
+    metric VARCHAR(10) NOT NULL,
+    symbol_a VARCHAR(50) NOT NULL,
+    symbol_b VARCHAR(50) NOT NULL,
+    value DOUBLE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY unique_correlation_entry (date, window_size, metric, symbol_a, symbol_b)
+);
+
+-- 10. Lookup indexes for range scans by symbol/metric/price type (premium as-of join, incremental derive)
+CREATE INDEX idx_raw_symbol_date ON macro_raw (symbol, date);
+CREATE INDEX idx_derived_metric_date ON macro_derived (metric, date);
+CREATE INDEX idx_domestic_type_date ON domestic_market_raw (price_type, date);
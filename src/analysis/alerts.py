@@ -1,59 +1,174 @@
 import pandas as pd
 import numpy as np
+from collections import deque
+
+# Valuation windows in observations (trading days): label -> window size
+VALUATION_WINDOWS = {"90d": 63, "1y": 252, "3y": 756}
+MIN_OBSERVATIONS = 30
+
+
+def rolling_zscores(values, windows=None):
+    """
+    Rolling mean, std and z-score of every observation for all windows in one
+    pass: each window's sums are differences of the same two cumulative sums.
+    Values are centred on the first observation so the sums of squares stay
+    well conditioned.
+
+    Returns {label: (mean, std, z)} arrays aligned with `values`, NaN until
+    the window is full.
+    """
+    values = np.asarray(values, dtype=float)
+    windows = windows or VALUATION_WINDOWS
+    n = len(values)
+    shift = values[0] if n else 0.0
+    centred = values - shift
+    s1 = np.concatenate(([0.0], np.cumsum(centred)))
+    s2 = np.concatenate(([0.0], np.cumsum(centred * centred)))
+
+    result = {}
+    for label, size in windows.items():
+        mean = np.full(n, np.nan)
+        std = np.full(n, np.nan)
+        if n >= size:
+            sum1 = s1[size:] - s1[:-size]
+            sum2 = s2[size:] - s2[:-size]
+            window_mean = sum1 / size
+            mean[size - 1:] = window_mean + shift
+            std[size - 1:] = np.sqrt(np.maximum(sum2 - sum1 * window_mean, 0.0) / (size - 1))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z = (values - mean) / std
+        result[label] = (mean, std, z)
+    return result
+
+
+class RollingZScore:
+    def __init__(self, windows=None):
+        """
+        Incremental version of rolling_zscores: keeps the last max(window)
+        values and running sums per window, so each new day costs O(windows).
+        """
+        self.windows = dict(windows or VALUATION_WINDOWS)
+        self.values = deque(maxlen=max(self.windows.values()))
+        self.shift = None
+        self.sums = {label: [0.0, 0.0] for label in self.windows}
+
+    @classmethod
+    def from_history(cls, values, windows=None):
+        """State after `values` (only the last max(window) are kept)."""
+        engine = cls(windows)
+        for value in list(values)[-engine.values.maxlen:]:
+            engine.update(value)
+        return engine
+
+    def update(self, value):
+        """Adds the next observation and returns {label: (mean, std, z)} for it."""
+        value = float(value)
+        if self.shift is None:
+            self.shift = value
+        x = value - self.shift
+        for label, size in self.windows.items():
+            sums = self.sums[label]
+            sums[0] += x
+            sums[1] += x * x
+            if len(self.values) >= size:
+                old = self.values[-size] - self.shift
+                sums[0] -= old
+                sums[1] -= old * old
+        self.values.append(value)
+        return self.current()
+
+    def current(self):
+        """{label: (mean, std, z)} of the latest observation (NaN until the window is full)."""
+        result = {}
+        for label, size in self.windows.items():
+            if len(self.values) < size:
+                result[label] = (np.nan, np.nan, np.nan)
+                continue
+            sum1, sum2 = self.sums[label]
+            window_mean = sum1 / size
+            std = np.sqrt(max(sum2 - sum1 * window_mean, 0.0) / (size - 1))
+            mean = window_mean + self.shift
+            z = (self.values[-1] - mean) / std if std > 0 else np.nan
+            result[label] = (mean, std, z)
+        return result
+
+
+def valuation_status(z_score, window=None):
+    """Alert level, message and colour for a valuation z-score."""
+    status = {
+        "z_score": z_score,
+        "window": window,
+        "level": "Neutral",
+        "message": "Fairly Valued",
+        "color": "gray"
+    }
+
+    if z_score > 2.0:
+        status["level"] = "Critical High"
+        status["message"] = "⚠️ Extreme Overvaluation (Sell Signal)"
+        status["color"] = "red"
+    elif z_score > 1.0:
+        status["level"] = "High"
+        status["message"] = "Overvalued (Caution)"
+        status["color"] = "orange"
+    elif z_score < -2.0:
+        status["level"] = "Critical Low"
+        status["message"] = "💎 Extreme Undervaluation (Strong Buy)"
+        status["color"] = "green"
+    elif z_score < -1.0:
+        status["level"] = "Low"
+        status["message"] = "Undervalued (Accumulate)"
+        status["color"] = "lightgreen"
+
+    return status
+
+
+def status_from_zscores(z_scores, windows=None):
+    """
+    Status of the longest window with a z-score ({label: z}), or None when no
+    window is full yet. The full set is attached as status['z_scores'].
+    """
+    windows = windows or VALUATION_WINDOWS
+    for label in sorted(windows, key=windows.get, reverse=True):
+        z = z_scores.get(label)
+        if z is not None and np.isfinite(z):
+            status = valuation_status(float(z), label)
+            status["z_scores"] = z_scores
+            return status
+    return None
+
 
 class ValuationAlertSystem:
-    def __init__(self, history_df):
+    def __init__(self, history_df, windows=None):
         """
-        history_df: DataFrame with 'date' and 'value' (Gold 1 Don KRW)
+        history_df: DataFrame with 'date' and 'value' (Gold 1 Don KRW).
+        It is only read; no columns are added and it is not copied.
         """
-        self.df = history_df.sort_values('date')
+        self.df = history_df
+        self.windows = dict(windows or VALUATION_WINDOWS)
 
-    def check_valuation_status(self, window=365*3): # Default 3 years
+    def zscores(self):
+        """{label: (mean, std, z)} arrays over the history in date order."""
+        values = self.df['value'].to_numpy(dtype=float)
+        if not self.df['date'].is_monotonic_increasing:
+            values = values[np.argsort(self.df['date'].to_numpy(), kind='stable')]
+        return rolling_zscores(values, self.windows)
+
+    def check_valuation_status(self):
         """
         Checks if the current price is statistically overvalued or undervalued
-        based on a rolling Z-Score (Standard Deviations from Mean).
-        
-        Using a shorter window (e.g., 180 days) if 3 years data is not available.
+        based on rolling Z-Scores (Standard Deviations from Mean) over each
+        window in VALUATION_WINDOWS.
+
+        The status uses the longest full window (status['window']); all windows
+        are in status['z_scores']. Returns None with less than MIN_OBSERVATIONS
+        or no full window.
         """
-        if len(self.df) < 30:
+        if len(self.df) < MIN_OBSERVATIONS:
             return None # Not enough data
 
-        # Adjust window to available data
-        effective_window = min(window, len(self.df))
-        
-        # Calculate Rolling Stats
-        self.df['MA'] = self.df['value'].rolling(window=effective_window).mean()
-        self.df['STD'] = self.df['value'].rolling(window=effective_window).std()
-        self.df['Z_Score'] = (self.df['value'] - self.df['MA']) / self.df['STD']
-        
-        current = self.df.iloc[-1]
-        z_score = current['Z_Score']
-        
-        status = {
-            "z_score": z_score,
-            "level": "Neutral",
-            "message": "Fairly Valued",
-            "color": "gray"
-        }
-        
-        if z_score > 2.0:
-            status["level"] = "Critical High"
-            status["message"] = "⚠️ Extreme Overvaluation (Sell Signal)"
-            status["color"] = "red"
-        elif z_score > 1.0:
-            status["level"] = "High"
-            status["message"] = "Overvalued (Caution)"
-            status["color"] = "orange"
-        elif z_score < -2.0:
-            status["level"] = "Critical Low"
-            status["message"] = "💎 Extreme Undervaluation (Strong Buy)"
-            status["color"] = "green"
-        elif z_score < -1.0:
-            status["level"] = "Low"
-            status["message"] = "Undervalued (Accumulate)"
-            status["color"] = "lightgreen"
-            
-        return status
+        latest = {label: float(z[-1]) for label, (_, _, z) in self.zscores().items()}
+        return status_from_zscores(latest, self.windows)
 
     def check_driver_analysis(self, gold_usd_change, usdkrw_change):
         """
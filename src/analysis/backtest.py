@@ -0,0 +1,216 @@
+"""
+Rolling-origin backtest of GoldPredictor.
+
+    python src/analysis/backtest.py [--engine fast] [--folds 24] [--step 14] [--horizon 30]
+
+Each fold trains on the history up to a cutoff and forecasts the next `horizon`
+days. Folds are fitted in a process pool, and their predictions are cached on disk
+keyed by a hash of the training data and model config, so reruns only fit new
+folds (e.g. the ones added by fresh data). Errors are reported per horizon day.
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import load_dotenv
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from src.analysis.predictor import GoldPredictor, resolve_engine, FORECAST_ENGINES
+
+load_dotenv()
+
+BACKTEST_CACHE_DIR = os.getenv(
+    "BACKTEST_CACHE_DIR",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "../../data/backtest_cache"))
+)
+
+
+def make_cutoffs(df, horizon=30, n_folds=24, step_days=14, min_train_days=180):
+    """
+    Fold cutoffs in date order: the newest leaves `horizon` days to score, earlier ones
+    step back `step_days` each while at least `min_train_days` of history remain.
+    """
+    first, last = df['date'].min(), df['date'].max()
+    cutoffs = []
+    cutoff = last - pd.Timedelta(days=horizon)
+    while len(cutoffs) < n_folds and cutoff - first >= pd.Timedelta(days=min_train_days):
+        cutoffs.append(cutoff)
+        cutoff -= pd.Timedelta(days=step_days)
+    return sorted(cutoffs)
+
+
+def fold_key(train, engine, params, horizon):
+    """Cache key: hash of the training series plus the model configuration."""
+    digest = hashlib.sha1(f"{engine}:{json.dumps(params, sort_keys=True)}:h{horizon}".encode("utf-8"))
+    digest.update(train['date'].dt.strftime('%Y-%m-%d %H:%M:%S').str.cat(sep="\n").encode("utf-8"))
+    digest.update(train['value'].to_numpy(dtype=float).round(6).tobytes())
+    return digest.hexdigest()
+
+
+def fit_fold(train, engine, params, horizon):
+    """
+    Fits one fold and returns its future predictions (ds, yhat, yhat_lower, yhat_upper).
+    Module-level so it can run in a worker process.
+    """
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    predictor = GoldPredictor(train, engine=engine, params=params)
+    if not predictor.train():
+        return None
+    forecast = predictor.predict(days=horizon)
+    return forecast[forecast['ds'] > train['date'].max()][['ds', 'yhat', 'yhat_lower', 'yhat_upper']].reset_index(drop=True)
+
+
+class FoldCache:
+    def __init__(self, cache_dir=None):
+        """Per-fold predictions on disk, one pickle per fold key."""
+        self.cache_dir = cache_dir or BACKTEST_CACHE_DIR
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def get(self, key):
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            return pd.read_pickle(path)
+        except Exception:
+            return None
+
+    def put(self, key, predictions):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self._path(key) + ".tmp"
+        predictions.to_pickle(tmp_path)
+        os.replace(tmp_path, self._path(key))
+
+
+def backtest_predictions(df, engine=None, params=None, horizon=30, cutoffs=None,
+                         workers=None, cache=None, executor=None):
+    """
+    Runs (or loads from cache) every fold. Returns (predictions, folds fitted), where
+    predictions holds cutoff, ds, yhat, yhat_lower, yhat_upper rows of all folds.
+
+    executor: Optional pool to submit folds to; None fits folds in a new
+              ProcessPoolExecutor(workers), workers=0 fits them serially.
+    """
+    engine = resolve_engine(engine)
+    params = dict(FORECAST_ENGINES[engine].default_params, **(params or {}))
+    cache = cache if cache is not None else FoldCache()
+    cutoffs = cutoffs if cutoffs is not None else make_cutoffs(df, horizon)
+
+    results, pending = {}, {}
+    for cutoff in cutoffs:
+        train = df[df['date'] <= cutoff]
+        key = fold_key(train, engine, params, horizon)
+        cached = cache.get(key)
+        if cached is not None:
+            results[cutoff] = cached
+        else:
+            pending[cutoff] = (key, train)
+
+    if pending:
+        if workers == 0 and executor is None:
+            fitted = {cutoff: fit_fold(train, engine, params, horizon) for cutoff, (_, train) in pending.items()}
+        else:
+            pool = executor or ProcessPoolExecutor(max_workers=workers)
+            try:
+                futures = {cutoff: pool.submit(fit_fold, train, engine, params, horizon) for cutoff, (_, train) in pending.items()}
+                fitted = {cutoff: future.result() for cutoff, future in futures.items()}
+            finally:
+                if executor is None:
+                    pool.shutdown()
+        for cutoff, predictions in fitted.items():
+            if predictions is not None:
+                cache.put(pending[cutoff][0], predictions)
+                results[cutoff] = predictions
+
+    frames = [predictions.assign(cutoff=cutoff) for cutoff, predictions in sorted(results.items())]
+    if not frames:
+        return pd.DataFrame(columns=['cutoff', 'ds', 'yhat', 'yhat_lower', 'yhat_upper']), len(pending)
+    return pd.concat(frames, ignore_index=True)[['cutoff', 'ds', 'yhat', 'yhat_lower', 'yhat_upper']], len(pending)
+
+
+def score_predictions(df, predictions):
+    """
+    Joins fold predictions with the actual values and aggregates per horizon day
+    (calendar days after the cutoff): MAE, MAPE (%), interval coverage (%), n.
+    """
+    scored = predictions.merge(df.rename(columns={'date': 'ds', 'value': 'actual'}), on='ds', how='inner')
+    if scored.empty:
+        return pd.DataFrame(columns=['horizon', 'mae', 'mape', 'coverage', 'n'])
+    scored['horizon'] = (scored['ds'] - scored['cutoff']).dt.days
+    scored['abs_error'] = (scored['actual'] - scored['yhat']).abs()
+    scored['ape'] = scored['abs_error'] / scored['actual'].abs() * 100
+    scored['covered'] = ((scored['actual'] >= scored['yhat_lower']) & (scored['actual'] <= scored['yhat_upper'])) * 100.0
+    return scored.groupby('horizon').agg(
+        mae=('abs_error', 'mean'),
+        mape=('ape', 'mean'),
+        coverage=('covered', 'mean'),
+        n=('actual', 'size')
+    ).reset_index()
+
+
+def run_backtest(df, engine=None, params=None, horizon=30, n_folds=24, step_days=14,
+                 min_train_days=180, workers=None, cache=None):
+    """
+    Rolling-origin backtest. Returns the per-horizon metrics frame (see score_predictions).
+    """
+    df = df.sort_values('date').reset_index(drop=True)
+    cutoffs = make_cutoffs(df, horizon, n_folds, step_days, min_train_days)
+    if not cutoffs:
+        print("Not enough history for a single backtest fold.")
+        return pd.DataFrame(columns=['horizon', 'mae', 'mape', 'coverage', 'n'])
+
+    started = time.monotonic()
+    predictions, fitted = backtest_predictions(df, engine, params, horizon, cutoffs, workers, cache)
+    print(f"Backtest {resolve_engine(engine)}: {len(cutoffs)} folds ({fitted} fitted, "
+          f"{len(cutoffs) - fitted} cached) in {time.monotonic() - started:.1f}s")
+    return score_predictions(df, predictions)
+
+
+def load_metric_history(metric="GOLD_KRW_DON"):
+    """Training series of one macro_derived metric; exits with a message when there is none."""
+    from src.modules.db_connector import DBConnector, sql_placeholder
+
+    conn = DBConnector().get_connection()
+    try:
+        df = pd.read_sql(f"SELECT date, value FROM macro_derived WHERE metric = {sql_placeholder(conn)} ORDER BY date ASC",
+                         conn, params=(metric,))
+    except Exception as e:
+        print(f"Error loading {metric} history: {e}")
+        df = None
+    finally:
+        conn.close()
+    if df is None or df.empty:
+        sys.exit(f"No {metric} history in macro_derived. Run the ingest and derive stages first.")
+    df['date'] = pd.to_datetime(df['date'], format='ISO8601')
+    df['value'] = df['value'].astype(float)
+    return df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of the gold price forecaster.")
+    parser.add_argument("--metric", default="GOLD_KRW_DON")
+    parser.add_argument("--engine", choices=list(FORECAST_ENGINES), default=None)
+    parser.add_argument("--horizon", type=int, default=30)
+    parser.add_argument("--folds", type=int, default=24)
+    parser.add_argument("--step", type=int, default=14, help="Days between fold cutoffs.")
+    parser.add_argument("--min-train", type=int, default=180, help="Minimum days of training history.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (0 = serial).")
+    args = parser.parse_args()
+
+    history = load_metric_history(args.metric)
+    metrics = run_backtest(history, args.engine, horizon=args.horizon, n_folds=args.folds,
+                           step_days=args.step, min_train_days=args.min_train, workers=args.workers)
+    if not metrics.empty:
+        print(metrics.to_string(index=False, float_format=lambda v: f"{v:,.2f}"))
+        weights = metrics['n'] / metrics['n'].sum()
+        print(f"Overall: MAE {np.sum(metrics['mae'] * weights):,.0f}, MAPE {np.sum(metrics['mape'] * weights):.2f}%, "
+              f"coverage {np.sum(metrics['coverage'] * weights):.1f}%")
@@ -1,55 +1,109 @@
+import os
+import sys
 import pandas as pd
 import numpy as np
 
+# Add project root to path to import the shared rolling statistics
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from src.analysis.correlation import correlation_frames
+
 class MetricCalculator:
-    def __init__(self, market_df, macro_df):
+    def __init__(self, market_df, macro_df=None, repository=None):
         """
-        market_df: DataFrame with datetime index and columns like ['Gold', 'Silver', 'DXY', 'USD/KRW']
-        macro_df: DataFrame with 'indicator_name' and 'value'. Needs processing to align with market_df.
+        market_df: DataFrame with datetime index and columns like ['Gold', 'Silver', 'DXY', 'USD/KRW'],
+                   or a panel from TimeSeriesRepository.get_aligned_panel (macro_raw symbols such as
+                   GOLD_USD_OZ and CPI_INDEX, already aligned with publication lags).
+        macro_df: Optional macro_raw rows ('date', 'symbol', 'value') for macro series that
+                  are not columns of market_df.
+        repository: Optional TimeSeriesRepository. Rolling correlations and volatilities are
+                    then read from the correlation stage's precomputed rows.
         """
         self.market_df = market_df
         self.macro_df = macro_df
+        self.repository = repository
+
+    def macro_series(self, symbol):
+        """
+        `symbol` on the market_df dates: the aligned column if present, otherwise the
+        latest macro_df observation on or before each date (no publication lag).
+        """
+        if symbol in self.market_df.columns:
+            return self.market_df[symbol]
+        if self.macro_df is None:
+            return None
+
+        rows = self.macro_df.loc[self.macro_df['symbol'] == symbol, ['date', 'value']]
+        if rows.empty:
+            return None
+        rows = pd.DataFrame({
+            'date': pd.to_datetime(rows['date'], format='ISO8601').astype('datetime64[ns]'),
+            'value': rows['value'].astype(float)
+        }).sort_values('date')
+        dates = pd.DataFrame({'date': pd.DatetimeIndex(self.market_df.index).astype('datetime64[ns]')})
+        order = dates['date'].argsort(kind='stable')
+        aligned = pd.merge_asof(dates.iloc[order], rows, on='date')
+        values = np.empty(len(dates))
+        values[order.to_numpy()] = aligned['value'].to_numpy()
+        return pd.Series(values, index=self.market_df.index, name=symbol)
 
-    def calculate_real_gold_price(self):
+    def calculate_real_gold_price(self, cpi_symbol="CPI_INDEX"):
         """
-        Calculates Real Gold Price = Nominal Gold Price / CPI * (Base CPI)
+        Calculates Real Gold Price = Nominal Gold Price / CPI * (Base CPI),
+        with the latest known CPI as the base ("current real value").
         """
-        if 'Gold' not in self.market_df.columns:
+        gold_column = next((c for c in ('Gold', 'GOLD_USD_OZ') if c in self.market_df.columns), None)
+        if gold_column is None:
             return None
 
-        # Process CPI from macro_df
-        # macro_df expects: date, indicator_name, value
-        cpi_df = self.macro_df[self.macro_df['indicator_name'] == 'CPI'].copy()
-        if cpi_df.empty:
-            return self.market_df['Gold'] # Return nominal if no CPI
-
-        cpi_df['date'] = pd.to_datetime(cpi_df['date'])
-        cpi_df = cpi_df.set_index('date').sort_index()
-        
-        # Resample CPI to daily to match market data (forward fill)
-        # We need to ensure the index covers the market data range
-        cpi_daily = cpi_df['value'].reindex(self.market_df.index, method='ffill')
-
-        # Base CPI (e.g., the last available CPI or a specific year). Let's use the most recent for "current real value"
-        base_cpi = cpi_daily.iloc[-1]
-        
-        # Real Price = Price / CPI * Base_CPI
-        real_price = self.market_df['Gold'] / cpi_daily * base_cpi
-        return real_price
+        cpi = self.macro_series(cpi_symbol)
+        if cpi is None or cpi.dropna().empty:
+            return self.market_df[gold_column] # Return nominal if no CPI
+
+        return self.market_df[gold_column] / cpi * cpi.dropna().iloc[-1]
+
+    def _on_market_dates(self, stored):
+        """Stored daily rows (date index) on the market_df dates, None when they end before it."""
+        dates = pd.DatetimeIndex(self.market_df.index)
+        if stored.index.max() < dates.max().normalize():
+            return None
+        aligned = stored.reindex(dates.normalize())
+        aligned.index = self.market_df.index
+        return aligned
 
     def calculate_rolling_correlations(self, asset1, asset2, window=30):
         """
-        Calculates rolling correlation between two assets.
+        Rolling correlation of the two assets' daily returns: the precomputed
+        history (correlation stage) when a repository has it, otherwise computed
+        here with the same definition (src/analysis/correlation.py).
         """
         if asset1 not in self.market_df.columns or asset2 not in self.market_df.columns:
             return None
-        
-        return self.market_df[asset1].rolling(window=window).corr(self.market_df[asset2])
+
+        if self.repository is not None:
+            stored = self.repository.get_rolling_correlation(asset1, asset2, window,
+                                                             start=self.market_df.index.min(), end=self.market_df.index.max())
+            if stored is not None:
+                aligned = self._on_market_dates(stored)
+                if aligned is not None:
+                    return aligned
+
+        corr, _ = correlation_frames(self.market_df[[asset1, asset2]], window)
+        return corr.set_index('date')['value'].reindex(self.market_df.index).rename(f"{asset1}/{asset2}")
 
     def calculate_volatility(self, window=30):
         """
-        Calculates annualized volatility for all assets.
+        Calculates annualized volatility for all assets: the precomputed history
+        (correlation stage) when a repository has every asset, otherwise computed here.
         """
-        returns = self.market_df.pct_change()
-        volatility = returns.rolling(window=window).std() * np.sqrt(252) # Annualized
-        return volatility
+        if self.repository is not None:
+            stored = self.repository.get_volatility_history(window, start=self.market_df.index.min(),
+                                                            end=self.market_df.index.max())
+            if stored is not None and set(self.market_df.columns) <= set(stored.columns):
+                aligned = self._on_market_dates(stored[list(self.market_df.columns)])
+                if aligned is not None:
+                    return aligned
+
+        _, vol = correlation_frames(self.market_df, window)
+        volatility = vol.pivot_table(index='date', columns='symbol', values='value', aggfunc='last')
+        volatility.columns.name = None
+        return volatility.reindex(index=self.market_df.index, columns=self.market_df.columns)
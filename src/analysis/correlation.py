@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+# Rolling windows in observations (trading days)
+CORRELATION_WINDOWS = [30, 90]
+TRADING_DAYS_PER_YEAR = 252
+
+
+def _window_sums(a, window):
+    """Trailing `window`-row sums along axis 0 from one cumulative sum (valid from row window-1)."""
+    sums = np.cumsum(a, axis=0)
+    sums[window:] = sums[window:] - sums[:-window]
+    return sums
+
+
+def rolling_correlation_tensor(returns, window=30):
+    """
+    Rolling correlation of every asset pair and rolling volatility of every asset
+    in one pass over shared cumulative sums.
+
+    returns: 2D array-like (dates x assets), NaN where an asset has no return.
+    Returns (corr, vol): corr is dates x assets x assets, vol is dates x assets
+    (annualized std of returns). Both are NaN until `window` complete
+    observations are available, the same as pandas rolling(window).corr/std.
+    """
+    x = np.asarray(returns, dtype=float)
+    n, k = x.shape
+    corr = np.full((n, k, k), np.nan)
+    vol = np.full((n, k), np.nan)
+    if n < window:
+        return corr, vol
+
+    valid = np.isfinite(x)
+    x = np.where(valid, x, 0.0)
+    counts = _window_sums(valid.astype(float), window)
+    pair_counts = _window_sums(valid[:, :, None] & valid[:, None, :], window)
+    s1 = _window_sums(x, window)
+    s2 = _window_sums(x * x, window)
+    cross = _window_sums(x[:, :, None] * x[:, None, :], window)
+
+    # Sums of squared deviations and co-deviations over each window
+    var = np.maximum(s2 - s1 * s1 / window, 0.0)
+    cov = cross - s1[:, :, None] * s1[:, None, :] / window
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        full_corr = cov / np.sqrt(var[:, :, None] * var[:, None, :])
+        full_vol = np.sqrt(var / (window - 1) * TRADING_DAYS_PER_YEAR)
+    full_corr = np.clip(full_corr, -1.0, 1.0)
+    full_corr[pair_counts < window] = np.nan
+    full_vol[counts < window] = np.nan
+
+    corr[window - 1:] = full_corr[window - 1:]
+    vol[window - 1:] = full_vol[window - 1:]
+    return corr, vol
+
+
+def correlation_frames(prices, window=30):
+    """
+    Rolling correlations and volatilities of a wide price panel (date index,
+    one column per asset) in long form:
+      corr: date, symbol_a, symbol_b, value  (each pair once, in column order)
+      vol:  date, symbol, value
+    Rows are only returned where the window is complete.
+    """
+    assets = list(prices.columns)
+    returns = prices.pct_change(fill_method=None).to_numpy(dtype=float)
+    corr, vol = rolling_correlation_tensor(returns, window)
+
+    dates = prices.index.to_numpy()
+    a, b = np.triu_indices(len(assets), k=1)
+    pair_values = corr[:, a, b]
+    corr_df = pd.DataFrame({
+        'date': np.repeat(dates, len(a)),
+        'symbol_a': np.tile(np.asarray(assets, dtype=object)[a], len(dates)),
+        'symbol_b': np.tile(np.asarray(assets, dtype=object)[b], len(dates)),
+        'value': pair_values.ravel()
+    }).dropna(subset=['value'])
+    vol_df = pd.DataFrame({
+        'date': np.repeat(dates, len(assets)),
+        'symbol': np.tile(np.asarray(assets, dtype=object), len(dates)),
+        'value': vol.ravel()
+    }).dropna(subset=['value'])
+    return corr_df.reset_index(drop=True), vol_df.reset_index(drop=True)
+
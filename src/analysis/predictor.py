@@ -1,54 +1,269 @@
-from prophet import Prophet
+import os
+import json
+import importlib.util
+import numpy as np
 import pandas as pd
+from statistics import NormalDist
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Default forecasting engine: "prophet" or "fast" (falls back to "fast" without Prophet)
+FORECAST_ENGINE = os.getenv("FORECAST_ENGINE", "prophet")
+# Best parameters per metric/engine found by src/analysis/tuning.py
+FORECAST_PARAMS_PATH = os.getenv(
+    "FORECAST_PARAMS_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "forecast_params.json")
+)
+
+
+class ProphetForecaster:
+    """
+    Facebook Prophet engine (the original GoldPredictor model).
+
+    Every engine implements the same interface:
+        fit(df)              df with 'ds' (datetime) and 'y' (float)
+        predict(days)        DataFrame ds/yhat/yhat_lower/yhat_upper covering the
+                             history followed by `days` future calendar days
+        save(path)/load(path)
+    """
+    name = "prophet"
+    default_params = {
+        "daily_seasonality": True,
+        "yearly_seasonality": True,
+        "weekly_seasonality": False,
+        "changepoint_prior_scale": 0.05
+    }
+
+    def __init__(self, **params):
+        self.params = dict(self.default_params, **params)
+        self.model = None
+
+    def fit(self, df):
+        # Imported here: Prophet is slow to import and only needed when fitting
+        from prophet import Prophet
+
+        self.model = Prophet(**self.params)
+        self.model.fit(df)
+
+    def predict(self, days):
+        future = self.model.make_future_dataframe(periods=days)
+        return self.model.predict(future)
+
+    def save(self, path):
+        """Serializes the fitted model to JSON (prophet.serialize)."""
+        from prophet.serialize import model_to_json
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(model_to_json(self.model))
+
+    def load(self, path):
+        from prophet.serialize import model_from_json
+
+        with open(path, "r", encoding="utf-8") as f:
+            self.model = model_from_json(f.read())
+
+
+class FastForecaster:
+    """
+    Damped-trend exponential smoothing (Holt) in NumPy.
+
+    The smoothing parameters are picked by one-step-ahead squared error over a
+    grid that is evaluated for all candidates at once, so a fit over a few years
+    of daily data takes milliseconds. Intervals come from the one-step residual
+    spread, widened with the horizon like the ETS(A,Ad,N) forecast variance.
+    """
+    name = "fast"
+    default_params = {
+        "alphas": [0.05, 0.1, 0.2, 0.3, 0.5, 0.7, 0.9],
+        "betas": [0.01, 0.05, 0.1, 0.2],
+        "phi": 0.98,            # Trend damping (1.0 = linear trend)
+        "interval_width": 0.8   # Same default as Prophet
+    }
+
+    def __init__(self, **params):
+        self.params = dict(self.default_params, **params)
+        self.state = None
+
+    def fit(self, df):
+        y = df['y'].to_numpy(dtype=float)
+        ds = pd.to_datetime(df['ds'])
+        alphas, betas = np.meshgrid(self.params["alphas"], self.params["betas"])
+        alphas, betas = alphas.ravel(), betas.ravel()
+        phi = float(self.params["phi"])
+
+        # Run every (alpha, beta) candidate in parallel over the series
+        level = np.full(alphas.shape, y[0])
+        trend = np.full(alphas.shape, y[1] - y[0] if len(y) > 1 else 0.0)
+        fitted = np.empty((len(y), len(alphas)))
+        fitted[0] = y[0]
+        for t in range(1, len(y)):
+            fitted[t] = level + phi * trend
+            new_level = alphas * y[t] + (1 - alphas) * fitted[t]
+            trend = betas * (new_level - level) + (1 - betas) * phi * trend
+            level = new_level
+
+        errors = y[1:, None] - fitted[1:]
+        best = int(np.argmin((errors ** 2).sum(axis=0)))
+        residuals = errors[:, best]
+        gap_days = float(np.median(np.diff(ds.values).astype("timedelta64[s]").astype(float))) / 86400 if len(ds) > 1 else 1.0
+        self.state = {
+            "alpha": float(alphas[best]),
+            "beta": float(betas[best]),
+            "phi": phi,
+            "level": float(level[best]),
+            "trend": float(trend[best]),
+            "sigma": float(np.sqrt(np.mean(residuals ** 2))) if len(residuals) else 0.0,
+            "gap_days": gap_days or 1.0,
+            "history_ds": ds.dt.strftime('%Y-%m-%d %H:%M:%S').tolist(),
+            "history_fit": fitted[:, best].tolist()
+        }
+
+    def predict(self, days):
+        s = self.state
+        z = NormalDist().inv_cdf(0.5 + self.params["interval_width"] / 2)
+        history_ds = pd.to_datetime(pd.Series(s["history_ds"]))
+        future_ds = pd.date_range(history_ds.iloc[-1] + pd.Timedelta(days=1), periods=days, freq="D")
+
+        # Observation steps ahead of the last point (weekends have no observations)
+        steps = (future_ds - history_ds.iloc[-1]).days.to_numpy() / s["gap_days"]
+        phi = s["phi"]
+        damped = steps if phi == 1.0 else phi * (1 - phi ** steps) / (1 - phi)
+        future_yhat = s["level"] + damped * s["trend"]
+
+        # h-step variance: sigma^2 * (1 + sum_{j<h} c_j^2), c_j = alpha * (1 + beta * sum_{i<=j} phi^i)
+        max_h = int(np.ceil(steps.max())) if days else 1
+        j = np.arange(1, max_h + 1)
+        phi_sums = np.cumsum(phi ** j)
+        c = s["alpha"] * (1 + s["beta"] * phi_sums)
+        cum_var = np.concatenate([[1.0], 1 + np.cumsum(c ** 2)])
+        h = np.clip(np.rint(steps).astype(int), 1, max_h)
+        future_spread = z * s["sigma"] * np.sqrt(cum_var[h - 1])
+
+        history_yhat = np.asarray(s["history_fit"])
+        return pd.DataFrame({
+            "ds": pd.concat([history_ds, pd.Series(future_ds)], ignore_index=True),
+            "yhat": np.concatenate([history_yhat, future_yhat]),
+            "yhat_lower": np.concatenate([history_yhat - z * s["sigma"], future_yhat - future_spread]),
+            "yhat_upper": np.concatenate([history_yhat + z * s["sigma"], future_yhat + future_spread])
+        })
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"params": self.params, "state": self.state}, f)
+
+    def load(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        self.params, self.state = saved["params"], saved["state"]
+
+
+FORECAST_ENGINES = {
+    ProphetForecaster.name: ProphetForecaster,
+    FastForecaster.name: FastForecaster
+}
+
+
+def prophet_available():
+    """Checks for Prophet without importing it (the import alone takes seconds)."""
+    return importlib.util.find_spec("prophet") is not None
+
+
+def resolve_engine(engine=None):
+    """Engine name to use: the requested one, FORECAST_ENGINE, or 'fast' without Prophet."""
+    engine = engine or FORECAST_ENGINE
+    if engine not in FORECAST_ENGINES:
+        raise ValueError(f"Unknown forecast engine '{engine}'. Available: {', '.join(FORECAST_ENGINES)}")
+    if engine == ProphetForecaster.name and not prophet_available():
+        print("Prophet is not installed. Falling back to the fast forecaster.")
+        return FastForecaster.name
+    return engine
+
+
+def load_tuned_params(metric, engine, path=None):
+    """Tuned parameters stored for metric/engine, or None if it was never tuned."""
+    try:
+        with open(path or FORECAST_PARAMS_PATH, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        return None
+    entry = stored.get(metric, {}).get(engine)
+    return entry["params"] if entry else None
+
 
 class GoldPredictor:
-    def __init__(self, history_df):
+    def __init__(self, history_df, engine=None, params=None, metric=None):
         """
         history_df: DataFrame containing 'date' and 'value' (Gold 1 Don KRW)
+        engine: Forecasting engine name ('prophet', 'fast'), default FORECAST_ENGINE.
+        params: Engine parameters overriding its defaults.
+        metric: With no explicit params, the tuned parameters stored for this
+                metric (FORECAST_PARAMS_PATH) are used when available.
         """
         self.df = history_df.rename(columns={'date': 'ds', 'value': 'y'})
-        self.model = None
+        self.engine = resolve_engine(engine)
+        if params is None and metric:
+            params = load_tuned_params(metric, self.engine)
+        self.model = FORECAST_ENGINES[self.engine](**(params or {}))
         self.forecast = None
+        self.horizon = 30
+        self.trained = False
+
+    @property
+    def config(self):
+        """Engine name and parameters (part of the stored forecast's fingerprint)."""
+        return f"{self.engine}:{json.dumps(self.model.params, sort_keys=True)}"
 
     def train(self):
         """
-        Trains the Prophet model.
+        Trains the forecasting engine.
         """
         if len(self.df) < 30:
             return False # Not enough data
-            
-        self.model = Prophet(
-            daily_seasonality=True,
-            yearly_seasonality=True,
-            weekly_seasonality=False,
-            changepoint_prior_scale=0.05
-        )
+
         self.model.fit(self.df)
+        self.trained = True
         return True
 
     def predict(self, days=30):
         """
         Generates forecast for the next 'days'.
         """
-        if self.model is None:
+        if not self.trained:
             return None
-            
-        future = self.model.make_future_dataframe(periods=days)
-        self.forecast = self.model.predict(future)
+
+        self.forecast = self.model.predict(days)
+        self.horizon = days
         return self.forecast
 
+    def save_model(self, path):
+        """Serializes the fitted model (engine-specific JSON)."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.model.save(path)
+
+    def load_model(self, path):
+        """Restores a model written by save_model(); predict() works without train()."""
+        self.model.load(path)
+        self.trained = True
+
     def get_forecast_metrics(self):
         """
-        Returns the expected price in 30 days and the trend.
+        Returns the expected price at the end of the horizon and the trend.
         """
         if self.forecast is None:
             return None
-            
-        current = self.forecast.iloc[-31]['yhat'] # roughly today (before 30 days future)
-        future = self.forecast.iloc[-1]['yhat']
-        
+        return GoldPredictor.metrics_from_forecast(self.forecast, self.horizon)
+
+    @staticmethod
+    def metrics_from_forecast(forecast, days=30):
+        """
+        Same metrics for a stored forecast frame (history fit followed by `days` future rows).
+        """
+        current = forecast.iloc[-(days + 1)]['yhat'] # roughly today (before the future rows)
+        future = forecast.iloc[-1]['yhat']
+
         change_pct = ((future - current) / current) * 100
-        
+
         return {
             "current_estimated": current,
             "future_estimated": future,
@@ -1,5 +1,37 @@
+import numpy as np
 import pandas as pd
 
+# Moving-average window the trend rules compare against
+MA_WINDOW = 50
+REQUIRED_COLUMNS = ['Gold', 'DXY', 'S&P 500']
+
+# Rule labels in evaluation order (first match wins), then the fallback.
+# (regime_type stored in market_regime, short label of detect_signals)
+REGIME_LABELS = [
+    ("Risk-On (Growth)", "Risk-On"),
+    ("Risk-Off (Fear)", "Risk-Off"),
+    ("Inflation Hedge", "Inflation Hedge"),
+    ("Deflation/Cash is King", "Deflation")
+]
+DEFAULT_LABELS = ("Mixed/Transition", "Neutral")
+
+
+def regime_conditions(gold_up, dxy_up, spx_up):
+    """
+    The rule engine as boolean masks (scalars or arrays), in REGIME_LABELS order.
+    1. Risk-On: Stocks UP, DXY DOWN
+    2. Risk-Off / Fear: Stocks DOWN, Gold UP (Safe Haven)
+    3. Inflation Hedge: Gold UP, DXY DOWN
+    4. Strong Dollar Pressure: DXY UP, Gold DOWN, Stocks DOWN
+    """
+    return [
+        spx_up & ~dxy_up,
+        ~spx_up & gold_up,
+        gold_up & ~dxy_up,
+        dxy_up & ~gold_up & ~spx_up
+    ]
+
+
 class MarketRegimeClassifier:
     def __init__(self, data_df):
         """
@@ -7,93 +39,79 @@ class MarketRegimeClassifier:
         """
         self.df = data_df
 
+    @classmethod
+    def from_repository(cls, repository, start=None, fallback=None):
+        """
+        Classifier over the stored Gold / DXY / S&P 500 closes of a
+        TimeSeriesRepository; `fallback` is used only when they are stale.
+        """
+        return cls(repository.get_panel(REQUIRED_COLUMNS, start=start, fallback=fallback))
+
     def classify_current_regime(self):
         """
         Determines the current market regime based on basic rules.
         Returns: strict string label (Risk-On, Risk-Off, Inflation-Hedge, Unclear)
         """
-        # Get latest slice (last 5 days average to smooth noise)
-        recent = self.df.tail(5).mean()
-        
-        # Debugging: Check columns
-        # st.write(f"Debug Columns: {self.df.columns.tolist()}")
-
         # Needed Columns check
-        required = ['Gold', 'DXY', 'S&P 500']
-        for col in required:
+        for col in REQUIRED_COLUMNS:
             if col not in self.df.columns:
                 return "Insufficient Data"
 
-        # Calculate Trends (Prices vs 50-day Moving Average of the last available day)
-        ma_50 = self.df.rolling(window=50).mean().iloc[-1]
-        current = self.df.iloc[-1]
-
-        def get_scalar(series_or_scalar):
-            if isinstance(series_or_scalar, pd.Series):
-                return series_or_scalar.iloc[0]
-            return series_or_scalar
-
-        # Ensure scalars for comparison
-        curr_gold = get_scalar(current['Gold'])
-        ma50_gold = get_scalar(ma_50['Gold'])
-        curr_dxy = get_scalar(current['DXY'])
-        ma50_dxy = get_scalar(ma_50['DXY'])
-        curr_spx = get_scalar(current['S&P 500'])
-        ma50_spx = get_scalar(ma_50['S&P 500'])
-
-        gold_trend = "UP" if curr_gold > ma50_gold else "DOWN"
-        dxy_trend = "UP" if curr_dxy > ma50_dxy else "DOWN"
-        spx_trend = "UP" if curr_spx > ma50_spx else "DOWN"
-        
-        # Rule Engine Logic
-        # 1. Risk-On: Stocks UP, DXY DOWN (usually), Gold (Variable, but usually stable/variable)
-        if spx_trend == "UP" and dxy_trend == "DOWN":
-            return "Risk-On (Growth)"
-            
-        # 2. Risk-Off / Fear: Stocks DOWN, DXY UP, Gold UP (Safe Haven)
-        elif spx_trend == "DOWN" and current['Gold'] > ma_50['Gold']:
-            return "Risk-Off (Fear)"
-            
-        # 3. Inflation Hedge: Gold UP strongly, DXY DOWN or Weak
-        elif gold_trend == "UP" and dxy_trend == "DOWN":
-            return "Inflation Hedge"
-            
-        # 4. Strong Dollar Pressure: DXY UP, Gold DOWN, Stocks DOWN
-        elif dxy_trend == "UP" and gold_trend == "DOWN" and spx_trend == "DOWN":
-            return "Deflation/Cash is King"
-
-        return "Mixed/Transition"
+        # Trends: last price vs the 50-day moving average. Only the last window is
+        # needed, so average it directly instead of rolling over the whole history.
+        prices = self.df[REQUIRED_COLUMNS]
+        if len(prices) >= MA_WINDOW:
+            ma_50 = prices.tail(MA_WINDOW).mean(skipna=False)
+        else:
+            ma_50 = pd.Series(np.nan, index=REQUIRED_COLUMNS)
+        current = prices.iloc[-1]
+
+        up = (current > ma_50).to_numpy()
+        conditions = regime_conditions(np.bool_(up[0]), np.bool_(up[1]), np.bool_(up[2]))
+        labels = [long_label for long_label, _ in REGIME_LABELS]
+        return str(np.select(conditions, labels, default=DEFAULT_LABELS[0]))
+
+    def label_history(self):
+        """
+        Regime of every date with a full moving-average window, evaluated as
+        vectorized masks over the whole history.
+
+        Returns a DataFrame indexed by date with columns regime_type (long label),
+        regime (short label), gold_up, dxy_up, spx_up and confidence_score
+        (share of the last 5 dates with the same regime).
+        """
+        for col in REQUIRED_COLUMNS:
+            if col not in self.df.columns:
+                return pd.DataFrame(columns=['regime_type', 'regime', 'gold_up', 'dxy_up', 'spx_up', 'confidence_score'])
+
+        prices = self.df[REQUIRED_COLUMNS]
+        ma_50 = prices.rolling(window=MA_WINDOW).mean()
+        valid = ma_50['Gold'].notna().to_numpy()
+        up = (prices > ma_50).to_numpy()
+        gold_up, dxy_up, spx_up = up[:, 0], up[:, 1], up[:, 2]
+
+        conditions = regime_conditions(gold_up, dxy_up, spx_up)
+        codes = np.select(conditions, np.arange(len(REGIME_LABELS)), default=len(REGIME_LABELS))
+        long_labels = np.array([l for l, _ in REGIME_LABELS] + [DEFAULT_LABELS[0]], dtype=object)
+        short_labels = np.array([s for _, s in REGIME_LABELS] + [DEFAULT_LABELS[1]], dtype=object)
+
+        result = pd.DataFrame({
+            'regime_type': long_labels[codes],
+            'regime': short_labels[codes],
+            'gold_up': gold_up,
+            'dxy_up': dxy_up,
+            'spx_up': spx_up,
+            'code': codes
+        }, index=prices.index)[valid]
+
+        # Stability: how many of the last 5 labelled dates agree with today
+        same = [(result['code'] == result['code'].shift(k)) for k in range(5)]
+        result['confidence_score'] = pd.concat(same, axis=1).sum(axis=1) / 5.0
+        return result.drop(columns='code')
 
     def detect_signals(self):
         """
         Scans history to generate a log of regime changes.
         """
-        # Simplistic implementation: Apply logic to the whole dataframe row by row
-        # (Optimization: vectorize this in future)
-        signals = []
-        ma_50 = self.df.rolling(window=50).mean()
-        
-        for date, row in self.df.iterrows():
-            if date not in ma_50.index or pd.isna(ma_50.loc[date, 'Gold']):
-                continue
-                
-            cur_ma = ma_50.loc[date]
-            
-            # Logic duplication (ideally refactor to single function taking row & ma)
-            gold_up = row['Gold'] > cur_ma['Gold']
-            spx_up = row['S&P 500'] > cur_ma['S&P 500']
-            dxy_up = row['DXY'] > cur_ma['DXY']
-            
-            regime = "Neutral"
-            if spx_up and not dxy_up:
-                regime = "Risk-On"
-            elif not spx_up and gold_up:
-                regime = "Risk-Off"
-            elif gold_up and not dxy_up:
-                regime = "Inflation Hedge"
-            elif dxy_up and not gold_up and not spx_up:
-                regime = "Deflation"
-                
-            signals.append({'date': date, 'regime': regime})
-            
-        return pd.DataFrame(signals).set_index('date')
+        history = self.label_history()
+        return history[['regime']].rename_axis('date')
@@ -0,0 +1,224 @@
+"""
+Hyperparameter search for the forecasting engines.
+
+    python src/analysis/tuning.py --engine prophet [--samples 20] [--budget 600]
+
+Candidates from SEARCH_SPACES (full grid, or --samples random picks) are scored by
+rolling-origin cross-validation (src/analysis/backtest.py) in a process pool until
+the time budget runs out; candidates still running then are terminated. The best configuration per metric/engine is written to
+FORECAST_PARAMS_PATH, which GoldPredictor loads automatically. Candidate scores are
+memoized by data hash, so rerunning on unchanged data only evaluates new candidates.
+"""
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import itertools
+from datetime import datetime, timezone
+import multiprocessing
+from dotenv import load_dotenv
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from src.analysis.predictor import FORECAST_ENGINES, FORECAST_PARAMS_PATH, resolve_engine
+from src.analysis.backtest import make_cutoffs, backtest_predictions, score_predictions, FoldCache, load_metric_history
+
+load_dotenv()
+
+TUNING_CACHE_DIR = os.getenv(
+    "TUNING_CACHE_DIR",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "../../data/tuning_cache"))
+)
+TUNING_BUDGET_SECONDS = float(os.getenv("TUNING_BUDGET_SECONDS", "600"))
+
+# Parameters searched per engine (anything not listed keeps the engine default)
+SEARCH_SPACES = {
+    "prophet": {
+        "changepoint_prior_scale": [0.001, 0.01, 0.05, 0.1, 0.5],
+        "seasonality_mode": ["additive", "multiplicative"],
+        "yearly_seasonality": [True, False],
+        "daily_seasonality": [False, True]
+    },
+    "fast": {
+        "phi": [0.9, 0.95, 0.98, 1.0],
+        "interval_width": [0.8]
+    }
+}
+
+
+def candidates(space, samples=None, seed=0):
+    """Full grid of `space`, or `samples` random configurations from it."""
+    keys = sorted(space)
+    grid = [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+    if samples and samples < len(grid):
+        grid = random.Random(seed).sample(grid, samples)
+    return grid
+
+
+def series_hash(df):
+    digest = hashlib.sha1(df['date'].dt.strftime('%Y-%m-%d %H:%M:%S').str.cat(sep="\n").encode("utf-8"))
+    digest.update(df['value'].to_numpy(dtype=float).round(6).tobytes())
+    return digest.hexdigest()
+
+
+def memo_key(data_hash, engine, params, horizon, cutoffs):
+    spec = {
+        "data": data_hash, "engine": engine, "params": params, "horizon": horizon,
+        "cutoffs": [c.strftime('%Y-%m-%d %H:%M:%S') for c in cutoffs]
+    }
+    return hashlib.sha1(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def evaluate_candidate(df, engine, params, horizon, cutoffs, fold_cache_dir=None):
+    """
+    Cross-validation score of one configuration (runs in a worker process).
+    Returns {'mape', 'mae', 'coverage', 'n'} averaged over every scored fold day.
+    """
+    predictions, _ = backtest_predictions(df, engine, params, horizon, cutoffs, workers=0,
+                                          cache=FoldCache(fold_cache_dir))
+    metrics = score_predictions(df, predictions)
+    n = int(metrics['n'].sum())
+    if n == 0:
+        return None
+    weights = metrics['n'] / n
+    return {
+        "mape": float((metrics['mape'] * weights).sum()),
+        "mae": float((metrics['mae'] * weights).sum()),
+        "coverage": float((metrics['coverage'] * weights).sum()),
+        "n": n
+    }
+
+
+def _evaluate_pending(task):
+    """Pool entry point: (index, score, error) for one pending candidate."""
+    index, df, engine, params, horizon, cutoffs = task
+    try:
+        return index, evaluate_candidate(df, engine, params, horizon, cutoffs), None
+    except Exception as e:
+        return index, None, e
+
+
+class ScoreMemo:
+    def __init__(self, cache_dir=None):
+        """Candidate scores on disk, one JSON file per memo key."""
+        self.cache_dir = cache_dir or TUNING_CACHE_DIR
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key, score):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(self._path(key), "w", encoding="utf-8") as f:
+            json.dump(score, f)
+
+
+def save_best_params(metric, engine, params, score, data_hash, path=None):
+    """Stores the winning configuration where GoldPredictor(metric=...) finds it."""
+    path = path or FORECAST_PARAMS_PATH
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        stored = {}
+    stored.setdefault(metric, {})[engine] = {
+        "params": params,
+        "score": score,
+        "data_hash": data_hash,
+        "tuned_at": datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(stored, f, indent=2, sort_keys=True)
+
+
+def tune(df, metric="GOLD_KRW_DON", engine=None, samples=None, budget_seconds=None, horizon=30,
+         n_folds=6, step_days=30, workers=None, memo=None, seed=0):
+    """
+    Searches SEARCH_SPACES[engine] and persists the best configuration for `metric`.
+    Returns (best params, best score) or (None, None) if nothing was evaluated.
+    """
+    engine = resolve_engine(engine)
+    budget_seconds = TUNING_BUDGET_SECONDS if budget_seconds is None else budget_seconds
+    memo = memo or ScoreMemo()
+    df = df.sort_values('date').reset_index(drop=True)
+    cutoffs = make_cutoffs(df, horizon, n_folds, step_days)
+    if not cutoffs:
+        print("Not enough history for cross-validation.")
+        return None, None
+
+    data_hash = series_hash(df)
+    configs = candidates(SEARCH_SPACES[engine], samples, seed)
+    scores, pending = [], []
+    for params in configs:
+        key = memo_key(data_hash, engine, params, horizon, cutoffs)
+        cached = memo.get(key)
+        if cached is not None:
+            scores.append((params, cached))
+        else:
+            pending.append((key, params))
+    print(f"Tuning {engine} on {metric}: {len(configs)} candidates ({len(scores)} memoized), "
+          f"{len(cutoffs)} folds, budget {budget_seconds:.0f}s")
+
+    started = time.monotonic()
+    deadline = started + budget_seconds
+    pool = multiprocessing.Pool(processes=workers)
+    evaluated = 0
+    try:
+        results = pool.imap_unordered(_evaluate_pending, [(i, df, engine, params, horizon, cutoffs)
+                                                          for i, (_, params) in enumerate(pending)])
+        for _ in pending:
+            index, score, error = results.next(timeout=max(0.0, deadline - time.monotonic()))
+            evaluated += 1
+            key, params = pending[index]
+            if error is not None:
+                print(f"  {params}: failed ({error})")
+                continue
+            if score is None:
+                continue
+            memo.put(key, score)
+            scores.append((params, score))
+            print(f"  {params}: MAPE {score['mape']:.3f}%, coverage {score['coverage']:.1f}%")
+    except multiprocessing.TimeoutError:
+        print(f"Time budget of {budget_seconds:.0f}s reached. {len(pending) - evaluated} candidate(s) not evaluated.")
+    finally:
+        # Stops running candidates too, so the process does not outlive the budget
+        pool.terminate()
+        pool.join()
+
+    if not scores:
+        print("No candidate could be evaluated.")
+        return None, None
+
+    best_params, best_score = min(scores, key=lambda item: item[1]["mape"])
+    save_best_params(metric, engine, best_params, best_score, data_hash)
+    print(f"Best {engine} config for {metric} after {time.monotonic() - started:.0f}s: {best_params} "
+          f"(MAPE {best_score['mape']:.3f}%) -> {FORECAST_PARAMS_PATH}")
+    return best_params, best_score
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tune forecaster hyperparameters by cross-validation.")
+    parser.add_argument("--metric", default="GOLD_KRW_DON")
+    parser.add_argument("--engine", choices=list(FORECAST_ENGINES), default=None)
+    parser.add_argument("--samples", type=int, default=None, help="Random candidates instead of the full grid.")
+    parser.add_argument("--budget", type=float, default=None, help="Time budget in seconds (default TUNING_BUDGET_SECONDS).")
+    parser.add_argument("--horizon", type=int, default=30)
+    parser.add_argument("--folds", type=int, default=6)
+    parser.add_argument("--step", type=int, default=30, help="Days between fold cutoffs.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    history = load_metric_history(args.metric)
+    tune(history, args.metric, args.engine, args.samples, args.budget, args.horizon,
+         args.folds, args.step, args.workers, seed=args.seed)
@@ -0,0 +1,143 @@
+import os
+import sqlite3
+import mysql.connector
+
+# Rows per INSERT statement / executemany call. Tunable for slow links to the cloud DB.
+env_batch_size = os.getenv("DB_BATCH_SIZE")
+DEFAULT_BATCH_SIZE = int(env_batch_size) if env_batch_size and env_batch_size.strip() else 1000
+
+
+class BatchWriter:
+    def __init__(self, conn, batch_size=None):
+        """
+        Dialect-aware bulk upsert writer shared by the ingest and derive stages.
+
+        conn: Raw connection returned by DBConnector.get_connection() (MySQL or SQLite).
+        batch_size: Rows per round trip. Defaults to DB_BATCH_SIZE (1000).
+        """
+        self.conn = conn
+        self.batch_size = max(1, int(batch_size or DEFAULT_BATCH_SIZE))
+        # Detect the dialect once instead of per row
+        self.is_sqlite = isinstance(conn, sqlite3.Connection)
+        self.errors = []
+        self._conflict_keys = {}
+
+    def _conflict_columns(self, table, columns):
+        """
+        Columns of the first UNIQUE constraint of a SQLite table that the written
+        columns cover (the ON CONFLICT target), or None if there is none.
+        """
+        if table not in self._conflict_keys:
+            keys = []
+            for _, index_name, unique, origin, *_ in self.conn.execute(f"PRAGMA index_list('{table}')"):
+                if unique and origin != "pk":
+                    keys.append([row[2] for row in self.conn.execute(f"PRAGMA index_info('{index_name}')")])
+            self._conflict_keys[table] = keys
+        for key in self._conflict_keys[table]:
+            if set(key) <= set(columns):
+                return key
+        return None
+
+    def _build_sql(self, table, columns, update_columns, row_count, touch_column=None):
+        col_list = ", ".join(columns)
+
+        if self.is_sqlite:
+            placeholders = ", ".join(["?"] * len(columns))
+            sql = f"INSERT INTO {table} ({col_list}) VALUES ({placeholders})"
+            conflict = self._conflict_columns(table, columns)
+            if conflict is None:
+                # No unique key to resolve against: replace the whole row
+                return f"INSERT OR REPLACE INTO {table} ({col_list}) VALUES ({placeholders})"
+            sql += f" ON CONFLICT({', '.join(conflict)})"
+            if not update_columns:
+                return sql + " DO NOTHING"
+            # Same semantics as the MySQL path: untouched rows keep id and created_at,
+            # changed rows get the new values and a fresh timestamp
+            updates = [f"{col} = excluded.{col}" for col in update_columns]
+            if touch_column:
+                updates.append(f"{touch_column} = CURRENT_TIMESTAMP")
+            changed = " OR ".join(f"{col} IS NOT excluded.{col}" for col in update_columns)
+            return sql + f" DO UPDATE SET {', '.join(updates)} WHERE {changed}"
+
+        # MySQL: one multi-row VALUES statement per batch
+        row_placeholder = "(" + ", ".join(["%s"] * len(columns)) + ")"
+        values = ", ".join([row_placeholder] * row_count)
+        sql = f"INSERT INTO {table} ({col_list}) VALUES {values}"
+        if update_columns:
+            updates = [f"{col} = VALUES({col})" for col in update_columns]
+            if touch_column:
+                # Bump the timestamp only when a value actually changes. Must come
+                # first: MySQL evaluates the assignments left to right.
+                unchanged = " AND ".join(f"{col} <=> VALUES({col})" for col in update_columns)
+                updates.insert(0, f"{touch_column} = IF({unchanged}, {touch_column}, CURRENT_TIMESTAMP)")
+            sql += f" ON DUPLICATE KEY UPDATE {', '.join(updates)}"
+        return sql
+
+    def upsert(self, table, columns, rows, update_columns=None, touch_column="created_at"):
+        """
+        Inserts (or updates on key conflict) the given rows in batches.
+
+        Args:
+            table (str): Target table name.
+            columns (list): Column names, in the same order as each row tuple.
+            rows (iterable): Tuples of plain Python values.
+            update_columns (list): Columns refreshed on duplicate key. Rows whose
+                values are unchanged are left alone (id and created_at kept).
+            touch_column (str): Timestamp column refreshed when an update changes
+                a value, so the derive stage can find revised rows.
+
+        Returns:
+            int: Number of rows written successfully.
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+
+        written = 0
+        cursor = self.conn.cursor()
+        try:
+            for batch_no, start in enumerate(range(0, len(rows), self.batch_size), start=1):
+                batch = rows[start:start + self.batch_size]
+                try:
+                    if self.is_sqlite:
+                        # All batches share one transaction, committed at the end. Each one
+                        # runs in a savepoint, so a failing batch leaves none of its rows behind.
+                        if not self.conn.in_transaction:
+                            cursor.execute("BEGIN")
+                        cursor.execute("SAVEPOINT batch_writer")
+                        try:
+                            cursor.executemany(self._build_sql(table, columns, update_columns, 1, touch_column), batch)
+                        except sqlite3.Error:
+                            cursor.execute("ROLLBACK TO batch_writer")
+                            raise
+                        finally:
+                            cursor.execute("RELEASE batch_writer")
+                    else:
+                        sql = self._build_sql(table, columns, update_columns, len(batch), touch_column)
+                        params = [value for row in batch for value in row]
+                        cursor.execute(sql, params)
+                        self.conn.commit()
+                    written += len(batch)
+                except (mysql.connector.Error, sqlite3.Error) as err:
+                    print(f"Error writing batch {batch_no} ({len(batch)} rows) into {table}: {err}")
+                    self.errors.append({"table": table, "batch": batch_no, "rows": len(batch), "error": str(err)})
+                    if not self.is_sqlite:
+                        self.conn.rollback()
+
+            if self.is_sqlite:
+                self.conn.commit()
+        finally:
+            cursor.close()
+
+        return written
+
+    def upsert_frame(self, table, df, update_columns=None, touch_column="created_at"):
+        """
+        Convenience wrapper: writes every column of a DataFrame.
+        Values should already be plain floats/strings (e.g. via astype / strftime).
+        """
+        if df is None or df.empty:
+            return 0
+        columns = list(df.columns)
+        rows = df.astype(object).itertuples(index=False, name=None)
+        return self.upsert(table, columns, rows, update_columns, touch_column)
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 # --- CONSTANTS (Company Standard) ---
@@ -11,19 +12,28 @@ def get_gold_don_price_krw(usd_oz, exchange_rate):
     Formula:
       Gold(KRW/Don) = (Gold(USD/oz) / 31.1035) * 3.75 * USD/KRW
     
+    Works element-wise on NumPy arrays and pandas Series as well as scalars,
+    so a whole history can be converted in one vectorized expression.
+    Missing inputs (None / NaN) produce None (scalar) or NaN (array) results.
+    
     Args:
-        usd_oz (float): Gold price in USD per Troy Ounce.
-        exchange_rate (float): USD/KRW exchange rate.
+        usd_oz (float | np.ndarray | pd.Series): Gold price in USD per Troy Ounce.
+        exchange_rate (float | np.ndarray | pd.Series): USD/KRW exchange rate.
         
     Returns:
-        float: Price in KRW per 1 Don.
+        float | np.ndarray | pd.Series: Price in KRW per 1 Don.
     """
     if usd_oz is None or exchange_rate is None:
         return None
     
-    gram_price_usd = usd_oz / TROY_OZ_TO_G
-    don_price_usd = gram_price_usd * DON_TO_G
-    don_price_krw = don_price_usd * exchange_rate
+    if np.isscalar(usd_oz) and np.isscalar(exchange_rate):
+        usd_oz, exchange_rate = float(usd_oz), float(exchange_rate)
+    elif not isinstance(usd_oz, pd.Series) and not isinstance(exchange_rate, pd.Series):
+        usd_oz = np.asarray(usd_oz, dtype=float)
+        exchange_rate = np.asarray(exchange_rate, dtype=float)
+    
+    # Single multiplier: (3.75 / 31.1035) oz per Don
+    don_price_krw = usd_oz * (DON_TO_G / TROY_OZ_TO_G) * exchange_rate
     
     return don_price_krw
 
@@ -1,11 +1,91 @@
 import mysql.connector
+from mysql.connector import pooling
 import os
 import sqlite3
+import threading
+import time
 import pandas as pd
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Connections kept open per MySQL config (process-wide)
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+# Seconds between background re-probes of MySQL while we are on the SQLite fallback
+MYSQL_RETRY_SECONDS = float(os.getenv("DB_RETRY_SECONDS", "60"))
+MYSQL_CONNECT_TIMEOUT = 3
+
+# Opt-in high-performance SQLite profile (FORCE_SQLITE / fallback mode).
+# WAL lets dashboard readers proceed while the nightly ingest writes.
+SQLITE_TUNED = os.getenv("SQLITE_TUNED", "false").lower() == "true"
+SQLITE_TUNED_PRAGMAS = [
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),     # Safe with WAL; fsync only at checkpoints
+    ("mmap_size", 268435456),      # 256 MB memory-mapped reads
+    ("cache_size", -65536),        # 64 MB page cache (negative = KiB)
+    ("temp_store", "MEMORY"),
+    ("busy_timeout", 5000)         # Wait for a writer instead of failing with 'database is locked'
+]
+SQLITE_TUNED_CACHED_STATEMENTS = 256
+
+# Process-wide connection state shared by every DBConnector instance
+_lock = threading.Lock()
+_pool_create_lock = threading.Lock()
+_mysql_pools = {}      # config key -> MySQLConnectionPool
+_circuits = {}         # config key -> {'opened_at', 'last_error', 'probes'} while MySQL is down
+_sqlite_local = threading.local()
+_force_sqlite_announced = False
+_stats = {
+    "mysql_checkouts": 0,
+    "mysql_direct": 0,
+    "sqlite_checkouts": 0,
+    "sqlite_opened": 0,
+    "fallbacks": 0,
+    "probes": 0
+}
+
+def sql_placeholder(conn):
+    """Returns the parameter placeholder for the connection's dialect ('?' SQLite, '%s' MySQL)."""
+    return "?" if isinstance(conn, sqlite3.Connection) else "%s"
+
+def apply_sqlite_profile(conn):
+    """Applies the tuned PRAGMA set to an open SQLite connection."""
+    for pragma, value in SQLITE_TUNED_PRAGMAS:
+        conn.execute(f"PRAGMA {pragma} = {value}")
+
+def optimize_sqlite(conn):
+    """
+    Refreshes planner statistics. Runs a full ANALYZE the first time and the
+    cheap PRAGMA optimize afterwards (it only re-analyzes tables that need it).
+    Intended to run after each pipeline run; no-op for MySQL connections.
+    """
+    if not isinstance(conn, sqlite3.Connection):
+        return
+    has_stats = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+    ).fetchone()
+    conn.execute("PRAGMA optimize" if has_stats else "ANALYZE")
+    conn.commit()
+
+class ReusableSQLiteConnection(sqlite3.Connection):
+    """
+    SQLite connection cached per thread and path, shared by every
+    get_connection() call on that thread.
+    Checkouts are counted: close() releases one, and only the last release
+    discards uncommitted work (like a real close would), so a helper closing
+    its checkout never rolls back an outer caller's writes. The connection
+    stays open for the next get_connection() call on this thread.
+    """
+    checkouts = 0
+
+    def close(self):
+        self.checkouts = max(0, self.checkouts - 1)
+        if self.checkouts == 0 and self.in_transaction:
+            self.rollback()
+
+    def close_for_real(self):
+        super().close()
+
 class DBConnector:
     def __init__(self, host=None, user=None, password=None, database=None):
         self.host = host or os.getenv("DB_HOST", "localhost")
@@ -15,51 +95,177 @@ class DBConnector:
         # Handle cases where DB_PORT is an empty string
         env_port = os.getenv("DB_PORT")
         self.port = int(env_port) if env_port and env_port.strip() else 3306
-        
+
         # Determine connection mode
         self.use_sqlite = False
         # Path for the SQLite DB file (in the project root)
         self.sqlite_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../dashboard.db"))
 
+    def _mysql_config(self):
+        return {
+            "host": self.host,
+            "user": self.user,
+            "password": self.password,
+            "database": self.database,
+            "port": self.port,
+            "connection_timeout": MYSQL_CONNECT_TIMEOUT
+        }
+
+    def _pool_key(self):
+        return (self.host, self.user, self.database, self.port)
+
+    def _get_sqlite_connection(self):
+        """Returns this thread's cached SQLite connection (opened on first use)."""
+        self.use_sqlite = True
+        connections = getattr(_sqlite_local, "connections", None)
+        if connections is None:
+            connections = _sqlite_local.connections = {}
+        conn = connections.get(self.sqlite_path)
+        if conn is None:
+            if SQLITE_TUNED:
+                conn = sqlite3.connect(
+                    self.sqlite_path,
+                    factory=ReusableSQLiteConnection,
+                    cached_statements=SQLITE_TUNED_CACHED_STATEMENTS
+                )
+                apply_sqlite_profile(conn)
+            else:
+                conn = sqlite3.connect(self.sqlite_path, factory=ReusableSQLiteConnection)
+            connections[self.sqlite_path] = conn
+            with _lock:
+                _stats["sqlite_opened"] += 1
+        conn.checkouts += 1
+        with _lock:
+            _stats["sqlite_checkouts"] += 1
+        return conn
+
+    def _get_mysql_connection(self):
+        """Checks a connection out of the process-wide pool (created on first use)."""
+        key = self._pool_key()
+        pool = _mysql_pools.get(key)
+        if pool is None:
+            with _pool_create_lock:
+                pool = _mysql_pools.get(key)
+                if pool is None:
+                    pool = pooling.MySQLConnectionPool(
+                        pool_name=f"dashboard_{len(_mysql_pools)}",
+                        pool_size=POOL_SIZE,
+                        **self._mysql_config()
+                    )
+                    with _lock:
+                        _mysql_pools[key] = pool
+        try:
+            conn = pool.get_connection()
+            with _lock:
+                _stats["mysql_checkouts"] += 1
+        except mysql.connector.errors.PoolError:
+            # Pool exhausted: use a one-off connection rather than blocking
+            conn = mysql.connector.connect(**self._mysql_config())
+            with _lock:
+                _stats["mysql_direct"] += 1
+        return conn
+
+    def _open_circuit(self, error):
+        """Marks MySQL as down and starts one background probe for this config."""
+        key = self._pool_key()
+        with _lock:
+            _stats["fallbacks"] += 1
+            if key in _circuits:
+                return
+            _circuits[key] = {"opened_at": time.time(), "last_error": str(error), "probes": 0}
+
+        config = self._mysql_config()
+
+        def probe():
+            while True:
+                time.sleep(MYSQL_RETRY_SECONDS)
+                try:
+                    mysql.connector.connect(**config).close()
+                except Exception as e:
+                    with _lock:
+                        _stats["probes"] += 1
+                        _circuits[key]["probes"] += 1
+                        _circuits[key]["last_error"] = str(e)
+                    continue
+                with _lock:
+                    _stats["probes"] += 1
+                    _circuits.pop(key, None)
+                print(f"✅ MySQL reachable again ({config['host']}). Switching back from SQLite.")
+                return
+
+        threading.Thread(target=probe, name="mysql-probe", daemon=True).start()
+
     def get_connection(self):
         """
         Returns a raw database connection.
         Prioritizes MySQL. Falls back to SQLite if MySQL fails.
+
+        MySQL connections come from a process-wide pool and SQLite connections are
+        reused per thread, so close() returns them instead of tearing them down.
+        After a MySQL failure the fallback is sticky: further calls go straight to
+        SQLite (no connect timeout) until a background probe sees MySQL again.
         """
         # 0. Check for Forced SQLite Mode (for local population)
         if os.getenv("FORCE_SQLITE", "false").lower() == "true":
-            print(f"🔹 FORCE_SQLITE mode active. Using: {self.sqlite_path}")
-            self.use_sqlite = True
-            return sqlite3.connect(self.sqlite_path)
+            global _force_sqlite_announced
+            if not _force_sqlite_announced:
+                print(f"🔹 FORCE_SQLITE mode active. Using: {self.sqlite_path}")
+                _force_sqlite_announced = True
+            return self._get_sqlite_connection()
 
-        # 1. Try MySQL First
+        # 1. MySQL known to be down: skip the connect timeout
+        with _lock:
+            circuit_open = self._pool_key() in _circuits
+        if circuit_open:
+            return self._get_sqlite_connection()
+
+        # 2. Try MySQL First
         try:
-            conn = mysql.connector.connect(
-                host=self.host,
-                user=self.user,
-                password=self.password,
-                database=self.database,
-                port=self.port,
-                connection_timeout=3
-            )
+            conn = self._get_mysql_connection()
+            self.use_sqlite = False
             return conn
         except Exception as e:
-            # 2. Fallback to SQLite
+            # 3. Fallback to SQLite
             print(f"⚠️ MySQL Connection Failed: {e}")
-            print(f"🔄 Falling back to SQLite: {self.sqlite_path}")
-            self.use_sqlite = True
-            return sqlite3.connect(self.sqlite_path)
+            print(f"🔄 Falling back to SQLite: {self.sqlite_path} (re-probing MySQL every {MYSQL_RETRY_SECONDS:.0f}s)")
+            self._open_circuit(e)
+            return self._get_sqlite_connection()
 
-    def get_data(self, query):
+    def get_data(self, query, params=None):
         """
         Executes a SELECT query and returns a Pandas DataFrame.
         """
         conn = self.get_connection()
         try:
-            return pd.read_sql(query, conn)
+            return pd.read_sql(query, conn, params=params)
         except Exception as e:
             print(f"Error executing query: {e}")
             return None
         finally:
             if conn:
                 conn.close()
+
+    @staticmethod
+    def pool_stats():
+        """Returns process-wide connection statistics for monitoring."""
+        with _lock:
+            stats = dict(_stats)
+            stats["mysql_pools"] = {
+                f"{host}:{port}/{database}": {"size": pool.pool_size}
+                for (host, _user, database, port), pool in _mysql_pools.items()
+            }
+            stats["circuits_open"] = {
+                f"{host}:{port}/{database}": {
+                    "down_for_seconds": round(time.time() - state["opened_at"], 1),
+                    "probes": state["probes"],
+                    "last_error": state["last_error"]
+                }
+                for (host, _user, database, port), state in _circuits.items()
+            }
+        if stats["circuits_open"] or os.getenv("FORCE_SQLITE", "false").lower() == "true":
+            stats["backend"] = "sqlite"
+        elif stats["mysql_pools"]:
+            stats["backend"] = "mysql"
+        else:
+            stats["backend"] = "not connected"
+        return stats
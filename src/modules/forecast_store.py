@@ -0,0 +1,152 @@
+import os
+import sqlite3
+import hashlib
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+FORECAST_TABLE = "macro_forecast"
+FORECAST_MODEL_DIR = os.getenv(
+    "FORECAST_MODEL_DIR",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "../../data/models"))
+)
+FORECAST_COLUMNS = ["metric", "horizon", "data_fingerprint", "engine", "ds", "yhat", "yhat_lower", "yhat_upper"]
+
+# Precomputed forecasts, one set of rows per (metric, horizon) and training data
+# fingerprint, tagged with the engine that produced them. Mirrors macro_forecast in schema.sql.
+SQLITE_DDL = """
+CREATE TABLE IF NOT EXISTS macro_forecast (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    metric TEXT,
+    horizon INTEGER,
+    data_fingerprint TEXT,
+    engine TEXT,
+    ds TEXT,
+    yhat REAL,
+    yhat_lower REAL,
+    yhat_upper REAL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(metric, horizon, data_fingerprint, ds)
+);
+"""
+
+MYSQL_DDL = """
+CREATE TABLE IF NOT EXISTS macro_forecast (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    metric VARCHAR(50) NOT NULL,
+    horizon INT NOT NULL,
+    data_fingerprint CHAR(40) NOT NULL,
+    engine VARCHAR(20),
+    ds DATETIME NOT NULL,
+    yhat DECIMAL(18, 2),
+    yhat_lower DECIMAL(18, 2),
+    yhat_upper DECIMAL(18, 2),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY unique_forecast_entry (metric, horizon, data_fingerprint, ds)
+)
+"""
+
+
+def _placeholder(conn):
+    return "?" if isinstance(conn, sqlite3.Connection) else "%s"
+
+
+def ensure_forecast_table(conn):
+    """
+    Creates macro_forecast on databases set up before it existed, and adds the
+    engine column to tables created before it was stored.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(SQLITE_DDL if isinstance(conn, sqlite3.Connection) else MYSQL_DDL)
+        cursor.execute(f"SELECT * FROM {FORECAST_TABLE} LIMIT 0")
+        columns = [d[0] for d in cursor.description]
+        cursor.fetchall()
+        if "engine" not in columns:
+            column_type = "TEXT" if isinstance(conn, sqlite3.Connection) else "VARCHAR(20)"
+            cursor.execute(f"ALTER TABLE {FORECAST_TABLE} ADD COLUMN engine {column_type}")
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def data_fingerprint(history_df, config=""):
+    """
+    sha1 of the training series (date, value) plus the model configuration, so a
+    forecast is recomputed exactly when its inputs change.
+    """
+    dates = pd.to_datetime(history_df['date']).dt.strftime('%Y-%m-%d %H:%M:%S')
+    values = pd.to_numeric(history_df['value']).astype(float).round(6)
+    digest = hashlib.sha1(str(config).encode("utf-8"))
+    digest.update("\n".join(dates).encode("utf-8"))
+    digest.update(values.to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def model_path(metric, horizon, fingerprint, extension="json"):
+    return os.path.join(FORECAST_MODEL_DIR, f"{metric}.h{horizon}.{fingerprint[:12]}.{extension}")
+
+
+def forecast_exists(conn, metric, horizon, fingerprint):
+    ensure_forecast_table(conn)
+    ph = _placeholder(conn)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"SELECT COUNT(*) FROM {FORECAST_TABLE} WHERE metric = {ph} AND horizon = {ph} AND data_fingerprint = {ph}",
+            (metric, int(horizon), fingerprint)
+        )
+        return cursor.fetchone()[0] > 0
+    finally:
+        cursor.close()
+
+
+def delete_other_forecasts(conn, metric, horizon, fingerprint):
+    """Drops stored runs of metric/horizon other than `fingerprint`."""
+    ph = _placeholder(conn)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"DELETE FROM {FORECAST_TABLE} WHERE metric = {ph} AND horizon = {ph} AND data_fingerprint <> {ph}",
+            (metric, int(horizon), fingerprint)
+        )
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def read_latest_forecast(connector, metric, horizon):
+    """
+    Returns the most recently stored forecast (ds, yhat, yhat_lower, yhat_upper,
+    engine) for metric/horizon, or None if the pipeline has not computed one yet.
+    engine is the forecaster that produced it (None for rows stored before it was recorded).
+
+    Read-only: the table (and its engine column) is created or migrated by the
+    forecast stage. Until then, the read fails and None is returned.
+    """
+    conn = connector.get_connection()
+    ph = _placeholder(conn)
+    query = f"""
+    SELECT ds, yhat, yhat_lower, yhat_upper, engine
+    FROM {FORECAST_TABLE}
+    WHERE metric = {ph} AND horizon = {ph} AND data_fingerprint = (
+        SELECT data_fingerprint FROM {FORECAST_TABLE}
+        WHERE metric = {ph} AND horizon = {ph}
+        ORDER BY created_at DESC, id DESC LIMIT 1
+    )
+    ORDER BY ds ASC
+    """
+    try:
+        df = pd.read_sql(query, conn, params=(metric, int(horizon), metric, int(horizon)))
+    except Exception as e:
+        print(f"Error reading forecast for {metric} ({horizon}d): {e}")
+        return None
+    finally:
+        conn.close()
+    if df.empty:
+        return None
+    df['ds'] = pd.to_datetime(df['ds'])
+    for col in ['yhat', 'yhat_lower', 'yhat_upper']:
+        df[col] = df[col].astype(float)
+    return df
@@ -0,0 +1,117 @@
+import os
+import time
+import threading
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# A reading older than this is reported as stale (it is still served)
+LIVE_PRICE_TTL_SECONDS = float(os.getenv("LIVE_PRICE_TTL_SECONDS", "60"))
+# How often the background thread refreshes; half the TTL keeps readings fresh
+env_refresh = os.getenv("LIVE_PRICE_REFRESH_SECONDS")
+LIVE_PRICE_REFRESH_SECONDS = float(env_refresh) if env_refresh and env_refresh.strip() else LIVE_PRICE_TTL_SECONDS / 2
+
+
+class LivePriceCache:
+    def __init__(self, fetch_prices, ttl_seconds=None, refresh_seconds=None):
+        """
+        Process-wide cache of live quotes, filled by one background thread.
+
+        fetch_prices: Callable returning {name: price or None}
+                      (e.g. MarketDataCollector().fetch_current_prices).
+        ttl_seconds: Age after which a reading is stale (default LIVE_PRICE_TTL_SECONDS).
+        refresh_seconds: Refresh interval (default LIVE_PRICE_REFRESH_SECONDS).
+
+        Readers never touch the network: they get whatever the last refresh stored.
+        A failed quote keeps its previous value and becomes stale once it is older
+        than the TTL.
+        """
+        self.fetch_prices = fetch_prices
+        self.ttl_seconds = LIVE_PRICE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.refresh_seconds = LIVE_PRICE_REFRESH_SECONDS if refresh_seconds is None else refresh_seconds
+        self._readings = {}     # name -> (value, fetched_at epoch seconds)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self.last_error = None
+
+    def refresh(self):
+        """Fetches all quotes once (blocking). Called by the refresher thread."""
+        try:
+            prices = self.fetch_prices() or {}
+        except Exception as e:
+            print(f"Live price refresh failed: {e}")
+            self.last_error = str(e)
+            return
+        now = time.time()
+        with self._lock:
+            for name, value in prices.items():
+                if value is not None:
+                    self._readings[name] = (value, now)
+        missing = [name for name, value in prices.items() if value is None]
+        self.last_error = f"No quote for {', '.join(missing)}" if missing else None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.refresh_seconds)
+
+    def start(self):
+        """Starts the refresher thread (once per cache)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="live-price-refresher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def get(self, name):
+        """
+        Returns {'value', 'fetched_at', 'stale_since'} for one asset, or None before
+        its first successful fetch. Times are UTC datetimes; stale_since is None
+        while the reading is within the TTL.
+        """
+        with self._lock:
+            reading = self._readings.get(name)
+        if reading is None:
+            return None
+        value, fetched_at = reading
+        expires = fetched_at + self.ttl_seconds
+        return {
+            "value": value,
+            "fetched_at": datetime.fromtimestamp(fetched_at, timezone.utc),
+            "stale_since": datetime.fromtimestamp(expires, timezone.utc) if time.time() > expires else None
+        }
+
+    def snapshot(self):
+        """All readings: {name: reading dict} (see get())."""
+        with self._lock:
+            names = list(self._readings)
+        return {name: self.get(name) for name in names}
+
+    def prices(self):
+        """{name: value} of the latest readings, stale or not."""
+        with self._lock:
+            return {name: value for name, (value, _) in self._readings.items()}
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_live_price_cache(fetch_prices):
+    """
+    Returns the process-wide LivePriceCache, creating and starting it on first use.
+    Every Streamlit session shares it, so upstream is polled once per interval
+    regardless of the number of users.
+    """
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = LivePriceCache(fetch_prices)
+        return _shared_cache.start()
@@ -0,0 +1,435 @@
+import os
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Daily closes are ingested nightly; allow for weekends and holidays before the
+# stored history counts as stale and callers fall back to the network
+REPOSITORY_MAX_STALENESS_DAYS = int(os.getenv("REPOSITORY_MAX_STALENESS_DAYS", "4"))
+
+# Collector names (MarketDataCollector.tickers) -> macro_raw symbols, as ingested
+# by YFinanceSource.symbol_map
+RAW_SYMBOLS = {
+    "Gold": "GOLD_USD_OZ",
+    "Silver": "SILVER_USD_OZ",
+    "USD/KRW": "USDKRW",
+    "DXY": "DXY_INDEX",
+    "S&P 500": "SPX_INDEX",
+    "KOSPI": "KOSPI_INDEX"
+}
+
+# Observation frequency and publication lag in days (observation date -> first day
+# the value is public) per macro_raw symbol. Market closes are known the same day;
+# FRED monthly series are dated at the start of the month they describe.
+SERIES_CALENDAR = {
+    "US10Y_YIELD": ("D", 1),
+    "CPI_INDEX": ("M", 45),
+    "M2_SUPPLY": ("M", 55),
+    "FED_RATE": ("M", 32)
+}
+DEFAULT_SERIES_CALENDAR = ("D", 0)
+# Frequencies from finest to coarsest, and how long after publication a value is
+# still carried forward: one missed release is bridged, older values become NaN
+# instead of going silently stale
+FREQUENCY_MAX_AGE_DAYS = {"D": 7, "W": 21, "M": 75, "Q": 200}
+ALIGNED_CACHE_SIZE = int(os.getenv("ALIGNED_CACHE_SIZE", "32"))
+
+# Rolling correlations / volatilities written by the correlation stage
+CORRELATION_TABLE = "market_correlation_derived"
+
+# Series tables -> the column naming the series; all have (date, <key>, value)
+# and an index on (<key>, date)
+SERIES_SOURCES = {
+    "macro_raw": "symbol",
+    "macro_derived": "metric",
+    "domestic_market_raw": "price_type"
+}
+
+# Resampling periods, labelled by their last day like pandas 'D' / 'W' (W-SUN) / 'ME':
+# (SQLite expression, MySQL expression) of the period label of `{col}`
+RESAMPLE_PERIODS = {
+    "D": ("date({col})", "DATE({col})"),
+    "W": ("date({col}, 'weekday 0')", "DATE_ADD(DATE({col}), INTERVAL 6 - WEEKDAY({col}) DAY)"),
+    "M": ("date({col}, 'start of month', '+1 month', '-1 day')", "LAST_DAY({col})")
+}
+RESAMPLE_AGGREGATES = {"mean": "AVG", "min": "MIN", "max": "MAX", "sum": "SUM", "last": None, "first": None}
+
+
+def _placeholder(conn):
+    return "?" if isinstance(conn, sqlite3.Connection) else "%s"
+
+
+def align_asof(raw, symbols, calendar=None):
+    """
+    As-of alignment of mixed-frequency series.
+
+    raw: Long rows (date, symbol, value) with datetime dates.
+    calendar: Dates of the result; default the dates of the finest-frequency
+              symbols in SERIES_CALENDAR (e.g. trading days when market
+              series are included).
+
+    Each column holds, for every calendar date, the latest value already
+    published by then (observation date + publication lag), or NaN once it is
+    older than FREQUENCY_MAX_AGE_DAYS of its frequency. One searchsorted per symbol.
+    """
+    calendars = {symbol: SERIES_CALENDAR.get(symbol, DEFAULT_SERIES_CALENDAR) for symbol in symbols}
+    raw = raw.sort_values('date').drop_duplicates(['symbol', 'date'], keep='last')
+    groups = {symbol: rows for symbol, rows in raw.groupby('symbol')}
+
+    if calendar is None:
+        frequencies = list(FREQUENCY_MAX_AGE_DAYS)
+        finest = min((freq for freq, _ in calendars.values()), key=frequencies.index, default="D")
+        finest_dates = [groups[s]['date'] for s, (freq, _) in calendars.items() if freq == finest and s in groups]
+        calendar = pd.DatetimeIndex(pd.concat(finest_dates).unique() if finest_dates else []).sort_values()
+    index = pd.DatetimeIndex(calendar).to_numpy(dtype='datetime64[ns]')
+
+    columns = {}
+    for symbol in symbols:
+        freq, lag_days = calendars[symbol]
+        column = np.full(len(index), np.nan)
+        rows = groups.get(symbol)
+        if rows is not None and len(index):
+            published = (rows['date'] + pd.Timedelta(days=lag_days)).to_numpy(dtype='datetime64[ns]')
+            values = rows['value'].to_numpy(dtype=float)
+            pos = np.searchsorted(published, index, side='right') - 1
+            known = pos >= 0
+            fresh = index[known] - published[pos[known]] <= np.timedelta64(FREQUENCY_MAX_AGE_DAYS[freq], 'D')
+            column[np.flatnonzero(known)[fresh]] = values[pos[known][fresh]]
+        columns[symbol] = column
+    return pd.DataFrame(columns, index=pd.DatetimeIndex(index, name='date'))
+
+
+class TimeSeriesRepository:
+    # Aligned panels shared by all repositories in the process:
+    # (database, symbols, start, end) -> (data version, panel), least recently used first
+    _aligned_cache = OrderedDict()
+    _lock = threading.Lock()
+
+    def __init__(self, connector, max_staleness_days=None):
+        """
+        Read access to the stored market history (macro_raw) and the
+        precomputed cross-asset statistics derived from it.
+
+        connector: DBConnector used for every query.
+        max_staleness_days: History whose last date is older than this is stale
+                            (default REPOSITORY_MAX_STALENESS_DAYS).
+        """
+        self.connector = connector
+        self.max_staleness_days = REPOSITORY_MAX_STALENESS_DAYS if max_staleness_days is None else max_staleness_days
+
+    def get_panel(self, names, start=None, end=None, fallback=None):
+        """
+        Wide close-price panel of `names` (collector names, e.g. "Gold", "DXY",
+        "S&P 500"), indexed by date with one column per name in the requested
+        order. Values are forward-filled across days a market was closed.
+
+        start / end: Optional inclusive date bounds, applied in SQL.
+        fallback: Optional callable returning the same kind of frame (e.g. a
+                  MarketDataCollector download). It is only called when the
+                  stored history is empty or stale; if it returns nothing, the
+                  stored (stale) panel is returned instead.
+        """
+        panel = self._read_panel(names, start, end)
+        if fallback is None or not self.is_stale(panel):
+            return panel
+
+        last = panel.index.max().date() if not panel.empty else None
+        print(f"Stored history is stale (last date: {last}). Falling back to a live download.")
+        try:
+            fetched = fallback()
+        except Exception as e:
+            print(f"Error in history fallback: {e}")
+            fetched = None
+        if fetched is None or fetched.empty:
+            return panel
+        return fetched[[name for name in names if name in fetched.columns]]
+
+    def is_stale(self, panel):
+        """True when `panel` is empty or ends more than max_staleness_days ago."""
+        if panel is None or panel.empty:
+            return True
+        cutoff = pd.Timestamp.today().normalize() - pd.Timedelta(days=self.max_staleness_days)
+        return panel.index.max() < cutoff
+
+    def get_series(self, symbols, start=None, end=None, freq=None, agg="last", source="macro_raw"):
+        """
+        Long frame (date, symbol, value) of `symbols` from `source` (a
+        SERIES_SOURCES table, e.g. macro_derived metrics), sorted by symbol and
+        date, with parsed dates and float values.
+
+        start / end: Optional inclusive day bounds, pushed down as plain range
+                     predicates so the (<key>, date) index is used.
+        freq: Optional 'D', 'W' or 'M' to aggregate in SQL per period (labelled
+              by its last day); agg picks the value: last, first, mean, min,
+              max or sum. Only the aggregated rows are transferred.
+        """
+        symbols = list(symbols)
+        if source not in SERIES_SOURCES:
+            raise ValueError(f"Unknown series source: {source}")
+        if freq is not None and freq not in RESAMPLE_PERIODS:
+            raise ValueError(f"Unsupported resample frequency: {freq}")
+        if agg not in RESAMPLE_AGGREGATES:
+            raise ValueError(f"Unsupported aggregate: {agg}")
+
+        conn = self.connector.get_connection()
+        query, params = self._series_query(conn, source, symbols, start, end, freq, agg)
+        try:
+            df = pd.read_sql(query, conn, params=params)
+        except Exception as e:
+            print(f"Error reading {source} series {', '.join(symbols)}: {e}")
+            df = pd.DataFrame(columns=['date', 'symbol', 'value'])
+        finally:
+            conn.close()
+
+        df['date'] = pd.to_datetime(df['date'], format='ISO8601')
+        df['symbol'] = df['symbol'].astype(object)
+        df['value'] = df['value'].astype(float)
+        return df
+
+    def describe(self, source="macro_raw"):
+        """Rows, first and last date per series of `source` (aggregated in SQL)."""
+        if source not in SERIES_SOURCES:
+            raise ValueError(f"Unknown series source: {source}")
+        key = SERIES_SOURCES[source]
+        query = (f"SELECT {key} AS symbol, COUNT(*) AS rows_count, MIN(date) AS first_date, MAX(date) AS last_date "
+                 f"FROM {source} GROUP BY {key} ORDER BY {key}")
+        df = self.connector.get_data(query)
+        if df is None:
+            return pd.DataFrame(columns=['symbol', 'rows_count', 'first_date', 'last_date'])
+        df['first_date'] = pd.to_datetime(df['first_date'], format='ISO8601')
+        df['last_date'] = pd.to_datetime(df['last_date'], format='ISO8601')
+        return df
+
+    def _series_query(self, conn, source, symbols, start, end, freq, agg):
+        """Parameterized SELECT for get_series in the connection's dialect."""
+        is_sqlite = isinstance(conn, sqlite3.Connection)
+        ph = _placeholder(conn)
+        key = SERIES_SOURCES[source]
+
+        where = f"{key} IN ({', '.join([ph] * len(symbols))})"
+        params = tuple(symbols)
+        # Dates are stored as 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM:SS', so compare on the day
+        if start is not None:
+            where += f" AND date >= {ph}"
+            params += (pd.Timestamp(start).strftime('%Y-%m-%d'),)
+        if end is not None:
+            where += f" AND date < {ph}"
+            params += ((pd.Timestamp(end) + pd.Timedelta(days=1)).strftime('%Y-%m-%d'),)
+
+        if freq is None:
+            return (f"SELECT date, {key} AS symbol, value FROM {source} WHERE {where} "
+                    f"ORDER BY {key}, date"), params
+
+        period = RESAMPLE_PERIODS[freq][0 if is_sqlite else 1]
+        if RESAMPLE_AGGREGATES[agg]:
+            label = period.format(col="date")
+            return (f"SELECT {label} AS date, {key} AS symbol, {RESAMPLE_AGGREGATES[agg]}(value) AS value "
+                    f"FROM {source} WHERE {where} GROUP BY {key}, {label} ORDER BY symbol, date"), params
+
+        # last / first: pick each period's last (first) date, then join back on the unique (date, key)
+        pick = "MAX" if agg == "last" else "MIN"
+        query = (
+            f"SELECT {period.format(col='t.date')} AS date, t.{key} AS symbol, t.value "
+            f"FROM {source} t JOIN ("
+            f"SELECT {key} AS series_key, {pick}(date) AS picked_date FROM {source} WHERE {where} "
+            f"GROUP BY {key}, {period.format(col='date')}"
+            f") p ON t.{key} = p.series_key AND t.date = p.picked_date "
+            f"ORDER BY symbol, date"
+        )
+        return query, params
+
+    def get_aligned_panel(self, symbols, start=None, end=None):
+        """
+        Wide, date-indexed panel of any macro_raw symbols (columns keep the
+        symbol names), as-of aligned across frequencies with publication lags
+        (see align_asof), e.g. daily GOLD_USD_OZ next to the CPI_INDEX that was
+        public on each trading day.
+
+        start / end: Optional inclusive date bounds of the result; earlier
+                     observations are read as needed to fill its first rows.
+        Results are cached per symbol set and date range and reused until
+        macro_raw rows of those symbols change.
+        """
+        symbols = list(symbols)
+        key = (self._db_key(), tuple(symbols), str(start), str(end))
+        version = self._data_version(symbols)
+        with self._lock:
+            cached = self._aligned_cache.get(key)
+            if cached is not None and cached[0] == version:
+                self._aligned_cache.move_to_end(key)
+                return cached[1].copy()
+
+        calendars = [SERIES_CALENDAR.get(symbol, DEFAULT_SERIES_CALENDAR) for symbol in symbols]
+        lookback = max(lag + FREQUENCY_MAX_AGE_DAYS[freq] for freq, lag in calendars)
+        read_start = pd.Timestamp(start) - pd.Timedelta(days=lookback) if start is not None else None
+        panel = align_asof(self._read_rows(symbols, read_start, end), symbols)
+        if start is not None:
+            panel = panel[panel.index >= pd.Timestamp(start)]
+        if end is not None:
+            panel = panel[panel.index <= pd.Timestamp(end)]
+
+        with self._lock:
+            self._aligned_cache[key] = (version, panel)
+            self._aligned_cache.move_to_end(key)
+            while len(self._aligned_cache) > ALIGNED_CACHE_SIZE:
+                self._aligned_cache.popitem(last=False)
+        return panel.copy()
+
+    def get_correlation_matrix(self, window=30, date=None):
+        """
+        Precomputed rolling correlation matrix of the tracked assets (collector
+        names, 1.0 on the diagonal) on `date`, default the latest stored date.
+        Returns (matrix, date), or (None, None) if nothing is stored yet.
+        """
+        rows, as_of = self._read_correlation_rows("CORR", window, date)
+        if rows is None:
+            return None, None
+        stored = set(rows['symbol_a']) | set(rows['symbol_b'])
+        assets = [symbol for symbol in RAW_SYMBOLS.values() if symbol in stored]
+        matrix = pd.DataFrame(np.eye(len(assets)), index=assets, columns=assets)
+        for symbol_a, symbol_b, value in rows[['symbol_a', 'symbol_b', 'value']].itertuples(index=False, name=None):
+            matrix.loc[symbol_a, symbol_b] = matrix.loc[symbol_b, symbol_a] = float(value)
+        names = {symbol: name for name, symbol in RAW_SYMBOLS.items()}
+        matrix = matrix.rename(index=names, columns=names)
+        return matrix, as_of
+
+    def get_volatility(self, window=30, date=None):
+        """
+        Precomputed annualized volatility per asset (Series by collector name)
+        on `date`, default the latest stored date. Returns (series, date), or
+        (None, None) if nothing is stored yet.
+        """
+        rows, as_of = self._read_correlation_rows("VOL", window, date)
+        if rows is None:
+            return None, None
+        volatility = pd.Series(rows['value'].astype(float).to_numpy(), index=rows['symbol_a'].to_numpy())
+        volatility = volatility.reindex([symbol for symbol in RAW_SYMBOLS.values() if symbol in volatility.index])
+        names = {symbol: name for name, symbol in RAW_SYMBOLS.items()}
+        return volatility.rename(index=names), as_of
+
+    def get_rolling_correlation(self, name_a, name_b, window=30, start=None, end=None):
+        """
+        Precomputed rolling correlation history of one asset pair (collector names
+        or macro_raw symbols) as a Series by date, or None if nothing is stored.
+        """
+        symbols = [RAW_SYMBOLS.get(name_a, name_a), RAW_SYMBOLS.get(name_b, name_b)]
+        if symbols[0] == symbols[1]:
+            return None
+        rows = self._read_correlation_range("CORR", window, start, end, symbols)
+        if rows is None:
+            return None
+        series = rows.groupby('date')['value'].first()
+        return series.rename(f"{name_a}/{name_b}")
+
+    def get_volatility_history(self, window=30, start=None, end=None):
+        """
+        Precomputed annualized volatility history: DataFrame indexed by date with
+        one column per asset (collector names), or None if nothing is stored.
+        """
+        rows = self._read_correlation_range("VOL", window, start, end)
+        if rows is None:
+            return None
+        wide = rows.pivot_table(index='date', columns='symbol_a', values='value', aggfunc='last')
+        wide = wide[[symbol for symbol in RAW_SYMBOLS.values() if symbol in wide.columns]]
+        names = {symbol: name for name, symbol in RAW_SYMBOLS.items()}
+        wide.columns.name = None
+        return wide.rename(columns=names)
+
+    def _read_correlation_range(self, metric, window, start=None, end=None, pair=None):
+        conn = self.connector.get_connection()
+        ph = _placeholder(conn)
+        query = (f"SELECT date, symbol_a, symbol_b, value FROM {CORRELATION_TABLE} "
+                 f"WHERE metric = {ph} AND window_size = {ph}")
+        params = [metric, int(window)]
+        if pair is not None:
+            # Each pair is stored once, in RAW_SYMBOLS order
+            query += f" AND ((symbol_a = {ph} AND symbol_b = {ph}) OR (symbol_a = {ph} AND symbol_b = {ph}))"
+            params += [pair[0], pair[1], pair[1], pair[0]]
+        if start is not None:
+            query += f" AND date >= {ph}"
+            params.append(pd.Timestamp(start).strftime('%Y-%m-%d'))
+        if end is not None:
+            query += f" AND date <= {ph}"
+            params.append(pd.Timestamp(end).strftime('%Y-%m-%d'))
+        query += " ORDER BY date"
+        try:
+            rows = pd.read_sql(query, conn, params=tuple(params))
+        except Exception as e:
+            print(f"Error reading {metric} history ({window}d): {e}")
+            return None
+        finally:
+            conn.close()
+        if rows.empty:
+            return None
+        rows['date'] = pd.to_datetime(rows['date'], format='ISO8601')
+        rows['value'] = rows['value'].astype(float)
+        return rows
+
+    def _read_correlation_rows(self, metric, window, date=None):
+        conn = self.connector.get_connection()
+        ph = _placeholder(conn)
+        if date is None:
+            date_clause = (f"(SELECT MAX(date) FROM {CORRELATION_TABLE} "
+                           f"WHERE metric = {ph} AND window_size = {ph})")
+            params = (metric, int(window), metric, int(window))
+        else:
+            date_clause = ph
+            params = (metric, int(window), pd.Timestamp(date).strftime('%Y-%m-%d'))
+        query = (f"SELECT date, symbol_a, symbol_b, value FROM {CORRELATION_TABLE} "
+                 f"WHERE metric = {ph} AND window_size = {ph} AND date = {date_clause}")
+        try:
+            rows = pd.read_sql(query, conn, params=params)
+        except Exception as e:
+            print(f"Error reading {metric} ({window}d): {e}")
+            return None, None
+        finally:
+            conn.close()
+        if rows.empty:
+            return None, None
+        return rows, pd.to_datetime(rows['date'].iloc[0])
+
+    def _db_key(self):
+        return (self.connector.host, self.connector.port, self.connector.database, self.connector.sqlite_path)
+
+    def _data_version(self, symbols):
+        """Row count and latest write of the symbols' macro_raw rows (changes on every upsert)."""
+        conn = self.connector.get_connection()
+        ph = _placeholder(conn)
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                f"SELECT COUNT(*), MAX(created_at) FROM macro_raw WHERE symbol IN ({', '.join([ph] * len(symbols))})",
+                tuple(symbols)
+            )
+            return tuple(str(v) for v in cursor.fetchone())
+        except Exception as e:
+            print(f"Error reading history version: {e}")
+            return None
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _read_rows(self, symbols, start=None, end=None):
+        """Long macro_raw rows (date, symbol, value) of `symbols`, dates normalized to the day."""
+        raw = self.get_series(symbols, start, end)
+        raw['date'] = raw['date'].dt.normalize()
+        return raw
+
+    def _read_panel(self, names, start=None, end=None):
+        unknown = [name for name in names if name not in RAW_SYMBOLS]
+        if unknown:
+            raise ValueError(f"Unknown series: {', '.join(unknown)}")
+        symbols = {RAW_SYMBOLS[name]: name for name in names}
+
+        raw = self._read_rows(list(symbols), start, end)
+        if raw.empty:
+            return pd.DataFrame(columns=list(names), index=pd.DatetimeIndex([], name='date'), dtype=float)
+        panel = raw.pivot_table(index='date', columns='symbol', values='value', aggfunc='last')
+        panel = panel.rename(columns=symbols).reindex(columns=list(names))
+        panel.columns.name = None
+        return panel.sort_index().ffill()
@@ -0,0 +1,209 @@
+import os
+import json
+import time
+import threading
+import pandas as pd
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+
+load_dotenv()
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.ipc as ipc
+except ImportError:  # pyarrow is optional: without it the app reads the DB directly
+    pa = None
+
+SNAPSHOT_DIR = os.getenv(
+    "SNAPSHOT_DIR",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "../../data/snapshot"))
+)
+# A daily pipeline publishes every ~24h; older snapshots are treated as stale
+SNAPSHOT_MAX_AGE_HOURS = float(os.getenv("SNAPSHOT_MAX_AGE_HOURS", "26"))
+MANIFEST_FILE = "manifest.json"
+
+# Table -> (query, numeric columns). Dates are stored as timestamp[ns].
+SNAPSHOT_TABLES = {
+    "macro_raw": (
+        "SELECT date, symbol, value, unit, source FROM macro_raw ORDER BY symbol, date",
+        ["value"]
+    ),
+    "macro_derived": (
+        "SELECT date, metric, value, calculation_version FROM macro_derived ORDER BY metric, date",
+        ["value"]
+    ),
+    "market_premium_derived": (
+        "SELECT date, theoretical_price, physical_price, premium_amount, premium_rate "
+        "FROM market_premium_derived ORDER BY date",
+        ["theoretical_price", "physical_price", "premium_amount", "premium_rate"]
+    )
+}
+
+
+def publish_snapshot(conn, snapshot_dir=None):
+    """
+    Exports the warehouse tables to Arrow IPC files and stamps a new version.
+
+    Each table is written to a temp file and atomically renamed, and the manifest
+    is replaced last, so readers never see a half-written snapshot.
+    Returns the manifest dict, or None when pyarrow is unavailable.
+    """
+    if pa is None:
+        print("pyarrow not installed. Skipping snapshot publish.")
+        return None
+
+    snapshot_dir = snapshot_dir or SNAPSHOT_DIR
+    os.makedirs(snapshot_dir, exist_ok=True)
+    version = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')
+    manifest = {"version": version, "created_at": time.time(), "tables": {}}
+
+    for table, (query, numeric_columns) in SNAPSHOT_TABLES.items():
+        df = pd.read_sql(query, conn)
+        # SQLite returns TEXT dates (mixed 'YYYY-MM-DD' / with time); MySQL returns DECIMAL objects
+        df['date'] = pd.to_datetime(df['date'], format='ISO8601')
+        for col in numeric_columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(float)
+
+        arrow_table = pa.Table.from_pandas(df, preserve_index=False)
+        file_name = f"{table}.{version}.arrow"
+        tmp_path = os.path.join(snapshot_dir, file_name + ".tmp")
+        # Uncompressed IPC file format, so readers can memory-map it without copying
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with ipc.new_file(sink, arrow_table.schema) as writer:
+                writer.write_table(arrow_table)
+        os.replace(tmp_path, os.path.join(snapshot_dir, file_name))
+        manifest["tables"][table] = {"file": file_name, "rows": arrow_table.num_rows}
+
+    manifest_tmp = os.path.join(snapshot_dir, MANIFEST_FILE + ".tmp")
+    with open(manifest_tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_tmp, os.path.join(snapshot_dir, MANIFEST_FILE))
+
+    _remove_old_versions(snapshot_dir, manifest)
+    row_counts = ", ".join(f"{t}: {meta['rows']}" for t, meta in manifest["tables"].items())
+    print(f"Snapshot {version} published to {snapshot_dir} ({row_counts})")
+    return manifest
+
+
+def confirm_snapshot(snapshot_dir=None):
+    """
+    Marks the current snapshot as checked against the warehouse now, for runs
+    where its source tables did not change and it was not republished.
+    Readers then keep treating it as fresh. Returns the manifest, or None when
+    there is no snapshot to confirm.
+    """
+    snapshot_dir = snapshot_dir or SNAPSHOT_DIR
+    manifest = SnapshotReader(snapshot_dir).read_manifest()
+    if not manifest:
+        return None
+
+    manifest["verified_at"] = time.time()
+    manifest_tmp = os.path.join(snapshot_dir, MANIFEST_FILE + ".tmp")
+    with open(manifest_tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_tmp, os.path.join(snapshot_dir, MANIFEST_FILE))
+    print(f"Snapshot {manifest['version']} unchanged; confirmed as current.")
+    return manifest
+
+
+def _remove_old_versions(snapshot_dir, manifest):
+    """Deletes table files of older versions (readers hold their own mmap handles)."""
+    current = {meta["file"] for meta in manifest["tables"].values()}
+    for file_name in os.listdir(snapshot_dir):
+        if file_name.endswith(".arrow") and file_name not in current:
+            try:
+                os.remove(os.path.join(snapshot_dir, file_name))
+            except OSError:
+                pass
+
+
+class SnapshotReader:
+    # Memory-mapped tables shared by all readers in the process: (dir, version, table) -> pa.Table
+    _cache = {}
+    _lock = threading.Lock()
+
+    def __init__(self, snapshot_dir=None, max_age_hours=None):
+        """
+        Zero-copy reader for snapshots written by publish_snapshot().
+        max_age_hours: snapshots older than this are stale (default SNAPSHOT_MAX_AGE_HOURS).
+        """
+        self.snapshot_dir = snapshot_dir or SNAPSHOT_DIR
+        self.max_age_hours = SNAPSHOT_MAX_AGE_HOURS if max_age_hours is None else max_age_hours
+
+    def read_manifest(self):
+        path = os.path.join(self.snapshot_dir, MANIFEST_FILE)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @property
+    def version(self):
+        manifest = self.read_manifest()
+        return manifest["version"] if manifest else None
+
+    def is_fresh(self):
+        """
+        True when pyarrow is available and a snapshot published or confirmed
+        (confirm_snapshot) within max_age_hours exists.
+        """
+        if pa is None:
+            return False
+        manifest = self.read_manifest()
+        if not manifest:
+            return False
+        checked_at = manifest.get("verified_at", manifest["created_at"])
+        return (time.time() - checked_at) <= self.max_age_hours * 3600
+
+    def load_table(self, table):
+        """
+        Returns the memory-mapped pyarrow Table of the current version (None if absent).
+        Buffers point straight into the mapped file; nothing is copied or parsed.
+        Cached per version, so a new publish invalidates it automatically.
+        """
+        manifest = self.read_manifest()
+        if pa is None or not manifest or table not in manifest["tables"]:
+            return None
+
+        key = (self.snapshot_dir, manifest["version"], table)
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        path = os.path.join(self.snapshot_dir, manifest["tables"][table]["file"])
+        try:
+            source = pa.memory_map(path, "r")
+            arrow_table = ipc.open_file(source).read_all()
+        except (OSError, pa.ArrowInvalid) as e:
+            print(f"Error reading snapshot {path}: {e}")
+            return None
+
+        with self._lock:
+            # Drop tables of superseded versions
+            for old_key in [k for k in self._cache if k[0] == self.snapshot_dir and k[2] == table]:
+                del self._cache[old_key]
+            self._cache[key] = arrow_table
+        return arrow_table
+
+    def read_frame(self, table, filters=None, columns=None):
+        """
+        Returns a pandas DataFrame of `table`, or None if the snapshot is missing/stale.
+
+        filters: {column: value} equality filters, applied on the Arrow table
+                 before conversion so only matching rows are materialized.
+        columns: Optional subset of columns to return.
+        """
+        if not self.is_fresh():
+            return None
+        arrow_table = self.load_table(table)
+        if arrow_table is None:
+            return None
+
+        for column, value in (filters or {}).items():
+            arrow_table = arrow_table.filter(pc.equal(arrow_table[column], value))
+        if columns:
+            arrow_table = arrow_table.select(columns)
+        return arrow_table.to_pandas()
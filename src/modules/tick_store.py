@@ -0,0 +1,146 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TICK_STORE_DIR = os.getenv(
+    "TICK_STORE_DIR",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "../../data/ticks"))
+)
+
+TS_DTYPE = np.dtype("<i8")    # UTC nanoseconds since epoch
+VALUE_DTYPE = np.dtype("<f8")
+
+
+class TickStore:
+    # Writers of one process share a lock per symbol (the poller is the only writer)
+    _locks = {}
+    _locks_guard = threading.Lock()
+
+    def __init__(self, root=None):
+        """
+        Append-only intraday series store.
+
+        Each symbol is two flat binary files under `root` (default TICK_STORE_DIR):
+            <symbol>.ts   int64 UTC nanoseconds, strictly increasing
+            <symbol>.val  float64 values, same length
+        Reads memory-map the files and binary-search the timestamps, so a range
+        read is O(log n) and returns views into the mapping without copying.
+        """
+        self.root = root or TICK_STORE_DIR
+        self._maps = {}
+
+    def _paths(self, symbol):
+        base = os.path.join(self.root, symbol)
+        return base + ".ts", base + ".val"
+
+    def _lock(self, symbol):
+        with self._locks_guard:
+            return self._locks.setdefault((self.root, symbol), threading.Lock())
+
+    def symbols(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(f[:-3] for f in os.listdir(self.root) if f.endswith(".ts"))
+
+    def count(self, symbol):
+        """Number of complete ticks (a torn append leaves the files at different lengths)."""
+        ts_path, val_path = self._paths(symbol)
+        if not os.path.exists(ts_path) or not os.path.exists(val_path):
+            return 0
+        return min(os.path.getsize(ts_path) // TS_DTYPE.itemsize,
+                   os.path.getsize(val_path) // VALUE_DTYPE.itemsize)
+
+    def _arrays(self, symbol):
+        """Memory-mapped (timestamps, values), remapped only when the files grew."""
+        n = self.count(symbol)
+        if n == 0:
+            return np.empty(0, TS_DTYPE), np.empty(0, VALUE_DTYPE)
+        cached = self._maps.get(symbol)
+        if cached is not None and cached[0] == n:
+            return cached[1], cached[2]
+        ts_path, val_path = self._paths(symbol)
+        ts = np.memmap(ts_path, dtype=TS_DTYPE, mode="r", shape=(n,))
+        values = np.memmap(val_path, dtype=VALUE_DTYPE, mode="r", shape=(n,))
+        self._maps[symbol] = (n, ts, values)
+        return ts, values
+
+    def last_timestamp(self, symbol):
+        ts, _ = self._arrays(symbol)
+        return pd.Timestamp(int(ts[-1]), tz="UTC") if len(ts) else None
+
+    def append(self, symbol, timestamps, values):
+        """
+        Appends ticks to a symbol's series.
+
+        timestamps: DatetimeIndex / datetime-like array (naive values are taken as UTC).
+        Ticks at or before the last stored timestamp are dropped, so re-polling an
+        overlapping window is idempotent. Returns the number of ticks appended.
+        """
+        ts = pd.DatetimeIndex(timestamps)
+        ts = (ts.tz_localize("UTC") if ts.tz is None else ts.tz_convert("UTC")).as_unit("ns")
+        ts = ts.asi8.astype(TS_DTYPE)
+        values = np.asarray(values, dtype=VALUE_DTYPE)
+        if len(ts) != len(values):
+            raise ValueError(f"{symbol}: {len(ts)} timestamps but {len(values)} values")
+
+        keep = ~np.isnan(values)
+        ts, values = ts[keep], values[keep]
+        order = np.argsort(ts, kind="stable")
+        ts, values = ts[order], values[order]
+        if len(ts):
+            # Keep the last value of duplicate timestamps within the batch
+            last_of_run = np.append(ts[1:] != ts[:-1], True)
+            ts, values = ts[last_of_run], values[last_of_run]
+
+        with self._lock(symbol):
+            os.makedirs(self.root, exist_ok=True)
+            ts_path, val_path = self._paths(symbol)
+            n = self.count(symbol)
+            # Drop the tail of an append that was interrupted between the two files
+            for path, dtype in ((ts_path, TS_DTYPE), (val_path, VALUE_DTYPE)):
+                if os.path.exists(path) and os.path.getsize(path) != n * dtype.itemsize:
+                    os.truncate(path, n * dtype.itemsize)
+
+            if n:
+                last = np.fromfile(ts_path, dtype=TS_DTYPE, count=1, offset=(n - 1) * TS_DTYPE.itemsize)[0]
+                newer = ts > last
+                ts, values = ts[newer], values[newer]
+            if not len(ts):
+                return 0
+
+            # Values first: a tick only becomes visible once its timestamp lands
+            with open(val_path, "ab") as f:
+                f.write(values.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(ts_path, "ab") as f:
+                f.write(ts.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+        return len(ts)
+
+    def read_range(self, symbol, start=None, end=None):
+        """
+        Returns (timestamps, values) for start <= t < end as zero-copy memmap views.
+        Timestamps are int64 UTC nanoseconds; start/end accept anything pd.Timestamp does.
+        """
+        ts, values = self._arrays(symbol)
+        lo = 0 if start is None else int(np.searchsorted(ts, _to_ns(start), side="left"))
+        hi = len(ts) if end is None else int(np.searchsorted(ts, _to_ns(end), side="left"))
+        return ts[lo:hi], values[lo:hi]
+
+    def read_series(self, symbol, start=None, end=None):
+        """Same range as a pandas Series with a UTC DatetimeIndex (copies the slice)."""
+        ts, values = self.read_range(symbol, start, end)
+        index = pd.DatetimeIndex(pd.to_datetime(np.asarray(ts), unit="ns", utc=True), name="date")
+        return pd.Series(np.asarray(values), index=index, name=symbol)
+
+
+def _to_ns(value):
+    stamp = pd.Timestamp(value)
+    stamp = stamp.tz_localize("UTC") if stamp.tz is None else stamp.tz_convert("UTC")
+    return stamp.as_unit("ns").value
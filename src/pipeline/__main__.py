@@ -0,0 +1,107 @@
+"""
+Pipeline CLI.
+
+    python -m src.pipeline run                     # full DAG, independent stages in parallel
+    python -m src.pipeline run --only derive       # rerun one stage (or group, e.g. 'ingest')
+    python -m src.pipeline run --from premium      # a stage plus everything downstream
+    python -m src.pipeline run --force --full      # ignore skip-checks and watermarks
+    python -m src.pipeline list                    # show stages and dependencies
+
+(From inside src/, `python -m pipeline ...` works the same.)
+"""
+import os
+import sys
+import argparse
+
+# Add project root to path to import modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from src.modules.db_connector import DBConnector, optimize_sqlite
+from src.pipeline.dag import Node, DagRunner
+from src.pipeline.sources import get_registered_sources
+
+
+def get_db_connection():
+    return DBConnector().get_connection()
+
+
+def build_pipeline(full=False):
+    """Declares the pipeline stages, their dependencies and input/output tables."""
+    from src.pipeline.ingest import run_ingestion
+    from src.pipeline.derive import run_derivation, run_premium_derivation
+    from src.pipeline.signals import run_signals
+    from src.pipeline.forecast import run_forecasts
+    from src.pipeline.correlation import run_correlations
+
+    nodes = []
+    ingest_nodes = []
+    for name, adapter_cls in get_registered_sources().items():
+        node_name = f"ingest:{name}"
+        nodes.append(Node(
+            node_name,
+            lambda source=name: run_ingestion([source], full=full),
+            outputs=[adapter_cls.table]
+        ))
+        ingest_nodes.append(node_name)
+
+    def publish():
+        from src.modules.snapshot import publish_snapshot
+        conn = get_db_connection()
+        try:
+            optimize_sqlite(conn)
+            publish_snapshot(conn)
+        finally:
+            conn.close()
+
+    def confirm():
+        # Unchanged inputs: keep the current snapshot fresh for readers (publish if there is none)
+        from src.modules.snapshot import confirm_snapshot
+        if confirm_snapshot() is None:
+            publish()
+
+    nodes += [
+        Node("derive", lambda: run_derivation(full=full), deps=ingest_nodes,
+             inputs=["macro_raw"], outputs=["macro_derived"]),
+        Node("premium", lambda: run_premium_derivation(full=full), deps=["derive"],
+             inputs=["macro_derived", "domestic_market_raw"], outputs=["market_premium_derived"]),
+        Node("signals", lambda: run_signals(full=full), deps=["derive"],
+             inputs=["macro_raw", "macro_derived"], outputs=["market_regime", "valuation_zscore"]),
+        Node("correlation", lambda: run_correlations(full=full), deps=ingest_nodes,
+             inputs=["macro_raw"], outputs=["market_correlation_derived"]),
+        Node("forecast", lambda: run_forecasts(force=full), deps=["derive"],
+             inputs=["macro_derived"], outputs=["macro_forecast"]),
+        Node("snapshot", publish, deps=["premium"],
+             inputs=["macro_raw", "macro_derived", "market_premium_derived"], on_skip=confirm)
+    ]
+    return nodes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.pipeline", description="Data pipeline runner.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Run the pipeline DAG.")
+    run.add_argument("--only", action="append", metavar="STAGE",
+                     help="Run only this stage or group (repeatable), ignoring dependencies.")
+    run.add_argument("--from", dest="start_from", action="append", metavar="STAGE",
+                     help="Run this stage and everything downstream of it (repeatable).")
+    run.add_argument("--force", action="store_true", help="Run stages even if their inputs are unchanged.")
+    run.add_argument("--full", action="store_true", help="Full backfill / rebuild instead of incremental runs.")
+    run.add_argument("--workers", type=int, default=4, help="Maximum stages running at the same time.")
+
+    sub.add_parser("list", help="List stages and their dependencies.")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for node in build_pipeline():
+            deps = ", ".join(node.deps) or "-"
+            print(f"{node.name:<20} deps: {deps:<50} inputs: {', '.join(node.inputs) or '-'}")
+        return 0
+
+    runner = DagRunner(build_pipeline(full=args.full), get_db_connection, max_workers=args.workers)
+    status = runner.run(only=args.only, start_from=args.start_from, force=args.force or args.full)
+    return 1 if any(s.startswith(("failed", "blocked")) for s in status.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
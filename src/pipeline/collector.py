@@ -2,13 +2,32 @@ import yfinance as yf
 from fredapi import Fred
 import pandas as pd
 import os
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Upper bound on parallel quote requests when the provider cannot batch them
+MAX_QUOTE_WORKERS = 8
+
+class YFinanceProvider:
+    """
+    Default market data provider backed by yfinance.
+    Any object with the same two methods can be injected into MarketDataCollector
+    (e.g. a provider replaying a recorded local fixture in tests).
+    """
+    def download(self, tickers, **kwargs):
+        """Downloads OHLCV history for a list of tickers in a single request."""
+        return yf.download(tickers, progress=False, group_by="column", threads=True, **kwargs)
+
+    def last_price(self, ticker):
+        """Returns the latest traded price of one ticker."""
+        # fast_info is often faster for current price
+        return yf.Ticker(ticker).fast_info['last_price']
+
 class MarketDataCollector:
-    def __init__(self):
+    def __init__(self, provider=None):
         self.tickers = {
             "Gold": "GC=F",
             "Silver": "SI=F",
@@ -17,62 +36,109 @@ class MarketDataCollector:
             "S&P 500": "^GSPC",
             "KOSPI": "^KS11"
         }
+        self.provider = provider or YFinanceProvider()
 
     def fetch_current_prices(self):
         """Fetches the latest available price for all tracked assets."""
-        data = {}
-        for name, ticker in self.tickers.items():
+        def fetch_one(item):
+            name, ticker = item
             try:
-                ticker_obj = yf.Ticker(ticker)
-                # fast_info is often faster for current price
-                price = ticker_obj.fast_info['last_price']
-                data[name] = price
+                return name, self.provider.last_price(ticker)
             except Exception as e:
                 print(f"Error fetching {name}: {e}")
-                data[name] = None
-        return data
+                return name, None
+
+        # Quotes have no batch endpoint, so fan out over a bounded thread pool
+        workers = max(1, min(MAX_QUOTE_WORKERS, len(self.tickers)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = dict(executor.map(fetch_one, self.tickers.items()))
+
+        return {name: results.get(name) for name in self.tickers}
 
-    def fetch_historical_data(self, period="1y"):
-        """Fetches historical data for all assets."""
-        data_frames = {}
-        for name, ticker in self.tickers.items():
+    def _extract_close(self, df, tickers):
+        """
+        Normalises a yfinance download into one 'Close' column per ticker.
+        Handles both MultiIndex layouts ((Price, Ticker) and (Ticker, Price))
+        and the flat single-ticker layout.
+        """
+        if df is None or df.empty:
+            return pd.DataFrame()
+
+        if isinstance(df.columns, pd.MultiIndex):
+            for level in range(df.columns.nlevels):
+                if 'Close' in df.columns.get_level_values(level):
+                    return df.xs('Close', axis=1, level=level)
+            return pd.DataFrame()
+
+        if 'Close' in df.columns and len(tickers) == 1:
+            return df[['Close']].set_axis(tickers, axis=1)
+        return pd.DataFrame()
+
+    def fetch_historical_data(self, period="1y", start=None, end=None):
+        """
+        Fetches historical Close prices for all assets.
+
+        start: Optional start date (str/datetime) applied to every asset, or a dict
+               {name: start} for per-asset starts. Assets without a start (None) fall
+               back to the full `period` download.
+        end: Optional exclusive end date for dated downloads.
+
+        Assets sharing the same start are downloaded in one batched request.
+        """
+        # Group assets by their start so each distinct window is a single request
+        groups = {}
+        for name in self.tickers:
+            ticker_start = start.get(name) if isinstance(start, dict) else start
+            groups.setdefault(ticker_start, []).append(name)
+
+        names_by_ticker = {ticker: name for name, ticker in self.tickers.items()}
+        frames = []
+        for group_start, names in groups.items():
+            tickers = [self.tickers[name] for name in names]
             try:
-                df = yf.download(ticker, period=period, progress=False)
-                # Keep only Close prices for simplicity
-                if not df.empty:
-                    # Access 'Close' safely. 
-                    # If MultiIndex (Price, Ticker), we might need to handle it.
-                    if isinstance(df.columns, pd.MultiIndex):
-                        # Try to get 'Close' level
-                        try:
-                            df = df['Close']
-                        except KeyError:
-                            pass
-                    elif 'Close' in df.columns:
-                        df = df[['Close']]
-                        
-                    # Now df should be singular or contain the data we want.
-                    # If it's still a DataFrame with columns (e.g. tickers), take the first one?
-                    # Or just rename whatever is there.
-                    
-                    # Force rename of the column to the friendly name
-                    # If df is a Series, to_frame it
-                    if isinstance(df, pd.Series):
-                        df = df.to_frame()
-                    
-                    # If it has multiple columns (rare for single ticker download unless OHLCV), take the first one or specific
-                    if df.shape[1] >= 1:
-                        df = df.iloc[:, [0]] # Take first column (usually Close if we filtered)
-                        df.columns = [name]
-                        data_frames[name] = df
+                if group_start is not None:
+                    raw = self.provider.download(tickers, start=group_start, end=end)
+                else:
+                    raw = self.provider.download(tickers, period=period)
+                closes = self._extract_close(raw, tickers)
+                if not closes.empty:
+                    frames.append(closes)
             except Exception as e:
-                print(f"Error fetching history for {name}: {e}")
-        
-        # Merge all into one DataFrame
-        if data_frames:
-            combined_df = pd.concat(data_frames.values(), axis=1)
-            return combined_df
-        return pd.DataFrame()
+                print(f"Error fetching history for {', '.join(names)}: {e}")
+
+        if not frames:
+            return pd.DataFrame()
+
+        # Merge all into one DataFrame keyed by the friendly names, in tracking order
+        combined_df = pd.concat(frames, axis=1).rename(columns=names_by_ticker)
+        combined_df.columns.name = None
+        ordered = [name for name in self.tickers if name in combined_df.columns]
+        return combined_df[ordered].dropna(how='all')
+
+    def fetch_intraday(self, names=None, interval="1m", period="1d"):
+        """
+        Fetches recent intraday bars (Close per bar) for `names` (default: all assets).
+        yfinance keeps about 7 days of 1m bars, so pollers must run at least that often.
+        Returns a DataFrame indexed by bar time (UTC) with one column per asset.
+        """
+        names = [name for name in (names or self.tickers) if name in self.tickers]
+        if not names:
+            return pd.DataFrame()
+        tickers = [self.tickers[name] for name in names]
+        try:
+            raw = self.provider.download(tickers, period=period, interval=interval)
+        except Exception as e:
+            print(f"Error fetching intraday bars for {', '.join(names)}: {e}")
+            return pd.DataFrame()
+
+        closes = self._extract_close(raw, tickers)
+        if closes.empty:
+            return closes
+        closes = closes.rename(columns={ticker: name for name, ticker in self.tickers.items()})
+        closes.columns.name = None
+        index = pd.DatetimeIndex(closes.index)
+        closes.index = index.tz_localize("UTC") if index.tz is None else index.tz_convert("UTC")
+        return closes[[name for name in names if name in closes.columns]]
 
 class FredDataCollector:
     def __init__(self):
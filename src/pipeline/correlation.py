@@ -0,0 +1,151 @@
+import os
+import sys
+import sqlite3
+import argparse
+import pandas as pd
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from src.modules.batch_writer import BatchWriter
+from src.modules.db_connector import DBConnector, sql_placeholder
+from src.modules.repository import TimeSeriesRepository, RAW_SYMBOLS, CORRELATION_TABLE
+from src.pipeline.watermarks import get_watermark, set_watermark, get_max_created_at, get_dirty_date_range
+from src.analysis.correlation import CORRELATION_WINDOWS, correlation_frames
+
+# Rolling correlations (metric 'CORR', each pair once in RAW_SYMBOLS order) and
+# annualized volatilities (metric 'VOL', symbol_b = symbol_a) of the tracked assets.
+# Mirrors market_correlation_derived in schema.sql.
+SQLITE_DDL = """
+CREATE TABLE IF NOT EXISTS market_correlation_derived (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT,
+    window_size INTEGER,
+    metric TEXT,
+    symbol_a TEXT,
+    symbol_b TEXT,
+    value REAL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(date, window_size, metric, symbol_a, symbol_b)
+);
+"""
+
+MYSQL_DDL = """
+CREATE TABLE IF NOT EXISTS market_correlation_derived (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    date DATE NOT NULL,
+    window_size INT NOT NULL,
+    metric VARCHAR(10) NOT NULL,
+    symbol_a VARCHAR(50) NOT NULL,
+    symbol_b VARCHAR(50) NOT NULL,
+    value DOUBLE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY unique_correlation_entry (date, window_size, metric, symbol_a, symbol_b)
+)
+"""
+
+
+def ensure_correlation_table(conn):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(SQLITE_DDL if isinstance(conn, sqlite3.Connection) else MYSQL_DDL)
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def lookback_days(window):
+    """Calendar days reloaded before the last stored date to refill a `window`-row window."""
+    return window * 2 + 10
+
+
+def correlation_stage(window):
+    """Watermark key (pipeline_watermarks.stage) of one correlation window."""
+    return f"correlation:{int(window)}d"
+
+
+def run_correlation(window=30, full=False):
+    """
+    Rolling correlations and volatilities of every tracked asset (RAW_SYMBOLS)
+    for one window, upserted into market_correlation_derived.
+
+    Incremental by default: every date from the earliest raw row written since
+    the last successful run (created_at > watermark) onwards is recomputed, so
+    rows first derived from forward-filled prices (e.g. KRW / KOSPI closes in
+    before the US markets) are rewritten once the late prices arrive. They are
+    computed from a reload of the preceding window, so incremental and full runs
+    agree. full=True (or no watermark yet) rebuilds the whole history.
+    Returns the number of rows written.
+    """
+    connector = DBConnector()
+    conn = connector.get_connection()
+    ensure_correlation_table(conn)
+    ph = sql_placeholder(conn)
+
+    names = list(RAW_SYMBOLS)
+    symbol_filter = f"WHERE symbol IN ({', '.join([ph] * len(names))})"
+    symbol_params = tuple(RAW_SYMBOLS[name] for name in names)
+    stage = correlation_stage(window)
+
+    # Read the new watermark before the data, so rows landing mid-run are picked up next time
+    new_watermark = get_max_created_at(conn, "macro_raw", symbol_filter, symbol_params)
+    watermark = None if full else get_watermark(conn, stage)
+
+    recompute_from = None
+    if watermark:
+        dirty = get_dirty_date_range(conn, "macro_raw", watermark, symbol_filter, symbol_params)
+        if dirty is None:
+            print(f"Correlation ({window}d): no raw changes since {watermark}.")
+            conn.close()
+            return 0
+        recompute_from = pd.to_datetime(dirty[0], format='ISO8601').normalize()
+
+    start = recompute_from - pd.Timedelta(days=lookback_days(window)) if recompute_from is not None else None
+    prices = TimeSeriesRepository(connector).get_panel(names, start=start)
+    prices = prices.rename(columns=RAW_SYMBOLS).dropna(axis=1, how='all')
+
+    corr, vol = correlation_frames(prices, window)
+    if recompute_from is not None:
+        corr = corr[corr['date'] >= recompute_from]
+        vol = vol[vol['date'] >= recompute_from]
+    if corr.empty and vol.empty:
+        print(f"Correlation ({window}d): no complete windows to write.")
+        set_watermark(conn, stage, new_watermark)
+        conn.close()
+        return 0
+
+    frame = pd.concat([
+        corr.assign(metric="CORR"),
+        vol.rename(columns={'symbol': 'symbol_a'}).assign(symbol_b=lambda df: df['symbol_a'], metric="VOL")
+    ], ignore_index=True)
+    frame = pd.DataFrame({
+        'date': pd.to_datetime(frame['date']).dt.strftime('%Y-%m-%d'),
+        'window_size': int(window),
+        'metric': frame['metric'],
+        'symbol_a': frame['symbol_a'],
+        'symbol_b': frame['symbol_b'],
+        'value': frame['value'].astype(float)
+    })
+    writer = BatchWriter(conn)
+    written = writer.upsert_frame(CORRELATION_TABLE, frame, update_columns=["value"])
+    if not writer.errors:
+        set_watermark(conn, stage, new_watermark)
+    conn.close()
+    print(f"Correlation ({window}d): {written} rows for {frame['date'].nunique()} date(s) "
+          f"({frame['date'].min()} ~ {frame['date'].max()}), {prices.shape[1]} assets")
+    return written
+
+
+def run_correlations(full=False):
+    """Runs run_correlation for every window in CORRELATION_WINDOWS."""
+    print("Starting Correlation / Volatility Derivation...")
+    return sum(run_correlation(window, full=full) for window in CORRELATION_WINDOWS)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Derive rolling correlations and volatilities of the tracked assets.")
+    parser.add_argument("--full", action="store_true", help="Recompute the whole history.")
+    parser.add_argument("--window", type=int, action="append", help="Window in trading days (repeatable, default CORRELATION_WINDOWS).")
+    args = parser.parse_args()
+
+    for w in args.window or CORRELATION_WINDOWS:
+        run_correlation(w, full=args.full)
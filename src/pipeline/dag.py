@@ -0,0 +1,170 @@
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from src.pipeline.watermarks import get_watermark, set_watermark
+
+
+class Node:
+    def __init__(self, name, func, deps=None, inputs=None, outputs=None, on_skip=None):
+        """
+        One pipeline stage.
+
+        name: Unique stage name ('derive', 'ingest:fred', ...).
+        func: Callable run with no arguments.
+        deps: Names of stages that must finish first.
+        inputs: Tables the stage reads. When none of them changed since the stage's
+                last successful run, it is skipped. Stages without inputs
+                (external sources) always run.
+        outputs: Tables the stage writes (documentation / --from planning).
+        on_skip: Optional callable run instead of func when the stage is skipped.
+        """
+        self.name = name
+        self.func = func
+        self.deps = list(deps or [])
+        self.inputs = list(inputs or [])
+        self.outputs = list(outputs or [])
+        self.on_skip = on_skip
+
+    @property
+    def group(self):
+        return self.name.split(":")[0]
+
+
+def table_fingerprint(conn, tables):
+    """Cheap change detector: row count and latest created_at of every input table."""
+    parts = []
+    cursor = conn.cursor()
+    try:
+        for table in sorted(tables):
+            cursor.execute(f"SELECT COUNT(*), MAX(created_at) FROM {table}")
+            count, latest = cursor.fetchone()
+            parts.append(f"{table}:{count}:{latest}")
+    finally:
+        cursor.close()
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+
+class DagRunner:
+    def __init__(self, nodes, get_connection, max_workers=4):
+        """
+        Runs stages in dependency order, independent stages concurrently.
+
+        get_connection: Callable returning a DB connection (fingerprints/state).
+        """
+        self.nodes = {node.name: node for node in nodes}
+        self.get_connection = get_connection
+        self.max_workers = max_workers
+        self._state_lock = threading.Lock()
+        for node in nodes:
+            for dep in node.deps:
+                if dep not in self.nodes:
+                    raise ValueError(f"Stage '{node.name}' depends on unknown stage '{dep}'")
+
+    def resolve(self, names):
+        """Expands stage names or groups ('ingest' -> every 'ingest:*' stage)."""
+        selected = []
+        for name in names:
+            matches = [n for n in self.nodes if n == name or self.nodes[n].group == name]
+            if not matches:
+                raise ValueError(f"Unknown stage '{name}'. Available: {', '.join(self.nodes)}")
+            selected.extend(m for m in matches if m not in selected)
+        return selected
+
+    def downstream(self, names):
+        """The given stages plus everything that (transitively) depends on them."""
+        selected = set(names)
+        changed = True
+        while changed:
+            changed = False
+            for node in self.nodes.values():
+                if node.name not in selected and selected.intersection(node.deps):
+                    selected.add(node.name)
+                    changed = True
+        return [n for n in self.nodes if n in selected]
+
+    def _fingerprint(self, node):
+        if not node.inputs:
+            return None
+        conn = self.get_connection()
+        try:
+            return table_fingerprint(conn, node.inputs)
+        finally:
+            conn.close()
+
+    def _run_node(self, node, force):
+        fingerprint = self._fingerprint(node)
+        state_key = f"dag:{node.name}"
+        if fingerprint and not force:
+            conn = self.get_connection()
+            try:
+                previous = get_watermark(conn, state_key)
+            finally:
+                conn.close()
+            if previous == fingerprint:
+                if node.on_skip:
+                    node.on_skip()
+                return "skipped (inputs unchanged)"
+
+        node.func()
+
+        if fingerprint:
+            # Store the fingerprint taken before the run: changes made meanwhile rerun the stage next time
+            with self._state_lock:
+                conn = self.get_connection()
+                try:
+                    set_watermark(conn, state_key, fingerprint)
+                finally:
+                    conn.close()
+        return "done"
+
+    def run(self, only=None, start_from=None, force=False):
+        """
+        Runs the pipeline.
+
+        only: Stage names/groups to run, ignoring their dependencies (cheap reruns).
+        start_from: Stage names/groups to run together with everything downstream.
+        force: Run stages even if their inputs are unchanged.
+        Returns {stage: status}.
+        """
+        if only:
+            selected = self.resolve(only)
+        elif start_from:
+            selected = self.downstream(self.resolve(start_from))
+        else:
+            selected = list(self.nodes)
+
+        status = {}
+        pending = {name: [d for d in self.nodes[name].deps if d in selected] for name in selected}
+        started = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            running = {}
+            while pending or running:
+                # Stages whose dependencies failed cannot run
+                for name in [n for n, deps in pending.items() if any(status.get(d, "").startswith(("failed", "blocked")) for d in deps)]:
+                    status[name] = "blocked (upstream failed)"
+                    print(f"⏭️  [{name}] {status[name]}")
+                    del pending[name]
+
+                ready = [n for n, deps in pending.items() if all(d in status for d in deps)]
+                for name in ready:
+                    del pending[name]
+                    print(f"▶️  [{name}] starting")
+                    running[executor.submit(self._run_node, self.nodes[name], force)] = (name, time.monotonic())
+
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, node_started = running.pop(future)
+                    try:
+                        status[name] = future.result()
+                    except Exception as e:
+                        status[name] = f"failed ({e})"
+                    print(f"{'❌' if status[name].startswith('failed') else '✅'} [{name}] {status[name]} "
+                          f"in {time.monotonic() - node_started:.1f}s")
+
+        print(f"Pipeline finished in {time.monotonic() - started:.1f}s")
+        return status
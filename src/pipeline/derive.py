@@ -1,13 +1,17 @@
 import os
 import sys
+import argparse
 import pandas as pd
-import mysql.connector
-import sqlite3
 from dotenv import load_dotenv
 
 # Add parent directory to path to import modules
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 from src.modules.converter import get_gold_don_price_krw
+from src.modules.batch_writer import BatchWriter
+from src.modules.db_connector import DBConnector, sql_placeholder, optimize_sqlite
+from src.modules.repository import TimeSeriesRepository
+from src.pipeline.watermarks import get_watermark, set_watermark, get_max_created_at, get_dirty_date_range
+from src.pipeline.streaming import iter_sql_chunks, iter_date_windows, ThroughputMeter
 
 load_dotenv()
 
@@ -20,150 +24,229 @@ env_port = os.getenv("DB_PORT")
 DB_PORT = int(env_port) if env_port and env_port.strip() else 3306 
 # exeption port number 3306 pipline error
 
+# Watermark keys (pipeline_watermarks.stage) of the incremental derive stages
+DERIVE_STAGE = "derive:GOLD_KRW_DON"
+PREMIUM_STAGE = "derive:premium"
+
+# How stale the matched theoretical price may be (covers weekends and holidays)
+PREMIUM_ASOF_TOLERANCE_DAYS = float(os.getenv("PREMIUM_ASOF_TOLERANCE_DAYS", "4"))
+
 def get_db_connection():
-    from src.modules.db_connector import DBConnector
     connector = DBConnector()
     return connector.get_connection()
 
-def run_derivation():
-    print("Starting Metric Derivation (Raw -> Derived)...")
+def derive_gold_don_chunk(df):
+    """
+    Turns one window of long raw rows (date, symbol, value) into macro_derived rows.
+    Every date of the window must be complete (see iter_date_windows).
+    """
+    # Pivot to have columns: date, GOLD_USD_OZ, USDKRW
+    df_pivot = df.pivot(index='date', columns='symbol', values='value')
+    if not {'GOLD_USD_OZ', 'USDKRW'}.issubset(df_pivot.columns):
+        return None
+    df_pivot = df_pivot[['GOLD_USD_OZ', 'USDKRW']].dropna()
+    
+    # MySQL returns DECIMAL columns as Decimal objects
+    df_pivot = df_pivot.astype(float)
+    
+    # Ensure index is datetime (SQLite returns str)
+    df_pivot.index = pd.to_datetime(df_pivot.index)
+    
+    # Calculate Gold 1 Don (KRW) for every date in one vectorized expression
+    gold_don_krw = get_gold_don_price_krw(df_pivot['GOLD_USD_OZ'], df_pivot['USDKRW'])
+    gold_don_krw = gold_don_krw[gold_don_krw > 0]
+    
+    return pd.DataFrame({
+        'date': gold_don_krw.index.strftime('%Y-%m-%d %H:%M:%S'),
+        'metric': "GOLD_KRW_DON",
+        'value': gold_don_krw.to_numpy(dtype=float),
+        'calculation_version': "v1.0"
+    })
+
+def run_derivation(full=False, chunk_rows=None):
+    """
+    Derives GOLD_KRW_DON from macro_raw.
+
+    Incremental by default: only the date range whose raw rows were written since
+    the last successful run (created_at > watermark) is recomputed.
+    full=True rebuilds the whole history.
+
+    Raw rows are streamed in date order, `chunk_rows` at a time (DERIVE_CHUNK_ROWS),
+    and each date window is pivoted, derived and written before the next one is
+    read, so memory is bounded by the chunk size rather than the history length.
+    """
+    print(f"Starting Metric Derivation (Raw -> Derived, {'full' if full else 'incremental'})...")
     conn = get_db_connection()
+    ph = sql_placeholder(conn)
     
     # 1. Load Raw Data (Gold USD and USD/KRW)
     # Pivot logic: We need dates where we have BOTH Gold and Exchange Rate
-    query = """
+    symbol_filter = f"WHERE symbol IN ({ph}, {ph})"
+    symbol_params = ('GOLD_USD_OZ', 'USDKRW')
+    
+    # Read the new watermark before the data, so rows landing mid-run are picked up next time
+    new_watermark = get_max_created_at(conn, "macro_raw", symbol_filter, symbol_params)
+    watermark = None if full else get_watermark(conn, DERIVE_STAGE)
+    
+    query = f"""
     SELECT date, symbol, value 
     FROM macro_raw 
-    WHERE symbol IN ('GOLD_USD_OZ', 'USDKRW')
+    {symbol_filter}
     """
+    params = symbol_params
     
-    df = pd.read_sql(query, conn)
+    if watermark:
+        dirty = get_dirty_date_range(conn, "macro_raw", watermark, symbol_filter, symbol_params)
+        if dirty is None:
+            print(f"No raw changes since {watermark}. Nothing to derive.")
+            conn.close()
+            return
+        print(f"Recomputing dirty range {dirty[0]} ~ {dirty[1]}")
+        query += f" AND date >= {ph} AND date <= {ph}"
+        params = symbol_params + tuple(dirty)
     
-    if df.empty:
-        print("No raw data found to derive metrics from.")
-        conn.close()
-        return
-
-    # Pivot to have columns: date, GOLD_USD_OZ, USDKRW
-    df_pivot = df.pivot(index='date', columns='symbol', values='value').dropna()
-    
-    # Ensure index is datetime (SQLite returns str)
-    df_pivot.index = pd.to_datetime(df_pivot.index)
+    # Date order lets iter_date_windows hand over complete dates only
+    query += " ORDER BY date, symbol"
     
+    # A streaming MySQL cursor keeps its connection busy, so writes go through a second one.
+    # On SQLite both are this thread's shared connection, which can commit while the read cursor is open.
+    write_conn = get_db_connection()
+    writer = BatchWriter(write_conn)
+    meter = ThroughputMeter("derive GOLD_KRW_DON")
     derived_count = 0
-    cursor = conn.cursor()
     
-    is_sqlite = isinstance(conn, sqlite3.Connection) if 'sqlite3' in sys.modules else False
+    for window in iter_date_windows(iter_sql_chunks(conn, query, params, chunk_rows)):
+        derived = derive_gold_don_chunk(window)
+        written = writer.upsert_frame("macro_derived", derived, update_columns=["value"])
+        derived_count += written
+        meter.tick(len(window), written, f"[{window['date'].iloc[0]} ~ {window['date'].iloc[-1]}]")
     
-    for date, row in df_pivot.iterrows():
-        gold_oz = row.get('GOLD_USD_OZ')
-        usdkrw = row.get('USDKRW')
-        
-        # Calculate Gold 1 Don (KRW)
-        gold_don_krw = get_gold_don_price_krw(gold_oz, usdkrw)
-        
-        if gold_don_krw:
-            date_str = date.strftime('%Y-%m-%d %H:%M:%S')
-            metric_name = "GOLD_KRW_DON"
-            
-            if is_sqlite:
-                sql = """
-                INSERT OR REPLACE INTO macro_derived (date, metric, value, calculation_version)
-                VALUES (?, ?, ?, ?)
-                """
-                val = (str(date_str), metric_name, float(gold_don_krw), "v1.0")
-            else:
-                sql = """
-                INSERT INTO macro_derived (date, metric, value, calculation_version)
-                VALUES (%s, %s, %s, %s)
-                ON DUPLICATE KEY UPDATE value = VALUES(value)
-                """
-                val = (date_str, metric_name, float(gold_don_krw), "v1.0")
-            
-            try:
-                cursor.execute(sql, val)
-                derived_count += 1
-            except mysql.connector.Error as err:
-                print(f"Error inserting derived metric at {date_str}: {err}")
-            except sqlite3.Error as err:
-                print(f"Error inserting derived metric at {date_str}: {err}")
-
-    conn.commit()
-    cursor.close()
+    if meter.chunks == 0:
+        print("No raw data found to derive metrics from.")
+    else:
+        meter.summary()
+    
+    if not writer.errors:
+        set_watermark(write_conn, DERIVE_STAGE, new_watermark)
+    write_conn.close()
     conn.close()
     print(f"Derivation Complete. {derived_count} metrics (Gold Don KRW) calculated and stored.")
 
-def run_premium_derivation():
-    print("Starting Premium Analysis (Theoretical vs Domestic)...")
+def run_premium_derivation(full=False, tolerance_days=None):
+    """
+    Compares theoretical (GOLD_KRW_DON) and domestic (BUYing) prices.
+
+    Each domestic quote is matched to the most recent theoretical price at or before
+    it (as-of join), within `tolerance_days` (PREMIUM_ASOF_TOLERANCE_DAYS, default 4).
+
+    Incremental by default: only days touched by new derived or domestic rows since
+    the last successful run are recomputed. full=True rebuilds everything.
+    """
+    print(f"Starting Premium Analysis (Theoretical vs Domestic, {'full' if full else 'incremental'})...")
     # Import inside function or ensure path is present
     from src.analysis.premium import PremiumCalculator
     
+    tolerance = pd.Timedelta(days=tolerance_days if tolerance_days is not None else PREMIUM_ASOF_TOLERANCE_DAYS)
+    
     conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Join macro_derived (Theoretical) and domestic_market_raw (Physical)
-    # matching on Date (roughly). Since domestic might be daily and derived might be daily, we join on DATE(date).
-    # Note: timestamp mismatch handling requires Date casting.
-    
-    query = """
-    SELECT 
-        DATE(t1.date) as date,
-        t1.value as theoretical,
-        t2.value as physical
-    FROM macro_derived t1
-    JOIN domestic_market_raw t2 ON DATE(t1.date) = DATE(t2.date)
-    WHERE t1.metric = 'GOLD_KRW_DON' AND t2.price_type = 'BUYing'
-    """
+    ph = sql_placeholder(conn)
+    
+    derived_filter, derived_params = f"WHERE metric = {ph}", ('GOLD_KRW_DON',)
+    domestic_filter, domestic_params = f"WHERE price_type = {ph}", ('BUYing',)
+    marks = [
+        get_max_created_at(conn, "macro_derived", derived_filter, derived_params),
+        get_max_created_at(conn, "domestic_market_raw", domestic_filter, domestic_params)
+    ]
+    new_watermark = max([m for m in marks if m], default=None)
+    watermark = None if full else get_watermark(conn, PREMIUM_STAGE)
+    
+    # 1. Domestic quotes to (re)analyse. The repository pushes the day range down as
+    #    plain predicates on (price_type, date), so the index is used.
+    repository = TimeSeriesRepository(DBConnector())
+    start = end = None
+    
+    if watermark:
+        ranges = []
+        domestic_dirty = get_dirty_date_range(conn, "domestic_market_raw", watermark, domestic_filter, domestic_params)
+        if domestic_dirty:
+            ranges.append((pd.to_datetime(domestic_dirty[0]), pd.to_datetime(domestic_dirty[1])))
+        derived_dirty = get_dirty_date_range(conn, "macro_derived", watermark, derived_filter, derived_params)
+        if derived_dirty:
+            # A changed theoretical price affects quotes up to `tolerance` after it
+            ranges.append((pd.to_datetime(derived_dirty[0]), pd.to_datetime(derived_dirty[1]) + tolerance))
+        if not ranges:
+            print(f"No derived/domestic changes since {watermark}. Nothing to analyse.")
+            conn.close()
+            return
+        # Whole days, since premiums are stored per day
+        start = min(r[0] for r in ranges).normalize()
+        end = max(r[1] for r in ranges).normalize()
+        print(f"Recomputing dirty range {start.date()} ~ {end.date()}")
     
-    df = pd.read_sql(query, conn)
+    domestic = repository.get_series(domestic_params, start, end, source="domestic_market_raw")
     
-    if df.empty:
-        print("No matching data found for Premium Calculation.")
-        # Setup mock derived data if missing, for the sake of the demo flow, 
-        # or simply return.
-        pass
+    if domestic.empty:
+        print("No domestic quotes found for Premium Calculation.")
+        conn.close()
+        return
+    
+    domestic = domestic[['date', 'value']].rename(columns={'value': 'physical'}).sort_values('date')
+    
+    # 2. Theoretical prices covering the quotes (plus the as-of tolerance before the first one)
+    theoretical = repository.get_series(
+        derived_params, domestic['date'].min() - tolerance, domestic['date'].max(), source="macro_derived"
+    )
+    theoretical = theoretical[['date', 'value']].rename(columns={'value': 'theoretical'}).sort_values('date')
+    
+    # 3. As-of join: each domestic quote gets the most recent theoretical price at or
+    #    before it, as long as it is no older than `tolerance` (weekends, holidays).
+    df = pd.merge_asof(domestic, theoretical, on='date', direction='backward', tolerance=tolerance)
+    unmatched = int(df['theoretical'].isna().sum())
+    if unmatched:
+        print(f"{unmatched} domestic quote(s) have no theoretical price within {tolerance}. Skipped.")
+    df = df.dropna(subset=['theoretical'])
+    
+    # Premiums are stored per day: keep the last quote of each day
+    df['date'] = df['date'].dt.strftime('%Y-%m-%d')
+    df = df.drop_duplicates(subset='date', keep='last')
 
     calculator = PremiumCalculator()
-    inserted_count = 0
-    is_sqlite = isinstance(conn, sqlite3.Connection) if 'sqlite3' in sys.modules else False
+    rows = []
     
-    for _, row in df.iterrows():
-        theo = row['theoretical']
-        phys = row['physical']
-        date_str = str(row['date'])
-        
+    for date_str, phys, theo in df[['date', 'physical', 'theoretical']].itertuples(index=False, name=None):
         result = calculator.calculate_premium(phys, theo)
         
         if result:
-            if is_sqlite:
-                sql = """
-                INSERT OR REPLACE INTO market_premium_derived 
-                (date, theoretical_price, physical_price, premium_amount, premium_rate)
-                VALUES (?, ?, ?, ?, ?)
-                """
-                val = (date_str, float(theo), float(phys), float(result['amount']), float(result['rate']))
-            else:
-                sql = """
-                INSERT INTO market_premium_derived 
-                (date, theoretical_price, physical_price, premium_amount, premium_rate)
-                VALUES (%s, %s, %s, %s, %s)
-                ON DUPLICATE KEY UPDATE premium_rate = VALUES(premium_rate)
-                """
-                val = (date_str, float(theo), float(phys), float(result['amount']), float(result['rate']))
-            
-            try:
-                cursor.execute(sql, val)
-                inserted_count += 1
-            except mysql.connector.Error as err:
-                print(f"Error inserting premium for {date_str}: {err}")
-            except sqlite3.Error as err:
-                print(f"Error inserting premium for {date_str}: {err}")
-
-    conn.commit()
-    cursor.close()
+            rows.append((date_str, float(theo), float(phys), float(result['amount']), float(result['rate'])))
+
+    writer = BatchWriter(conn)
+    inserted_count = writer.upsert(
+        "market_premium_derived",
+        ["date", "theoretical_price", "physical_price", "premium_amount", "premium_rate"],
+        rows,
+        update_columns=["theoretical_price", "physical_price", "premium_amount", "premium_rate"]
+    )
+    if not writer.errors:
+        set_watermark(conn, PREMIUM_STAGE, new_watermark)
     conn.close()
     print(f"Premium Derivation Complete. {inserted_count} records analysed.")
 
 if __name__ == "__main__":
-    run_derivation()
-    run_premium_derivation()
+    parser = argparse.ArgumentParser(description="Derive business metrics from raw data.")
+    parser.add_argument("--full", action="store_true",
+                        help="Ignore watermarks and recompute the complete history.")
+    parser.add_argument("--chunk-rows", type=int, default=None,
+                        help="Raw rows read per chunk (default DERIVE_CHUNK_ROWS).")
+    args = parser.parse_args()
+
+    run_derivation(full=args.full, chunk_rows=args.chunk_rows)
+    run_premium_derivation(full=args.full)
+
+    # Keep SQLite planner statistics fresh after the nightly writes
+    conn = get_db_connection()
+    optimize_sqlite(conn)
+
+    # Publish the columnar snapshot the dashboard reads instead of the live DB
+    from src.modules.snapshot import publish_snapshot
+    publish_snapshot(conn)
+    conn.close()
@@ -0,0 +1,118 @@
+import os
+import sys
+import time
+import argparse
+import pandas as pd
+from dotenv import load_dotenv
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from src.modules.batch_writer import BatchWriter
+from src.modules.db_connector import DBConnector, sql_placeholder
+from src.modules.forecast_store import (
+    FORECAST_TABLE, FORECAST_COLUMNS, ensure_forecast_table, data_fingerprint,
+    forecast_exists, delete_other_forecasts, model_path
+)
+
+load_dotenv()
+
+# metric -> forecast horizons (days) precomputed for the dashboard
+FORECAST_TARGETS = {
+    "GOLD_KRW_DON": [30]
+}
+
+
+def get_db_connection():
+    return DBConnector().get_connection()
+
+
+def load_history(conn, metric):
+    """Training series of one macro_derived metric as (date, value)."""
+    df = pd.read_sql(
+        f"SELECT date, value FROM macro_derived WHERE metric = {sql_placeholder(conn)} ORDER BY date ASC",
+        conn,
+        params=(metric,)
+    )
+    df['date'] = pd.to_datetime(df['date'], format='ISO8601')
+    df['value'] = df['value'].astype(float)
+    return df
+
+
+def run_forecast(metric="GOLD_KRW_DON", horizon=30, force=False, engine=None):
+    """
+    Fits GoldPredictor (engine default FORECAST_ENGINE) on `metric` and stores its
+    forecast in macro_forecast.
+
+    Skipped when a forecast for the same training data (fingerprint) already
+    exists, unless force=True. The fitted model is serialized next to it
+    (FORECAST_MODEL_DIR). Returns the number of rows written.
+    """
+    from src.analysis.predictor import GoldPredictor
+
+    conn = get_db_connection()
+    ensure_forecast_table(conn)
+    history = load_history(conn, metric)
+    if len(history) <= 30:
+        print(f"{metric}: insufficient history ({len(history)} rows) for a {horizon}-day forecast.")
+        conn.close()
+        return 0
+
+    predictor = GoldPredictor(history, engine=engine, metric=metric)
+    fingerprint = data_fingerprint(history, config=f"{predictor.config}:h{horizon}")
+    if not force and forecast_exists(conn, metric, horizon, fingerprint):
+        print(f"{metric} ({horizon}d): forecast for fingerprint {fingerprint[:12]} is current. Skipping.")
+        conn.close()
+        return 0
+
+    started = time.monotonic()
+    if not predictor.train():
+        print(f"{metric}: model training failed.")
+        conn.close()
+        return 0
+    forecast = predictor.predict(days=horizon)
+    saved_path = model_path(metric, horizon, fingerprint)
+    predictor.save_model(saved_path)
+    # Only the model behind the current forecast is kept
+    model_dir, prefix = os.path.dirname(saved_path), f"{metric}.h{horizon}."
+    for file_name in os.listdir(model_dir):
+        if file_name.startswith(prefix) and file_name != os.path.basename(saved_path):
+            os.remove(os.path.join(model_dir, file_name))
+
+    frame = pd.DataFrame({
+        "metric": metric,
+        "horizon": int(horizon),
+        "data_fingerprint": fingerprint,
+        "engine": predictor.engine,
+        "ds": forecast['ds'].dt.strftime('%Y-%m-%d %H:%M:%S'),
+        "yhat": forecast['yhat'].astype(float),
+        "yhat_lower": forecast['yhat_lower'].astype(float),
+        "yhat_upper": forecast['yhat_upper'].astype(float)
+    })
+    writer = BatchWriter(conn)
+    written = writer.upsert_frame(FORECAST_TABLE, frame[FORECAST_COLUMNS], update_columns=["engine", "yhat", "yhat_lower", "yhat_upper"])
+    if not writer.errors:
+        # Readers follow the newest fingerprint, so older runs can go once the new one is in
+        delete_other_forecasts(conn, metric, horizon, fingerprint)
+    conn.close()
+    print(f"{metric} ({horizon}d, {predictor.engine}): {written} forecast rows stored in {time.monotonic() - started:.1f}s.")
+    return written
+
+
+def run_forecasts(force=False, engine=None):
+    """Precomputes every metric/horizon in FORECAST_TARGETS."""
+    print("Starting Forecast Materialization...")
+    return {
+        (metric, horizon): run_forecast(metric, horizon, force=force, engine=engine)
+        for metric, horizons in FORECAST_TARGETS.items()
+        for horizon in horizons
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute forecasts for the dashboard.")
+    parser.add_argument("--force", action="store_true", help="Refit even if the training data is unchanged.")
+    parser.add_argument("--engine", choices=["prophet", "fast"], default=None,
+                        help="Forecasting engine (default FORECAST_ENGINE).")
+    args = parser.parse_args()
+
+    run_forecasts(force=args.force, engine=args.engine)
@@ -1,14 +1,17 @@
 import os
 import sys
-import pandas as pd
-import mysql.connector
+import argparse
 import sqlite3
-from datetime import datetime
+import pandas as pd
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
 # Add parent directory to path to import modules
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
-from src.pipeline.collector import MarketDataCollector, FredDataCollector
+from src.modules.batch_writer import BatchWriter
+from src.pipeline.scheduler import FetchScheduler, FetchTask
+from src.pipeline.sources import get_registered_sources
+from src.pipeline.streaming import ThroughputMeter
 
 load_dotenv()
 
@@ -20,204 +23,173 @@ DB_NAME = os.getenv("DB_NAME", "dashboard_db")
 env_port = os.getenv("DB_PORT")
 DB_PORT = int(env_port) if env_port and env_port.strip() else 3306
 
+# Split long fetches (backfills) into windows of this many days, each fetched and
+# written on its own so memory stays bounded. 0 = one fetch per symbol group.
+env_window = os.getenv("INGEST_WINDOW_DAYS")
+INGEST_WINDOW_DAYS = int(env_window) if env_window and env_window.strip() else 0
+
+
 def get_db_connection():
     # Use the unified DBConnector to handle fallback
     from src.modules.db_connector import DBConnector
     connector = DBConnector()
     return connector.get_connection()
 
-def ingest_market_data():
-    print("Starting Market Data Ingestion...")
-    collector = MarketDataCollector()
-    # Fetch 1 year of history
-    df = collector.fetch_historical_data(period="2y") 
-    
-    if df.empty:
-        print("No market data fetched.")
-        return
-
-    conn = get_db_connection()
+def get_high_water_marks(conn, symbols, table="macro_raw", symbol_column="symbol"):
+    """
+    Returns {symbol: latest stored date (Timestamp)} from `table`.
+    Symbols that were never ingested are absent from the result.
+    """
+    if not symbols:
+        return {}
+    is_sqlite = isinstance(conn, sqlite3.Connection)
+    placeholder = "?" if is_sqlite else "%s"
+    query = f"""
+    SELECT {symbol_column}, MAX(date) AS max_date
+    FROM {table}
+    WHERE {symbol_column} IN ({", ".join([placeholder] * len(symbols))})
+    GROUP BY {symbol_column}
+    """
     cursor = conn.cursor()
-
-    # Pre-process: The df has MultiIndex columns if multiple tickers, or simple index if handled in collector
-    # In collector.py, I implemented: combined_df = pd.concat(data_frames.values(), axis=1)
-    # The columns are just the ticker names (e.g., "Gold", "Silver")
-    # Using df.index as Date
-    
-    records_inserted = 0
-    
-    for date, row in df.iterrows():
-        date_str = date.strftime('%Y-%m-%d %H:%M:%S')
-        
-        for symbol in df.columns:
-            price = row[symbol]
-            if pd.isna(price):
-                continue
-            
-            # Map symbol to standard Raw Symbol Names
-            # yfinance names: "Gold", "Silver", "USD/KRW", etc. (from collector keys)
-            raw_symbol_map = {
-                "Gold": "GOLD_USD_OZ",
-                "Silver": "SILVER_USD_OZ",
-                "USD/KRW": "USDKRW",
-                "DXY": "DXY_INDEX",
-                "S&P 500": "SPX_INDEX",
-                "KOSPI": "KOSPI_INDEX"
-            }
-            db_symbol = raw_symbol_map.get(str(symbol), str(symbol))
-            
-            # Determine Unit
-            unit = "INDEX"
-            if "USD" in db_symbol: unit = "USD"
-            if "KRW" in db_symbol: unit = "KRW"
-            if "OZ" in db_symbol: unit = "USD/oz"
-            
-            # SQL Insert for macro_raw
-            # SQL Insert for macro_raw
-            # Detect DB Type
-            is_sqlite = isinstance(conn, sqlite3.Connection) if 'sqlite3' in sys.modules else False
-            
-            if is_sqlite:
-                sql = """
-                INSERT OR REPLACE INTO macro_raw (date, symbol, value, unit, source)
-                VALUES (?, ?, ?, ?, ?)
-                """
-                val = (str(date_str), str(db_symbol), float(price), str(unit), "yfinance")
-                # SQLite uses ? placeholder
+    try:
+        cursor.execute(query, list(symbols))
+        result = cursor.fetchall()
+    finally:
+        cursor.close()
+    return {symbol: pd.to_datetime(max_date) for symbol, max_date in result if max_date is not None}
+
+
+def split_windows(start, window_days, end=None):
+    """
+    Splits [start, end) into consecutive (start, end) string pairs of `window_days`.
+    end defaults to tomorrow, so today's rows are included (yfinance's end is exclusive).
+    """
+    start = pd.Timestamp(start).normalize()
+    end = pd.Timestamp(end) if end is not None else pd.Timestamp.today().normalize() + timedelta(days=1)
+    windows = []
+    while start < end:
+        window_end = min(start + timedelta(days=window_days), end)
+        windows.append((start.strftime('%Y-%m-%d'), window_end.strftime('%Y-%m-%d')))
+        start = window_end
+    return windows
+
+
+def plan_fetch_tasks(conn, adapter, full=False, window_days=None):
+    """
+    Splits one source into fetch tasks.
+
+    Incremental sources start at each symbol's high-water mark minus the adapter's
+    overlap; symbols without history (or every symbol with full=True) get a full
+    backfill (start=None). Symbols sharing a start are batched into one task unless
+    the adapter fetches per symbol.
+
+    window_days: Additionally split each range into date windows (default
+    INGEST_WINDOW_DAYS) so a long backfill is fetched and written piece by piece.
+    """
+    window_days = INGEST_WINDOW_DAYS if window_days is None else window_days
+    symbols = adapter.symbols()
+    marks = {}
+    if adapter.incremental and not full:
+        marks = get_high_water_marks(conn, symbols, adapter.table, adapter.symbol_column)
+
+    groups = {}
+    for symbol in symbols:
+        mark = marks.get(symbol)
+        start = (mark - timedelta(days=adapter.overlap_days)).strftime('%Y-%m-%d') if mark is not None else None
+        groups.setdefault(start, []).append(symbol)
+
+    tasks = []
+    for start, group in groups.items():
+        windows = [(start, None)]
+        if window_days > 0 and adapter.incremental:
+            range_start = start if start is not None else adapter.backfill_start()
+            if range_start is not None:
+                windows = split_windows(range_start, window_days)
+
+        window = f"from {start}" if start else ("full backfill" if adapter.incremental else "latest")
+        if len(windows) > 1:
+            window += f" in {len(windows)} windows of {window_days}d"
+        print(f"  {adapter.name}: {', '.join(group)} -> {window}")
+
+        for window_start, window_end in windows:
+            if adapter.batch_symbols:
+                tasks.append(FetchTask(adapter, group, window_start, window_end))
             else:
-                sql = """
-                INSERT INTO macro_raw (date, symbol, value, unit, source)
-                VALUES (%s, %s, %s, %s, %s)
-                ON DUPLICATE KEY UPDATE value = VALUES(value)
-                """
-                val = (str(date_str), str(db_symbol), float(price), str(unit), "yfinance")
-            
-            try:
-                cursor.execute(sql, val)
-                records_inserted += 1
-            except mysql.connector.Error as err:
-                print(f"Error inserting {db_symbol} at {date_str}: {err}")
-
-    conn.commit()
-    cursor.close()
+                tasks.extend(FetchTask(adapter, [symbol], window_start, window_end) for symbol in group)
+    return tasks
+
+
+def run_ingestion(source_names=None, full=False, window_days=None):
+    """
+    Fetches every registered source (or only `source_names`) concurrently and
+    writes each result into its adapter's table.
+
+    Results are written as soon as their task completes and released afterwards,
+    so only the frames of in-flight tasks are held in memory.
+    """
+    registry = get_registered_sources()
+    names = source_names or list(registry.keys())
+
+    adapters = []
+    for name in names:
+        if name not in registry:
+            print(f"Unknown source '{name}'. Registered: {', '.join(registry)}")
+            continue
+        adapter = registry[name]()
+        if not adapter.available():
+            print(f"Source '{name}' unavailable (missing credentials?). Skipping.")
+            continue
+        adapters.append(adapter)
+
+    if not adapters:
+        print("No sources to ingest.")
+        return {}
+
+    print(f"Starting Ingestion ({'full backfill' if full else 'incremental'}): {', '.join(a.name for a in adapters)}")
+    conn = get_db_connection()
+
+    tasks = []
+    for adapter in adapters:
+        tasks.extend(plan_fetch_tasks(conn, adapter, full=full, window_days=window_days))
+
+    writer = BatchWriter(conn)
+    written = {adapter.name: 0 for adapter in adapters}
+    meter = ThroughputMeter("ingest")
+    for task, frame, error in FetchScheduler().iter_results(tasks):
+        if error is not None or frame is None or frame.empty:
+            continue
+        adapter = task.adapter
+        count = writer.upsert(
+            adapter.table, adapter.columns, adapter.to_rows(frame), update_columns=adapter.update_columns
+        )
+        written[adapter.name] += count
+        meter.tick(len(frame), count, f"{adapter.name} {task.start or 'backfill'} ~ {task.end or 'now'}")
+        del frame
+
+    meter.summary()
     conn.close()
-    print(f"Market Data Ingestion Complete. {records_inserted} records inserted into macro_raw.")
+    for name, count in written.items():
+        table = next(a.table for a in adapters if a.name == name)
+        print(f"{name}: {count} records inserted into {table}.")
+    return written
 
-def ingest_fred_data():
-    print("Starting Macro Data Ingestion (FRED)...")
-    collector = FredDataCollector()
-    if not collector.fred:
-        print("FRED API Key missing. Skipping.")
-        return
+def ingest_market_data(full=False):
+    return run_ingestion(["yfinance"], full=full)
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    records_inserted = 0
-
-    # Fetch logical series history
-    for name, series_id in collector.series_ids.items():
-        try:
-            print(f"Fetching {name} ({series_id})...")
-            # Get 2 years of data
-            series = collector.fred.get_series(series_id, observation_start='2024-01-01')
-            
-            for date, value in series.items():
-                date_str = date.strftime('%Y-%m-%d')
-                if pd.isna(value):
-                    continue
-
-                # Standardize Names
-                db_symbol_map = {
-                    "CPI": "CPI_INDEX",
-                    "M2": "M2_SUPPLY",
-                    "US10Y": "US10Y_YIELD",
-                    "FedRate": "FED_RATE"
-                }
-                db_symbol = db_symbol_map.get(name, name)
-                
-                unit = "INDEX"
-                if "RATE" in db_symbol or "YIELD" in db_symbol: unit = "%"
-                if "M2" in db_symbol: unit = "USD_BILLIONS"
-
-                # SQL Insert
-                # Detect DB Type
-                is_sqlite = isinstance(conn, sqlite3.Connection) if 'sqlite3' in sys.modules else False
-                
-                if is_sqlite:
-                    sql = """
-                    INSERT OR REPLACE INTO macro_raw (date, symbol, value, unit, source)
-                    VALUES (?, ?, ?, ?, ?)
-                    """
-                    val = (str(date_str), str(db_symbol), float(value), str(unit), "FRED")
-                else:
-                    sql = """
-                    INSERT INTO macro_raw (date, symbol, value, unit, source)
-                    VALUES (%s, %s, %s, %s, %s)
-                    ON DUPLICATE KEY UPDATE value = VALUES(value)
-                    """
-                    val = (date_str, db_symbol, float(value), unit, "FRED")
-                
-                try:
-                    cursor.execute(sql, val)
-                    records_inserted += 1
-                except mysql.connector.Error as err:
-                    print(f"Error inserting {db_symbol} at {date_str}: {err}")
-                except sqlite3.Error as err:
-                    print(f"Error inserting {db_symbol} at {date_str}: {err}")
-                    
-        except Exception as e:
-            print(f"Failed to fetch/insert {name}: {e}")
-
-    conn.commit()
-    cursor.close()
-    conn.close()
-    print(f"Macro Data Ingestion Complete. {records_inserted} records inserted into macro_raw.")
+def ingest_fred_data(full=False):
+    return run_ingestion(["fred"], full=full)
 
 def ingest_domestic_data():
-    print("Starting Domestic Gold Data Ingestion...")
-    from src.modules.domestic_collector import DomesticGoldCollector
-    
-    collector = DomesticGoldCollector()
-    # Using Mock for now as agreed
-    data = collector.fetch_latest_mock()
-    
-    if data:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # SQL Insert
-        is_sqlite = isinstance(conn, sqlite3.Connection) if 'sqlite3' in sys.modules else False
-        
-        if is_sqlite:
-            sql = """
-            INSERT OR REPLACE INTO domestic_market_raw (date, price_type, value, unit, source)
-            VALUES (?, ?, ?, ?, ?)
-            """
-            val = (str(data['date']), str(data['type']), float(data['value']), str(data['unit']), "MOCK_TEST")
-        else:
-            sql = """
-            INSERT INTO domestic_market_raw (date, price_type, value, unit, source)
-            VALUES (%s, %s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE value = VALUES(value)
-            """
-            val = (data['date'], data['type'], data['value'], data['unit'], "MOCK_TEST")
-        
-        try:
-            cursor.execute(sql, val)
-            conn.commit()
-            print(f"Domestic Data Ingested: {data['value']} KRW ({data['date']})")
-        except mysql.connector.Error as err:
-            print(f"Error inserting domestic data: {err}")
-        except sqlite3.Error as err:
-            print(f"Error inserting domestic data: {err}")
-        finally:
-            cursor.close()
-            conn.close()
-    else:
-        print("No domestic data fetched.")
+    return run_ingestion(["domestic"])
 
 if __name__ == "__main__":
-    ingest_market_data()
-    ingest_fred_data()
-    ingest_domestic_data()
+    parser = argparse.ArgumentParser(description="Ingest raw market and macro data.")
+    parser.add_argument("--full", action="store_true",
+                        help="Ignore stored high-water marks and re-download the full backfill window.")
+    parser.add_argument("--source", action="append", dest="sources",
+                        help="Only ingest this registered source (repeatable).")
+    parser.add_argument("--window-days", type=int, default=None,
+                        help="Fetch and write in date windows of this many days (default INGEST_WINDOW_DAYS).")
+    args = parser.parse_args()
+
+    run_ingestion(args.sources, full=args.full, window_days=args.window_days)
@@ -0,0 +1,81 @@
+import os
+import sys
+import time
+import argparse
+import pandas as pd
+from dotenv import load_dotenv
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from src.modules.tick_store import TickStore
+from src.pipeline.collector import MarketDataCollector
+from src.pipeline.sources import YFinanceSource
+
+load_dotenv()
+
+# DB symbols polled at minute resolution (comma-separated)
+INTRADAY_SYMBOLS = [s.strip() for s in os.getenv("INTRADAY_SYMBOLS", "GOLD_USD_OZ,USDKRW").split(",") if s.strip()]
+INTRADAY_POLL_SECONDS = float(os.getenv("INTRADAY_POLL_SECONDS", "60"))
+
+
+def poll_once(collector, store, symbols):
+    """
+    Fetches the latest minute bars and appends the new ones to the tick store.
+    Returns {symbol: ticks appended}.
+    """
+    names_by_symbol = {db_symbol: name for name, db_symbol in YFinanceSource.symbol_map.items()}
+    names = [names_by_symbol[s] for s in symbols if s in names_by_symbol]
+
+    # Catch up on up to 5 days after a gap, otherwise only today's bars
+    lasts = [store.last_timestamp(s) for s in symbols]
+    caught_up = all(last is not None and pd.Timestamp.now(tz="UTC") - last < pd.Timedelta(hours=12) for last in lasts)
+    bars = collector.fetch_intraday(names, interval="1m", period="1d" if caught_up else "5d")
+
+    appended = {}
+    for symbol in symbols:
+        name = names_by_symbol.get(symbol)
+        if bars.empty or name not in bars.columns:
+            appended[symbol] = 0
+            continue
+        series = bars[name].dropna()
+        appended[symbol] = store.append(symbol, series.index, series.to_numpy())
+    return appended
+
+
+def run_intraday(symbols=None, interval_seconds=None, iterations=None, store=None, provider=None):
+    """
+    Polls minute bars for `symbols` (default INTRADAY_SYMBOLS) every `interval_seconds`
+    (default INTRADAY_POLL_SECONDS) and appends them to the tick store.
+    iterations=None polls until interrupted.
+    """
+    symbols = symbols or INTRADAY_SYMBOLS
+    interval_seconds = INTRADAY_POLL_SECONDS if interval_seconds is None else interval_seconds
+    store = store or TickStore()
+    collector = MarketDataCollector(provider=provider)
+
+    print(f"Starting Intraday Polling: {', '.join(symbols)} every {interval_seconds:.0f}s -> {store.root}")
+    done = 0
+    while iterations is None or done < iterations:
+        started = time.monotonic()
+        appended = poll_once(collector, store, symbols)
+        summary = ", ".join(f"{s}: +{n} ({store.count(s)})" for s, n in appended.items())
+        print(f"[{pd.Timestamp.now(tz='UTC'):%Y-%m-%d %H:%M:%S}] {summary}")
+        done += 1
+        if iterations is not None and done >= iterations:
+            break
+        time.sleep(max(0.0, interval_seconds - (time.monotonic() - started)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Poll intraday (1m) bars into the tick store.")
+    parser.add_argument("--symbol", action="append", dest="symbols",
+                        help="DB symbol to poll, e.g. GOLD_USD_OZ (repeatable, default INTRADAY_SYMBOLS).")
+    parser.add_argument("--interval", type=float, default=None,
+                        help="Seconds between polls (default INTRADAY_POLL_SECONDS).")
+    parser.add_argument("--once", action="store_true", help="Poll a single time and exit.")
+    args = parser.parse_args()
+
+    try:
+        run_intraday(args.symbols, args.interval, iterations=1 if args.once else None)
+    except KeyboardInterrupt:
+        print("Intraday polling stopped.")
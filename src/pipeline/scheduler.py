@@ -0,0 +1,106 @@
+import time
+import threading
+from contextlib import ExitStack
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+class FetchTask:
+    def __init__(self, adapter, symbols, start=None, end=None):
+        """One fetch() call: a source adapter plus the symbols/window it should fetch."""
+        self.adapter = adapter
+        self.symbols = list(symbols)
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        return f"FetchTask({self.adapter.name}, {self.symbols}, start={self.start}, end={self.end})"
+
+
+class RateLimiter:
+    def __init__(self, min_interval):
+        """Spaces out calls to one source by at least `min_interval` seconds."""
+        self.min_interval = min_interval
+        self.lock = threading.Lock()
+        self.next_allowed = 0.0
+
+    def wait(self):
+        if self.min_interval <= 0:
+            return
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_allowed - now
+            self.next_allowed = max(now, self.next_allowed) + self.min_interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+class FetchScheduler:
+    def __init__(self, max_workers=None):
+        """
+        Runs fetch tasks of all sources concurrently.
+
+        Each source gets its own worker pool sized to its concurrency limit
+        (adapter.max_concurrency, optionally capped by max_workers), rate limit
+        (adapter.min_interval) and retry/backoff policy. Queued tasks of one
+        source never hold a worker of another, so total wall time is bounded by
+        the slowest source instead of the sum of all of them.
+        """
+        self.max_workers = max_workers
+        self.limiters = {}
+
+    def _limiter(self, adapter):
+        if adapter.name not in self.limiters:
+            self.limiters[adapter.name] = RateLimiter(adapter.min_interval)
+        return self.limiters[adapter.name]
+
+    def _pool_size(self, adapter):
+        workers = max(1, adapter.max_concurrency)
+        return min(workers, self.max_workers) if self.max_workers else workers
+
+    def _run_task(self, task, limiter):
+        adapter = task.adapter
+        attempt = 0
+        while True:
+            limiter.wait()
+            try:
+                return adapter.fetch(task.symbols, task.start, task.end)
+            except Exception as e:
+                if attempt >= adapter.max_retries:
+                    raise
+                delay = adapter.backoff_seconds * (2 ** attempt)
+                attempt += 1
+                print(f"⚠️ {adapter.name} fetch failed ({e}). Retry {attempt}/{adapter.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+
+    def iter_results(self, tasks):
+        """
+        Executes all tasks and yields (task, frame, error) tuples in completion
+        order, so callers can write and release each frame while the remaining
+        tasks are still fetching. A failed task has frame=None and the last exception.
+        """
+        if not tasks:
+            return
+
+        adapters = {task.adapter.name: task.adapter for task in tasks}
+
+        with ExitStack() as stack:
+            executors = {
+                name: stack.enter_context(ThreadPoolExecutor(max_workers=self._pool_size(adapter),
+                                                             thread_name_prefix=f"fetch-{name}"))
+                for name, adapter in adapters.items()
+            }
+            futures = {
+                executors[task.adapter.name].submit(self._run_task, task, self._limiter(task.adapter)): task
+                for task in tasks
+            }
+            for future in as_completed(futures):
+                task = futures.pop(future)
+                try:
+                    yield task, future.result(), None
+                except Exception as e:
+                    print(f"Error fetching {task.adapter.name} {task.symbols}: {e}")
+                    yield task, None, e
+
+    def run(self, tasks):
+        """Executes all tasks and returns the list of (task, frame, error) tuples."""
+        return list(self.iter_results(tasks))
@@ -4,6 +4,7 @@ import sys
 
 # Add src path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from src.modules.db_connector import SQLITE_TUNED, apply_sqlite_profile, optimize_sqlite
 
 def init_sqlite_db():
     db_path = os.path.join(os.path.dirname(__file__), '../../dashboard.db')
@@ -13,6 +14,9 @@ def init_sqlite_db():
         os.remove(db_path)
         
     conn = sqlite3.connect(db_path)
+    if SQLITE_TUNED:
+        # journal_mode=WAL is persistent: every later connection to the file uses it
+        apply_sqlite_profile(conn)
     cursor = conn.cursor() # Cursor for executing SQL commands
     
     print(f"Creating SQLite DB at {db_path}...")
@@ -74,7 +78,85 @@ def init_sqlite_db():
     );
     """)
     
+    # 5. Pipeline Watermarks (incremental derive state)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS pipeline_watermarks (
+        stage TEXT PRIMARY KEY,
+        watermark TEXT,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """)
+    
+    # 6. Market Regime (signals stage -> dashboard)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS market_regime (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT,
+        regime_type TEXT,
+        confidence_score REAL,
+        description TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(date)
+    );
+    """)
+    
+    # 7. Precomputed forecasts (forecast stage -> dashboard)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS macro_forecast (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        metric TEXT,
+        horizon INTEGER,
+        data_fingerprint TEXT,
+        engine TEXT,
+        ds TEXT,
+        yhat REAL,
+        yhat_lower REAL,
+        yhat_upper REAL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(metric, horizon, data_fingerprint, ds)
+    );
+    """)
+    
+    # 8. Valuation z-scores per rolling window (signals stage -> dashboard)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS valuation_zscore (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT,
+        metric TEXT,
+        window_label TEXT,
+        window_size INTEGER,
+        value REAL,
+        rolling_mean REAL,
+        rolling_std REAL,
+        z_score REAL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(date, metric, window_label)
+    );
+    """)
+    
+    # 9. Rolling correlations / volatilities (correlation stage -> dashboard)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS market_correlation_derived (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT,
+        window_size INTEGER,
+        metric TEXT,
+        symbol_a TEXT,
+        symbol_b TEXT,
+        value REAL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(date, window_size, metric, symbol_a, symbol_b)
+    );
+    """)
+    
+    # Lookup indexes for range scans by symbol/metric/price type
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_raw_symbol_date ON macro_raw (symbol, date);")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_derived_metric_date ON macro_derived (metric, date);")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_domestic_type_date ON domestic_market_raw (price_type, date);")
+    
     conn.commit()
+    if SQLITE_TUNED:
+        optimize_sqlite(conn)
     conn.close()
     print("SQLite Initialized.")
 
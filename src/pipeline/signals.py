@@ -0,0 +1,308 @@
+import os
+import sys
+import sqlite3
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from src.modules.batch_writer import BatchWriter
+from src.modules.db_connector import DBConnector, sql_placeholder
+from src.modules.repository import TimeSeriesRepository, RAW_SYMBOLS
+from src.pipeline.watermarks import get_watermark, set_watermark, get_max_created_at, get_dirty_date_range
+
+# Calendar days of history reloaded before the first date to reclassify, enough for
+# the 50-observation moving average plus the 5-day confidence window
+REGIME_LOOKBACK_DAYS = 120
+
+# Watermark keys (pipeline_watermarks.stage) of the incremental signal stages
+REGIME_STAGE = "signals:regime"
+VALUATION_STAGE = "signals:valuation"
+
+# Signal tables as in schema.sql (created here for databases set up before they were written)
+REGIME_SQLITE_DDL = """
+CREATE TABLE IF NOT EXISTS market_regime (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT,
+    regime_type TEXT,
+    confidence_score REAL,
+    description TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(date)
+);
+"""
+
+REGIME_MYSQL_DDL = """
+CREATE TABLE IF NOT EXISTS market_regime (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    date DATE NOT NULL,
+    regime_type VARCHAR(50),
+    confidence_score FLOAT,
+    description TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY unique_regime_entry (date)
+)
+"""
+
+VALUATION_SQLITE_DDL = """
+CREATE TABLE IF NOT EXISTS valuation_zscore (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT,
+    metric TEXT,
+    window_label TEXT,
+    window_size INTEGER,
+    value REAL,
+    rolling_mean REAL,
+    rolling_std REAL,
+    z_score REAL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(date, metric, window_label)
+);
+"""
+
+VALUATION_MYSQL_DDL = """
+CREATE TABLE IF NOT EXISTS valuation_zscore (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    date DATE NOT NULL,
+    metric VARCHAR(50) NOT NULL,
+    window_label VARCHAR(10) NOT NULL,
+    window_size INT,
+    value DECIMAL(18, 4),
+    rolling_mean DECIMAL(18, 4),
+    rolling_std DECIMAL(18, 4),
+    z_score FLOAT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY unique_valuation_entry (date, metric, window_label)
+)
+"""
+
+
+def _ensure_table(conn, sqlite_ddl, mysql_ddl):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sqlite_ddl if isinstance(conn, sqlite3.Connection) else mysql_ddl)
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def ensure_regime_table(conn):
+    """
+    Creates market_regime, and adds UNIQUE(date) to tables created by the
+    original schema without it (after dropping duplicate dates, newest row
+    kept), so upserts replace a date instead of appending it again.
+    """
+    _ensure_table(conn, REGIME_SQLITE_DDL, REGIME_MYSQL_DDL)
+    is_sqlite = isinstance(conn, sqlite3.Connection)
+    cursor = conn.cursor()
+    try:
+        if is_sqlite:
+            indexes = cursor.execute("PRAGMA index_list('market_regime')").fetchall()
+            has_key = any(
+                unique and [row[2] for row in conn.execute(f"PRAGMA index_info('{name}')")] == ["date"]
+                for _, name, unique, *_ in indexes
+            )
+        else:
+            cursor.execute(
+                "SELECT INDEX_NAME FROM information_schema.STATISTICS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'market_regime' AND NON_UNIQUE = 0 "
+                "GROUP BY INDEX_NAME HAVING COUNT(*) = 1 AND MAX(COLUMN_NAME) = 'date'"
+            )
+            has_key = bool(cursor.fetchall())
+        if has_key:
+            return
+
+        print("Adding UNIQUE(date) to market_regime (duplicate dates are dropped, newest kept)...")
+        if is_sqlite:
+            cursor.execute("DELETE FROM market_regime WHERE id NOT IN (SELECT MAX(id) FROM market_regime GROUP BY date)")
+            cursor.execute("CREATE UNIQUE INDEX unique_regime_entry ON market_regime (date)")
+        else:
+            cursor.execute(
+                "DELETE older FROM market_regime older JOIN market_regime newer "
+                "ON older.date = newer.date AND older.id < newer.id"
+            )
+            cursor.execute("ALTER TABLE market_regime ADD UNIQUE KEY unique_regime_entry (date)")
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def ensure_valuation_table(conn):
+    _ensure_table(conn, VALUATION_SQLITE_DDL, VALUATION_MYSQL_DDL)
+
+
+def _max_date(conn, query, params=()):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query, params)
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+    return pd.to_datetime(row[0]) if row and row[0] is not None else None
+
+
+def run_regime(full=False):
+    """
+    Classifies the market regime of every trading date and upserts it into
+    market_regime.
+
+    Incremental by default: every date from the earliest Gold / DXY / S&P 500
+    raw row written since the last successful run (created_at > watermark)
+    onwards is reclassified, with enough lookback for the moving average, so a
+    regime first computed from forward-filled (provisional) closes is rewritten
+    once the late closes arrive. full=True (or no watermark yet) recomputes the
+    whole history.
+    """
+    from src.analysis.regime import MarketRegimeClassifier, REQUIRED_COLUMNS
+
+    connector = DBConnector()
+    conn = connector.get_connection()
+    ensure_regime_table(conn)
+    ph = sql_placeholder(conn)
+
+    symbol_filter = f"WHERE symbol IN ({', '.join([ph] * len(REQUIRED_COLUMNS))})"
+    symbol_params = tuple(RAW_SYMBOLS[name] for name in REQUIRED_COLUMNS)
+    # Read the new watermark before the data, so rows landing mid-run are picked up next time
+    new_watermark = get_max_created_at(conn, "macro_raw", symbol_filter, symbol_params)
+    watermark = None if full else get_watermark(conn, REGIME_STAGE)
+
+    recompute_from = None
+    if watermark:
+        dirty = get_dirty_date_range(conn, "macro_raw", watermark, symbol_filter, symbol_params)
+        if dirty is None:
+            print(f"Market Regime: no raw changes since {watermark}.")
+            conn.close()
+            return 0
+        recompute_from = pd.to_datetime(dirty[0], format='ISO8601').normalize()
+
+    start = (recompute_from - pd.Timedelta(days=REGIME_LOOKBACK_DAYS)).strftime('%Y-%m-%d') if recompute_from is not None else None
+    classifier = MarketRegimeClassifier.from_repository(TimeSeriesRepository(connector), start=start)
+    history = classifier.label_history()
+    if recompute_from is not None:
+        history = history[history.index >= recompute_from]
+
+    if history.empty:
+        print("No dates to classify.")
+        set_watermark(conn, REGIME_STAGE, new_watermark)
+        conn.close()
+        return 0
+
+    trends = {col: np.where(history[col], "UP", "DOWN") for col in ['gold_up', 'dxy_up', 'spx_up']}
+    description = [
+        f"Gold {g}, DXY {d}, S&P 500 {s} vs 50-day MA"
+        for g, d, s in zip(trends['gold_up'], trends['dxy_up'], trends['spx_up'])
+    ]
+    frame = pd.DataFrame({
+        'date': history.index.strftime('%Y-%m-%d'),
+        'regime_type': history['regime_type'].astype(str),
+        'confidence_score': history['confidence_score'].astype(float),
+        'description': description
+    })
+    writer = BatchWriter(conn)
+    written = writer.upsert_frame("market_regime", frame, update_columns=["regime_type", "confidence_score", "description"])
+    if not writer.errors:
+        set_watermark(conn, REGIME_STAGE, new_watermark)
+    conn.close()
+    print(f"Market Regime: {written} date(s) classified "
+          f"({frame['date'].iloc[0]} ~ {frame['date'].iloc[-1]}), latest: {frame['regime_type'].iloc[-1]}")
+    return written
+
+
+def run_valuation(metric="GOLD_KRW_DON", full=False):
+    """
+    Rolling z-scores of `metric` for every VALUATION_WINDOWS window, upserted
+    into valuation_zscore.
+
+    Incremental by default: every date from the earliest `metric` row of
+    macro_derived written since the last successful run (created_at > watermark)
+    onwards is recomputed, so revised values rewritten by the derive stage reach
+    the stored z-scores. RollingZScore is seeded with the max(window) values
+    before that date and steps through the rest; full=True (or no watermark yet)
+    recomputes the whole history in one vectorized pass.
+    Returns the valuation status of the latest date (or None).
+    """
+    from src.analysis.alerts import VALUATION_WINDOWS, RollingZScore, rolling_zscores, status_from_zscores
+
+    conn = DBConnector().get_connection()
+    ensure_valuation_table(conn)
+    ph = sql_placeholder(conn)
+
+    metric_filter, metric_params = f"WHERE metric = {ph}", (metric,)
+    stage = f"{VALUATION_STAGE}:{metric}"
+    # Read the new watermark before the data, so rows landing mid-run are picked up next time
+    new_watermark = get_max_created_at(conn, "macro_derived", metric_filter, metric_params)
+    watermark = None if full else get_watermark(conn, stage)
+
+    recompute_from = None
+    if watermark:
+        dirty = get_dirty_date_range(conn, "macro_derived", watermark, metric_filter, metric_params)
+        if dirty is None:
+            print(f"No {metric} changes since {watermark} for valuation z-scores.")
+            conn.close()
+            return None
+        # Stored dates are compared by day, whether or not they carry a time part
+        recompute_from = pd.to_datetime(dirty[0], format='ISO8601').strftime('%Y-%m-%d')
+
+    if recompute_from is None:
+        new = pd.read_sql(f"SELECT date, value FROM macro_derived WHERE metric = {ph} ORDER BY date ASC",
+                          conn, params=(metric,))
+        stats = rolling_zscores(new['value'].astype(float), VALUATION_WINDOWS)
+    else:
+        seed = pd.read_sql(
+            f"SELECT date, value FROM macro_derived WHERE metric = {ph} AND date < {ph} ORDER BY date DESC LIMIT {max(VALUATION_WINDOWS.values())}",
+            conn, params=(metric, recompute_from))
+        new = pd.read_sql(f"SELECT date, value FROM macro_derived WHERE metric = {ph} AND date >= {ph} ORDER BY date ASC",
+                          conn, params=(metric, recompute_from))
+        engine = RollingZScore.from_history(seed['value'].astype(float).iloc[::-1], VALUATION_WINDOWS)
+        steps = [engine.update(value) for value in new['value'].astype(float)]
+        stats = {
+            label: tuple(np.array([step[label][i] for step in steps], dtype=float) for i in range(3))
+            for label in VALUATION_WINDOWS
+        }
+
+    if new.empty:
+        print(f"No {metric} dates for valuation z-scores.")
+        set_watermark(conn, stage, new_watermark)
+        conn.close()
+        return None
+
+    dates = pd.to_datetime(new['date'], format='ISO8601').dt.strftime('%Y-%m-%d').to_numpy()
+    values = new['value'].astype(float).to_numpy()
+    frames = []
+    for label, (mean, std, z) in stats.items():
+        valid = np.isfinite(z)
+        frames.append(pd.DataFrame({
+            'date': dates[valid],
+            'metric': metric,
+            'window_label': label,
+            'window_size': VALUATION_WINDOWS[label],
+            'value': values[valid],
+            'rolling_mean': mean[valid],
+            'rolling_std': std[valid],
+            'z_score': z[valid]
+        }))
+    frame = pd.concat(frames, ignore_index=True)
+
+    written = 0
+    writer = BatchWriter(conn)
+    if not frame.empty:
+        written = writer.upsert_frame("valuation_zscore", frame,
+                                      update_columns=["window_size", "value", "rolling_mean", "rolling_std", "z_score"])
+    if not writer.errors:
+        set_watermark(conn, stage, new_watermark)
+    conn.close()
+
+    status = status_from_zscores({label: float(z[-1]) for label, (_, _, z) in stats.items()}, VALUATION_WINDOWS)
+    print(f"Valuation Z-Scores: {written} row(s) for {len(new)} date(s) of {metric}")
+    return status
+
+
+def run_signals(full=False):
+    """Evaluates the market regime and valuation alert on the freshly derived data."""
+    print("Starting Signal Evaluation (Regime / Valuation)...")
+    run_regime(full=full)
+
+    status = run_valuation(full=full)
+    if status:
+        z_text = ", ".join(f"{label} {z:.2f}" for label, z in status['z_scores'].items() if np.isfinite(z))
+        print(f"Valuation: {status['message']} (Z-Score {status['z_score']:.2f} over {status['window']}; {z_text})")
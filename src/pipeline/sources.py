@@ -0,0 +1,249 @@
+import os
+import importlib
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Columns of the normalized long-format frame every adapter returns
+LONG_COLUMNS = ["date", "symbol", "value", "unit", "source"]
+
+# name -> adapter class. Populated by @register_source.
+SOURCE_REGISTRY = {}
+
+
+def register_source(cls):
+    """Class decorator: makes a SourceAdapter available to the ingest pipeline."""
+    SOURCE_REGISTRY[cls.name] = cls
+    return cls
+
+
+def load_source_modules():
+    """
+    Imports extra adapter modules listed in PIPELINE_SOURCE_MODULES
+    (comma-separated dotted paths) so they can register themselves.
+    New sources are added there instead of editing ingest.py.
+    """
+    modules = os.getenv("PIPELINE_SOURCE_MODULES", "")
+    for module_name in [m.strip() for m in modules.split(",") if m.strip()]:
+        try:
+            importlib.import_module(module_name)
+        except ImportError as e:
+            print(f"Could not load source module {module_name}: {e}")
+
+
+def get_registered_sources():
+    load_source_modules()
+    return dict(SOURCE_REGISTRY)
+
+
+class SourceAdapter:
+    """
+    Base class for data sources.
+
+    Subclasses set the class attributes below and implement fetch(), which must
+    return a long-format DataFrame with LONG_COLUMNS (date as Timestamp).
+    """
+    name = None
+    table = "macro_raw"
+    # Column of `table` that holds the adapter's symbol (domestic prices use price_type)
+    symbol_column = "symbol"
+    update_columns = ["value"]
+    date_format = '%Y-%m-%d %H:%M:%S'
+
+    # Scheduling policy
+    max_concurrency = 1     # Parallel fetch() calls against this source
+    min_interval = 0.0      # Seconds between two calls (rate limit)
+    max_retries = 2
+    backoff_seconds = 1.0   # Doubles after every failed attempt
+    batch_symbols = True    # False: one fetch() call per symbol
+
+    # Incremental policy
+    incremental = True
+    overlap_days = 5
+
+    def backfill_start(self):
+        """
+        First date (Timestamp) a full backfill covers, or None when the source
+        decides itself. Needed to split a backfill into date windows.
+        """
+        return None
+
+    def available(self):
+        """Returns False when the source cannot run (e.g. missing API key)."""
+        return True
+
+    def symbols(self):
+        """Standard DB symbols this source provides."""
+        return []
+
+    def fetch(self, symbols, start=None, end=None):
+        """
+        Fetches `symbols` between start and end (None start = full backfill).
+        Returns a long-format DataFrame with LONG_COLUMNS.
+        """
+        raise NotImplementedError
+
+    def to_rows(self, frame):
+        """Converts a long frame into row tuples for the adapter's table."""
+        frame = frame.dropna(subset=["value"])
+        dates = pd.to_datetime(frame["date"]).dt.strftime(self.date_format)
+        return list(zip(
+            dates,
+            frame["symbol"].astype(str),
+            frame["value"].astype(float).tolist(),
+            frame["unit"].astype(str),
+            frame["source"].astype(str)
+        ))
+
+    @property
+    def columns(self):
+        return ["date", self.symbol_column, "value", "unit", "source"]
+
+
+def get_market_unit(db_symbol):
+    unit = "INDEX"
+    if "USD" in db_symbol: unit = "USD"
+    if "KRW" in db_symbol: unit = "KRW"
+    if "OZ" in db_symbol: unit = "USD/oz"
+    return unit
+
+
+def get_fred_unit(db_symbol):
+    unit = "INDEX"
+    if "RATE" in db_symbol or "YIELD" in db_symbol: unit = "%"
+    if "M2" in db_symbol: unit = "USD_BILLIONS"
+    return unit
+
+
+@register_source
+class YFinanceSource(SourceAdapter):
+    name = "yfinance"
+    min_interval = 1.0
+    overlap_days = int(os.getenv("INGEST_MARKET_OVERLAP_DAYS", "5"))
+    backfill_period = "2y"
+
+    # Map collector names to standard Raw Symbol Names
+    # yfinance names: "Gold", "Silver", "USD/KRW", etc. (from collector keys)
+    symbol_map = {
+        "Gold": "GOLD_USD_OZ",
+        "Silver": "SILVER_USD_OZ",
+        "USD/KRW": "USDKRW",
+        "DXY": "DXY_INDEX",
+        "S&P 500": "SPX_INDEX",
+        "KOSPI": "KOSPI_INDEX"
+    }
+
+    def __init__(self, provider=None):
+        self.provider = provider
+
+    def backfill_start(self):
+        years = int(self.backfill_period.rstrip("y"))
+        return pd.Timestamp.today().normalize() - pd.DateOffset(years=years)
+
+    def symbols(self):
+        return list(self.symbol_map.values())
+
+    def fetch(self, symbols, start=None, end=None):
+        from src.pipeline.collector import MarketDataCollector
+
+        collector = MarketDataCollector(provider=self.provider)
+        wanted = {name for name, db_symbol in self.symbol_map.items() if db_symbol in symbols}
+        collector.tickers = {name: ticker for name, ticker in collector.tickers.items() if name in wanted}
+
+        df = collector.fetch_historical_data(period=self.backfill_period, start=start, end=end)
+        if df.empty:
+            return pd.DataFrame(columns=LONG_COLUMNS)
+
+        # The columns are the ticker names (e.g., "Gold"), df.index is the Date
+        long_df = df.rename(columns=self.symbol_map).rename_axis("date").reset_index()
+        long_df = long_df.melt(id_vars="date", var_name="symbol", value_name="value").dropna(subset=["value"])
+        long_df["unit"] = long_df["symbol"].map(get_market_unit)
+        long_df["source"] = "yfinance"
+        return long_df[LONG_COLUMNS]
+
+
+@register_source
+class FredSource(SourceAdapter):
+    name = "fred"
+    date_format = '%Y-%m-%d'
+    # FRED allows 120 requests/minute per key
+    max_concurrency = 2
+    min_interval = 0.5
+    batch_symbols = False
+    # FRED revises monthly series for a couple of months
+    overlap_days = int(os.getenv("INGEST_FRED_OVERLAP_DAYS", "93"))
+    backfill_start_date = "2024-01-01"
+
+    symbol_map = {
+        "CPI": "CPI_INDEX",
+        "M2": "M2_SUPPLY",
+        "US10Y": "US10Y_YIELD",
+        "FedRate": "FED_RATE"
+    }
+
+    def __init__(self):
+        from src.pipeline.collector import FredDataCollector
+        self.collector = FredDataCollector()
+
+    def available(self):
+        return self.collector.fred is not None
+
+    def backfill_start(self):
+        return pd.Timestamp(self.backfill_start_date)
+
+    def symbols(self):
+        return list(self.symbol_map.values())
+
+    def fetch(self, symbols, start=None, end=None):
+        series_by_symbol = {
+            self.symbol_map[name]: series_id
+            for name, series_id in self.collector.series_ids.items()
+            if self.symbol_map.get(name) in symbols
+        }
+        frames = []
+        for db_symbol, series_id in series_by_symbol.items():
+            print(f"Fetching {db_symbol} ({series_id}) from {start or self.backfill_start_date}...")
+            series = self.collector.fred.get_series(
+                series_id,
+                observation_start=start or self.backfill_start_date,
+                observation_end=end
+            ).dropna()
+            frames.append(pd.DataFrame({
+                "date": pd.to_datetime(series.index),
+                "symbol": db_symbol,
+                "value": series.values,
+                "unit": get_fred_unit(db_symbol),
+                "source": "FRED"
+            }))
+        if not frames:
+            return pd.DataFrame(columns=LONG_COLUMNS)
+        return pd.concat(frames, ignore_index=True)[LONG_COLUMNS]
+
+
+@register_source
+class DomesticGoldSource(SourceAdapter):
+    name = "domestic"
+    table = "domestic_market_raw"
+    symbol_column = "price_type"
+    # Only the latest quote is available, so there is nothing to page through
+    incremental = False
+
+    def symbols(self):
+        return ["BUYing"]
+
+    def fetch(self, symbols, start=None, end=None):
+        from src.modules.domestic_collector import DomesticGoldCollector
+
+        collector = DomesticGoldCollector()
+        # Using Mock for now as agreed
+        data = collector.fetch_latest_mock()
+        if not data or data['type'] not in symbols:
+            return pd.DataFrame(columns=LONG_COLUMNS)
+        return pd.DataFrame([{
+            "date": pd.to_datetime(data['date']),
+            "symbol": data['type'],
+            "value": float(data['value']),
+            "unit": data['unit'],
+            "source": "MOCK_TEST"
+        }])
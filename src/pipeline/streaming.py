@@ -0,0 +1,70 @@
+import os
+import time
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Rows fetched from the DB per chunk by the streaming derive stage
+env_chunk_rows = os.getenv("DERIVE_CHUNK_ROWS")
+DERIVE_CHUNK_ROWS = int(env_chunk_rows) if env_chunk_rows and env_chunk_rows.strip() else 50000
+
+
+def iter_sql_chunks(conn, query, params=None, chunk_rows=None):
+    """
+    Yields DataFrames of at most `chunk_rows` rows from `query`.
+    The cursor is consumed lazily, so only one chunk is held in memory.
+    """
+    chunk_rows = max(1, int(chunk_rows or DERIVE_CHUNK_ROWS))
+    for chunk in pd.read_sql(query, conn, params=params, chunksize=chunk_rows):
+        yield chunk
+
+
+def iter_date_windows(chunks, date_column="date"):
+    """
+    Re-cuts date-ordered chunks so that no date is split across two frames.
+
+    The rows of the last date in a chunk may continue in the next chunk (e.g. GOLD
+    in one, USDKRW in the other), so they are held back and prepended to it.
+    Requires the query to be ORDER BY `date_column`.
+    """
+    carry = None
+    for chunk in chunks:
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        if chunk.empty:
+            continue
+        last_date = chunk[date_column].iloc[-1]
+        tail = chunk[date_column] == last_date
+        carry = chunk[tail]
+        if not tail.all():
+            yield chunk[~tail]
+    if carry is not None and not carry.empty:
+        yield carry
+
+
+class ThroughputMeter:
+    def __init__(self, label):
+        """Prints rows/s for every processed chunk and a total at the end."""
+        self.label = label
+        self.started = time.perf_counter()
+        self.last = self.started
+        self.chunks = 0
+        self.rows_in = 0
+        self.rows_out = 0
+
+    def tick(self, rows_in, rows_out, note=""):
+        now = time.perf_counter()
+        elapsed = max(now - self.last, 1e-9)
+        self.last = now
+        self.chunks += 1
+        self.rows_in += rows_in
+        self.rows_out += rows_out
+        suffix = f" {note}" if note else ""
+        print(f"  [{self.label}] chunk {self.chunks}: {rows_in} in / {rows_out} out "
+              f"in {elapsed:.2f}s ({rows_in / elapsed:,.0f} rows/s){suffix}")
+
+    def summary(self):
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        print(f"  [{self.label}] {self.chunks} chunk(s), {self.rows_in} in / {self.rows_out} out "
+              f"in {elapsed:.2f}s ({self.rows_in / elapsed:,.0f} rows/s)")
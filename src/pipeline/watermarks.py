@@ -0,0 +1,112 @@
+import sqlite3
+import pandas as pd
+from src.modules.db_connector import sql_placeholder
+
+# Progress markers of incremental pipeline stages (e.g. last raw created_at a
+# derivation has consumed). Mirrors the pipeline_watermarks table in schema.sql.
+SQLITE_DDL = """
+CREATE TABLE IF NOT EXISTS pipeline_watermarks (
+    stage TEXT PRIMARY KEY,
+    watermark TEXT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+MYSQL_DDL = """
+CREATE TABLE IF NOT EXISTS pipeline_watermarks (
+    stage VARCHAR(100) PRIMARY KEY,
+    watermark VARCHAR(64),
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+)
+"""
+
+
+def ensure_watermark_table(conn):
+    """Creates pipeline_watermarks on databases set up before it existed."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(SQLITE_DDL if isinstance(conn, sqlite3.Connection) else MYSQL_DDL)
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def get_watermark(conn, stage):
+    """Returns the stored watermark string for `stage`, or None if it never ran."""
+    ensure_watermark_table(conn)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT watermark FROM pipeline_watermarks WHERE stage = {sql_placeholder(conn)}", (stage,))
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+    return row[0] if row else None
+
+
+def set_watermark(conn, stage, watermark):
+    """Stores the watermark for `stage` (only call after the stage succeeded)."""
+    if watermark is None:
+        return
+    ensure_watermark_table(conn)
+    cursor = conn.cursor()
+    try:
+        if isinstance(conn, sqlite3.Connection):
+            cursor.execute(
+                "INSERT OR REPLACE INTO pipeline_watermarks (stage, watermark) VALUES (?, ?)",
+                (stage, str(watermark))
+            )
+        else:
+            cursor.execute(
+                "INSERT INTO pipeline_watermarks (stage, watermark) VALUES (%s, %s) "
+                "ON DUPLICATE KEY UPDATE watermark = VALUES(watermark)",
+                (stage, str(watermark))
+            )
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def get_max_created_at(conn, table, where="", params=()):
+    """
+    Returns MAX(created_at) of `table` (optionally filtered) as a string, or None.
+
+    created_at has one-second resolution, so rows committed later in the second
+    this is read could carry the same timestamp. When MAX(created_at) falls in
+    the database clock's current second, the second before it is returned
+    instead, so those rows still compare after the stored watermark.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT MAX(created_at), CURRENT_TIMESTAMP FROM {table} {where}", tuple(params))
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+    if not row or row[0] is None:
+        return None
+    latest, now = pd.Timestamp(row[0]), pd.Timestamp(row[1]).floor('s')
+    if latest >= now:
+        latest = now - pd.Timedelta(seconds=1)
+    return latest.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def get_dirty_date_range(conn, table, watermark, where="", params=()):
+    """
+    Returns (min_date, max_date) of rows in `table` whose created_at is after
+    `watermark` (from get_max_created_at), i.e. the date range a downstream
+    stage must recompute. Returns None when nothing changed.
+
+    Assumes upstream writes are committed before the stage reads its new
+    watermark (stages run one after another).
+    """
+    ph = sql_placeholder(conn)
+    condition = f"created_at > {ph}"
+    where = f"{where} AND {condition}" if where else f"WHERE {condition}"
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT MIN(date), MAX(date) FROM {table} {where}", tuple(params) + (watermark,))
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+    if not row or row[0] is None:
+        return None
+    return row[0], row[1]
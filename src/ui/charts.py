@@ -1,17 +1,195 @@
+import os
+import threading
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
+from collections import OrderedDict
+from dotenv import load_dotenv
 
-def plot_line_chart(df, x_col, y_col, title="Time Series"):
-    """Creates a simple line chart."""
-    fig = px.line(df, x=x_col, y=y_col, title=title)
+load_dotenv()
+
+# Points drawn per line trace: about one per horizontal pixel of a wide chart.
+# Longer series are downsampled to this budget before they are sent to the browser.
+CHART_PIXEL_BUDGET = int(os.getenv("CHART_PIXEL_BUDGET", "1200"))
+# Traces with more points than this are drawn with WebGL (Scattergl)
+SCATTERGL_MIN_POINTS = int(os.getenv("SCATTERGL_MIN_POINTS", "1000"))
+FIGURE_CACHE_SIZE = int(os.getenv("FIGURE_CACHE_SIZE", "16"))
+
+# Built figures shared by all sessions: (name, data version) -> go.Figure, least recently used first
+_figure_cache = OrderedDict()
+_figure_lock = threading.Lock()
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: indices of `n_out` points that keep the visual
+    shape of the line (first and last point always kept). x and y are numeric arrays.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # Bucket boundaries over the points between the first and the last
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    indices = np.empty(n_out, dtype=int)
+    indices[0], indices[-1] = 0, n - 1
+
+    previous = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (the last point for the final bucket)
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        # Point of this bucket spanning the largest triangle with the previous pick and that average
+        area = np.abs((x[previous] - avg_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (avg_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        indices[i + 1] = previous
+    return indices
+
+
+def minmax_indices(y, n_out):
+    """
+    Min/max buckets: the lowest and highest point of each of n_out/2 buckets, in
+    order, so spikes survive. Fully vectorized; NaNs are never picked.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=float)
+    size = int(np.ceil(n / (n_out // 2)))
+    buckets = int(np.ceil(n / size))
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    grid = padded.reshape(buckets, size)
+    filled = ~np.isnan(grid).all(axis=1)
+    low = np.nanargmin(np.where(np.isnan(grid[filled]), np.inf, grid[filled]), axis=1)
+    high = np.nanargmax(np.where(np.isnan(grid[filled]), -np.inf, grid[filled]), axis=1)
+    offsets = np.flatnonzero(filled) * size
+    # Keep the endpoints so the line spans the full range, unless they are gaps
+    endpoints = [i for i in (0, n - 1) if np.isfinite(y[i])]
+    return np.unique(np.concatenate([offsets + low, offsets + high, endpoints]).astype(int))
+
+
+def downsample(x, y, n_out=None, method="lttb"):
+    """
+    Indices of about n_out (default CHART_PIXEL_BUDGET) points of the series
+    (x sorted ascending; datetimes allowed). method: 'lttb' or 'minmax'.
+    """
+    n_out = n_out or CHART_PIXEL_BUDGET
+    if len(y) <= n_out:
+        return np.arange(len(y))
+    if method == "minmax":
+        return minmax_indices(y, n_out)
+    x = np.asarray(x)
+    x_numeric = x.astype('datetime64[ns]').astype(np.int64) if np.issubdtype(x.dtype, np.datetime64) else x
+    y = np.asarray(y, dtype=float)
+    valid = ~np.isnan(y)
+    if valid.all():
+        return lttb_indices(x_numeric, y, n_out)
+    kept = np.flatnonzero(valid)
+    return kept[lttb_indices(x_numeric[kept], y[kept], n_out)]
+
+
+def line_trace(x, y, name=None, n_out=None, method="lttb", **kwargs):
+    """
+    Line trace of the series downsampled to the point budget; Scattergl once the
+    drawn points exceed SCATTERGL_MIN_POINTS. Extra kwargs go to the trace.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    keep = downsample(x, y, n_out, method)
+    trace_cls = go.Scattergl if len(keep) > SCATTERGL_MIN_POINTS else go.Scatter
+    return trace_cls(x=x[keep], y=y[keep], mode='lines', name=name, **kwargs)
+
+
+def data_version(*frames):
+    """Cheap fingerprint of the frames' contents (shape, bounds and column sums)."""
+    parts = []
+    for df in frames:
+        if df is None:
+            parts.append(None)
+            continue
+        parts.append(len(df))
+        for column in df.columns:
+            values = df[column].to_numpy()
+            if len(values) == 0:
+                continue
+            if np.issubdtype(values.dtype, np.datetime64):
+                values = values.astype('datetime64[ns]').astype(np.int64)
+            if np.issubdtype(values.dtype, np.number):
+                parts.append((column, values[0], values[-1], float(np.nansum(values))))
+    return hash(str(parts))
+
+
+def cached_figure(name, version, build):
+    """
+    Figure `name` for data `version`, built with build() only on a cache miss.
+    The returned figure is shared between reruns and sessions: do not modify it.
+    """
+    key = (name, version)
+    with _figure_lock:
+        fig = _figure_cache.get(key)
+        if fig is not None:
+            _figure_cache.move_to_end(key)
+            return fig
+
+    fig = build()
+    with _figure_lock:
+        _figure_cache[key] = fig
+        _figure_cache.move_to_end(key)
+        while len(_figure_cache) > FIGURE_CACHE_SIZE:
+            _figure_cache.popitem(last=False)
     return fig
 
+
+def plot_line_chart(df, x_col, y_col, title="Time Series", xaxis_title=None, yaxis_title=None):
+    """Creates a line chart, downsampled and cached by the data version."""
+    def build():
+        fig = go.Figure(line_trace(df[x_col], df[y_col], name=y_col))
+        fig.update_layout(title=title, xaxis_title=xaxis_title or x_col, yaxis_title=yaxis_title or y_col)
+        return fig
+
+    return cached_figure(("line", x_col, y_col, title, xaxis_title, yaxis_title), data_version(df[[x_col, y_col]]), build)
+
+
+def plot_forecast_chart(history, forecast, title="Forecast", yaxis_title="Value"):
+    """
+    History (date, value) followed by the forecast (ds, yhat, yhat_lower, yhat_upper)
+    after the last history date, with its interval as a shaded band. The history is
+    downsampled; the forecast horizon is short and drawn in full.
+    """
+    def build():
+        future = forecast[forecast['ds'] > history['date'].max()]
+        fig = go.Figure()
+        fig.add_trace(line_trace(history['date'], history['value'], name='Actual History'))
+        fig.add_trace(go.Scatter(x=future['ds'], y=future['yhat'], mode='lines', name='Predicted (AI)',
+                                 line=dict(dash='dash', color='purple')))
+        fig.add_trace(go.Scatter(
+            x=np.concatenate([future['ds'].to_numpy(), future['ds'].to_numpy()[::-1]]),
+            y=np.concatenate([future['yhat_upper'].to_numpy(), future['yhat_lower'].to_numpy()[::-1]]),
+            fill='toself',
+            fillcolor='rgba(128, 0, 128, 0.2)',
+            line=dict(color='rgba(255,255,255,0)'),
+            name='Confidence Interval'
+        ))
+        fig.update_layout(title=title, xaxis_title="Date", yaxis_title=yaxis_title)
+        return fig
+
+    version = data_version(history[['date', 'value']], forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']])
+    return cached_figure(("forecast", title, yaxis_title), version, build)
+
+
 def plot_bar_chart(df, x_col, y_col, title="Bar Chart"):
     """Creates a simple bar chart."""
     fig = px.bar(df, x=x_col, y=y_col, title=title)
     return fig
 
-def plot_correlation_heatmap(corr_matrix):
-    """Creates a heatmap for correlation matrix."""
-    fig = px.imshow(corr_matrix, text_auto=True, title="Correlation Heatmap")
+def plot_correlation_heatmap(corr_matrix, title="Correlation Heatmap"):
+    """Creates an annotated heatmap for a correlation matrix (fixed -1..1 colour scale)."""
+    fig = px.imshow(corr_matrix, text_auto=".2f", color_continuous_scale='RdBu_r', zmin=-1, zmax=1, title=title)
     return fig
@@ -1,9 +1,18 @@
 import streamlit as st
 import plotly.express as px
 import pandas as pd
+from ui.charts import plot_correlation_heatmap
 
-def render_dashboard(data=None):
-    """Renders the main dashboard charts."""
+def render_correlation_heatmap(corr, title=None):
+    """Renders a correlation matrix as an annotated heatmap (built by ui.charts)."""
+    st.plotly_chart(plot_correlation_heatmap(corr, title=title), use_container_width=True)
+
+def render_dashboard(data=None, correlation=None):
+    """
+    Renders the main dashboard charts.
+    correlation: Precomputed correlation matrix (TimeSeriesRepository.get_correlation_matrix);
+                 only computed from `data` when not given.
+    """
     st.header("📈 Data Overview")
     
     if data is None or data.empty:
@@ -28,8 +37,6 @@ def render_dashboard(data=None):
     st.line_chart(data)
     
     # Correlation Heatmap
-    if len(data.columns) > 1:
+    if correlation is not None or len(data.columns) > 1:
         st.subheader("Correlation Heatmap")
-        corr = data.corr()
-        fig = px.imshow(corr, text_auto=True, color_continuous_scale='RdBu_r')
-        st.plotly_chart(fig, use_container_width=True)
+        render_correlation_heatmap(correlation if correlation is not None else data.corr())